@@ -0,0 +1,259 @@
+"""
+Календарь занятости исполнителей
+Разбор периодов работ и дерево интервалов для поиска пересечений за O(log n + k)
+"""
+import math
+import random
+import re
+from datetime import date, timedelta
+from contractor_index import ContractorIndex
+from models import Request, ContractorAvailability
+from pricing import parse_work_days
+from request_events import request_events, AVAILABILITY_CHANGED
+
+# Виды записей календаря
+BUSY = 'busy'
+AVAILABLE = 'available'
+
+# "10.11", "10.11.2026", "10.11.26", "10/11"
+_DATE_RE = re.compile(r'(?<!\d)(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?(?!\d)')
+
+def _parse_date(day, month, year, today):
+    """Дата из частей; без года - ближайшая не прошедшая"""
+    if year:
+        year = int(year)
+        if year < 100:
+            year += 2000
+        return date(year, int(month), int(day))
+    parsed = date(today.year, int(month), int(day))
+    if parsed < today:
+        parsed = date(today.year + 1, int(month), int(day))
+    return parsed
+
+def parse_date_range(text, today=None):
+    """Период "10.11-15.11", "с 10.11 по 15.11" или одна дата; None - дат нет или они неверные"""
+    today = today or date.today()
+    try:
+        dates = [_parse_date(day, month, year, today) for day, month, year in _DATE_RE.findall(text or '')]
+    except ValueError:
+        return None
+    if not dates:
+        return None
+
+    start = dates[0]
+    end = dates[1] if len(dates) > 1 else start
+    if end < start:
+        # "28.12-05.01" - конец в следующем году
+        try:
+            end = end.replace(year=end.year + 1)
+        except ValueError:
+            return None
+        if end < start:
+            return None
+    return start, end
+
+def parse_work_period(text, today=None):
+    """Период работ клиента: даты из текста, иначе от сегодня на work_duration дней"""
+    today = today or date.today()
+    period = parse_date_range(text, today)
+    if period and len(_DATE_RE.findall(text)) > 1:
+        return period
+
+    start = period[0] if period else today
+    # "с 10.11 на 3 дня" - длительность считаем без дат
+    days = parse_work_days(_DATE_RE.sub(' ', text or '')) or 1
+    return start, start + timedelta(days=math.ceil(days) - 1)
+
+def parse_period_days(text, today=None):
+    """Срок работ в днях: по датам периода, если они есть ("10.11-15.11" - 6 дней), иначе из длительности"""
+    if _DATE_RE.search(text or ''):
+        start, end = parse_work_period(text, today)
+        return float((end - start).days + 1)
+    return parse_work_days(text)
+
+class _Node:
+    __slots__ = ('key', 'request_id', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, key, request_id):
+        self.key = key  # (начало, конец, ID записи) - порядковые номера дат
+        self.request_id = request_id
+        self.priority = random.random()
+        self.max_end = key[1]
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.key[1]
+        if self.left and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+class IntervalTree:
+    """Декартово дерево по началу интервала с максимумом конца в поддереве"""
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _split(self, node, key, inclusive):
+        """Делит дерево на (ключи < key | <= key, остальные)"""
+        if node is None:
+            return None, None
+        if node.key < key or (inclusive and node.key == key):
+            left, right = self._split(node.right, key, inclusive)
+            node.right = left
+            node.update()
+            return node, right
+        left, right = self._split(node.left, key, inclusive)
+        node.left = right
+        node.update()
+        return left, node
+
+    def _merge(self, left, right):
+        if left is None or right is None:
+            return left or right
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
+
+    def insert(self, key, request_id):
+        left, right = self._split(self.root, key, False)
+        self.root = self._merge(self._merge(left, _Node(key, request_id)), right)
+        self.size += 1
+
+    def remove(self, key):
+        left, right = self._split(self.root, key, False)
+        middle, right = self._split(right, key, True)
+        if middle is not None:
+            self.size -= 1
+        self.root = self._merge(left, right)
+
+    def overlapping(self, start, end):
+        """ID заявок с интервалами, пересекающими [start, end]"""
+        return {request_id for _, request_id in self.intervals(start, end)}
+
+    def intervals(self, start, end):
+        """[(ключ, ID заявки)] интервалов, пересекающих [start, end]"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            # В поддереве все интервалы заканчиваются раньше start
+            if node is None or node.max_end < start:
+                continue
+            stack.append(node.left)
+            # Правее начала только позже - после end там пересечений нет
+            if node.key[0] <= end:
+                if node.key[1] >= start:
+                    found.append((node.key, node.request_id))
+                stack.append(node.right)
+        return found
+
+def _covering(intervals, start, end):
+    """ID заявок, чьи интервалы вместе покрывают каждый день [start, end]"""
+    by_request = {}
+    for key, request_id in intervals:
+        by_request.setdefault(request_id, []).append(key)
+
+    covering = set()
+    for request_id, keys in by_request.items():
+        covered_to = start - 1
+        for key in sorted(keys):
+            # Дыра перед интервалом - дальше покрытие не продолжить
+            if key[0] > covered_to + 1:
+                break
+            covered_to = max(covered_to, key[1])
+        if covered_to >= end:
+            covering.add(request_id)
+    return covering
+
+class ContractorCalendarIndex(ContractorIndex):
+    """Деревья занятых и свободных периодов активных заявок исполнителей"""
+    name = 'Календарь исполнителей'
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def _load_rows(self, db, request_id=None):
+        query = db.query(
+            ContractorAvailability.id, ContractorAvailability.request_id, ContractorAvailability.kind,
+            ContractorAvailability.start_date, ContractorAvailability.end_date
+        ).join(Request, Request.id == ContractorAvailability.request_id).filter(
+            Request.request_type == 'contractor',
+            Request.status == 'active'
+        )
+        if request_id is not None:
+            query = query.filter(ContractorAvailability.request_id == request_id)
+        return query.all()
+
+    def available_among(self, request_ids, start, end):
+        """Заявки из request_ids, которые могут работать в [start, end]:
+        не заняты в эти дни и, если указали свободные периоды, свободны во все эти дни"""
+        self.ensure_loaded()
+        start, end = start.toordinal(), end.toordinal()
+        with self.lock:
+            busy = self.trees[BUSY].overlapping(start, end)
+            available = _covering(self.trees[AVAILABLE].intervals(start, end), start, end)
+            return {
+                request_id for request_id in request_ids
+                if request_id not in busy
+                and (request_id not in self.available_counts or request_id in available)
+            }
+
+    def on_request_created(self, request):
+        # У новой заявки календарь пуст
+        pass
+
+    def on_request_updated(self, request):
+        # Календарь хранится отдельно от полей заявки
+        pass
+
+    def on_availability_changed(self, request_id):
+        """Перечитывает календарь одной заявки"""
+        if not self.loaded:
+            return
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            rows = self._load_rows(db, request_id)
+        finally:
+            db.close()
+
+        with self.lock:
+            self._discard(request_id)
+            for row in rows:
+                self._add(row)
+
+    def subscribe(self):
+        super().subscribe()
+        request_events.subscribe(AVAILABILITY_CHANGED, self.on_availability_changed)
+
+    def _clear(self):
+        self.trees = {BUSY: IntervalTree(), AVAILABLE: IntervalTree()}
+        self.entries = {}  # request_id -> [(вид, ключ)]
+        self.available_counts = {}
+
+    def _add(self, row):
+        key = (row.start_date.toordinal(), row.end_date.toordinal(), row.id)
+        self.trees[row.kind].insert(key, row.request_id)
+        self.entries.setdefault(row.request_id, []).append((row.kind, key))
+        if row.kind == AVAILABLE:
+            self.available_counts[row.request_id] = self.available_counts.get(row.request_id, 0) + 1
+
+    def _discard(self, request_id):
+        for kind, key in self.entries.pop(request_id, ()):
+            self.trees[kind].remove(key)
+        self.available_counts.pop(request_id, None)
+
+# Глобальный экземпляр
+contractor_calendar_index = ContractorCalendarIndex()
+contractor_calendar_index.subscribe()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проверки бюджета: индекс цен (бинарный поиск) против цикла по кандидатам
+Запуск: python bench_budget.py [число исполнителей] [число запросов]
+"""
+import random
+import sys
+import time
+from collections import namedtuple
+from pricing import ContractorPriceIndex, estimate_cost, max_price_per_hour
+
+Row = namedtuple('Row', ['id', 'region_id', 'equipment_categories', 'price_per_hour'])
+
+REGIONS = ['UA-30', 'UA-32', 'UA-46', 'UA-51', 'UA-63', 'UA-12']
+CATEGORIES = ['excavator', 'crane', 'dump_truck', 'loader', 'bulldozer']
+
+def linear_affordable(candidates, budget, work_days):
+    """Как в старом find_matches: проверка каждого кандидата региона в Python"""
+    return {row.id for row in candidates if budget >= estimate_cost(row.price_per_hour, work_days)}
+
+def main():
+    contractors = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = random.Random(42)
+    rows = [
+        Row(request_id, rng.choice(REGIONS), rng.choice(CATEGORIES), round(rng.uniform(300, 3000), -1))
+        for request_id in range(contractors)
+    ]
+    searches = [
+        (rng.choice(REGIONS), rng.choice(CATEGORIES), rng.uniform(5_000, 50_000), rng.choice([1, 2, 3, 5]))
+        for _ in range(queries)
+    ]
+
+    # Кандидаты региона и категории, как их вернул бы SQL-запрос
+    candidates = {}
+    for row in rows:
+        candidates.setdefault((row.region_id, row.equipment_categories), []).append(row)
+
+    index = ContractorPriceIndex()
+    started = time.perf_counter()
+    for row in rows:
+        index._add(row)
+    index.loaded = True
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed_results = [
+        index.affordable([category], max_price_per_hour(budget, days), region_id)
+        for region_id, category, budget, days in searches
+    ]
+    indexed_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    linear_results = [
+        linear_affordable(candidates[(region_id, category)], budget, days)
+        for region_id, category, budget, days in searches
+    ]
+    linear_seconds = time.perf_counter() - started
+
+    assert indexed_results == linear_results
+
+    found = sum(len(result) for result in indexed_results) / queries
+    indexed_ms = indexed_seconds / queries * 1000
+    linear_ms = linear_seconds / queries * 1000
+
+    print(f"Исполнителей: {contractors}, в среднем по бюджету подходит: {found:.0f}")
+    print(f"Построение индекса: {build_seconds:.2f} с")
+    print(f"Индекс цен:  {indexed_ms:8.3f} мс на запрос")
+    print(f"Цикл:        {linear_ms:8.3f} мс на запрос")
+    print(f"Ускорение: x{linear_ms / indexed_ms:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска исполнителей в радиусе: гео-индекс против полного перебора
+Запуск: python bench_geo.py [число исполнителей] [число запросов] [радиус, км]
+"""
+import random
+import sys
+import time
+from geo_index import GeoIndex, haversine_km
+
+# Примерные границы Украины
+LAT_RANGE = (44.4, 52.4)
+LON_RANGE = (22.1, 40.2)
+
+def random_point(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+def linear_within(points, lat, lon, radius_km):
+    """Полный перебор, как без индекса"""
+    found = [
+        (request_id, distance)
+        for request_id, (point_lat, point_lon) in points.items()
+        for distance in (haversine_km(lat, lon, point_lat, point_lon),)
+        if distance <= radius_km
+    ]
+    found.sort(key=lambda item: item[1])
+    return found
+
+def main():
+    contractors = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    radius_km = float(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    rng = random.Random(42)
+    points = {request_id: random_point(rng) for request_id in range(contractors)}
+    centers = [random_point(rng) for _ in range(queries)]
+
+    started = time.perf_counter()
+    index = GeoIndex()
+    for request_id, (lat, lon) in points.items():
+        index.add(request_id, lat, lon)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed_results = [index.within(lat, lon, radius_km) for lat, lon in centers]
+    indexed_seconds = time.perf_counter() - started
+
+    # Перебор медленный - проверяем на части запросов
+    linear_queries = min(queries, 20)
+    started = time.perf_counter()
+    linear_results = [linear_within(points, lat, lon, radius_km) for lat, lon in centers[:linear_queries]]
+    linear_seconds = time.perf_counter() - started
+
+    for indexed, linear in zip(indexed_results, linear_results):
+        assert [request_id for request_id, _ in indexed] == [request_id for request_id, _ in linear]
+
+    found = sum(len(result) for result in indexed_results) / queries
+    indexed_ms = indexed_seconds / queries * 1000
+    linear_ms = linear_seconds / linear_queries * 1000
+
+    print(f"Исполнителей: {contractors}, радиус: {radius_km} км, в среднем найдено: {found:.0f}")
+    print(f"Построение индекса: {build_seconds:.2f} с")
+    print(f"Гео-индекс:     {indexed_ms:8.2f} мс на запрос ({queries} запросов)")
+    print(f"Полный перебор: {linear_ms:8.2f} мс на запрос ({linear_queries} запросов)")
+    print(f"Ускорение: x{linear_ms / indexed_ms:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска слов с опечатками: триграммный индекс против перебора словаря с расстоянием Левенштейна
+Запуск: python bench_trigram.py [размер словаря] [число запросов]
+"""
+import random
+import sys
+import time
+from trigram import TrigramIndex, similarity
+
+ALPHABET = 'абвгдеєжзиіїйклмнопрстуфхцчшщьюя'
+
+def levenshtein(a, b, limit):
+    """Расстояние редактирования; больше limit - дальше не считаем"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def typo(word, rng):
+    """Одна случайная опечатка: замена, пропуск или вставка буквы"""
+    position = rng.randrange(len(word))
+    kind = rng.choice(('replace', 'drop', 'insert'))
+    if kind == 'replace':
+        return word[:position] + rng.choice(ALPHABET) + word[position + 1:]
+    if kind == 'drop':
+        return word[:position] + word[position + 1:]
+    return word[:position] + rng.choice(ALPHABET) + word[position:]
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    rng = random.Random(42)
+    words = list({''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 12))) for _ in range(size)})
+    originals = [rng.choice(words) for _ in range(queries)]
+    misspelled = [typo(word, rng) for word in originals]
+
+    started = time.perf_counter()
+    index = TrigramIndex(words)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed = [index.best(word, threshold=0.4) for word in misspelled]
+    indexed_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = []
+    for word in misspelled:
+        distances = ((levenshtein(word, candidate, 2), candidate) for candidate in words)
+        scanned.append(min(distances)[1])
+    scanned_seconds = time.perf_counter() - started
+
+    indexed_hits = sum(found == original for found, original in zip(indexed, originals))
+    scanned_hits = sum(found == original for found, original in zip(scanned, originals))
+    indexed_ms = indexed_seconds / queries * 1000
+    scanned_ms = scanned_seconds / queries * 1000
+
+    print(f"Словарь: {len(words)} слов, запросов: {queries}")
+    print(f"Построение индекса: {build_seconds:.2f} с")
+    print(f"Триграммы: {indexed_ms:8.3f} мс на запрос, исправлено {indexed_hits}/{queries}")
+    print(f"Левенштейн: {scanned_ms:8.3f} мс на запрос, исправлено {scanned_hits}/{queries}")
+    print(f"Ускорение: x{scanned_ms / indexed_ms:.1f}")
+    print(f"Среднее сходство опечатки с исходным словом: "
+          f"{sum(similarity(a, b) for a, b in zip(originals, misspelled)) / queries:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк меню: клавиатуры и тексты, собираемые на каждый апдейт, против готовых из ui_assets
+Запуск: python bench_ui.py [число апдейтов]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from ui_assets import START_KEYBOARD, PROFILE_KEYBOARD, CONTACT_KEYBOARD, WELCOME_TEXT, PROFILE_TEXT
+
+USER = SimpleNamespace(
+    telegram_id=123456789, first_name='Иван', last_name='Петров', username='ivan', phone=None,
+    is_contractor=False, created_at=datetime(2025, 3, 1)
+)
+
+def build_per_update(user):
+    """Как раньше: start, профиль и шаг связи собирают все с нуля"""
+    welcome_text = f"""
+🏗️ Добро пожаловать в бот диспетчеризации строительной техники!
+
+Привет, {user.first_name}!
+
+Этот бот поможет вам:
+• Найти строительную технику для ваших проектов
+• Найти клиентов для вашей техники
+• Связаться с подходящими партнерами
+
+Выберите, что вас интересует:
+            """
+    start = InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔍 Ищу технику (Клиент)", callback_data="client_mode")],
+        [InlineKeyboardButton("🚛 Предлагаю технику (Исполнитель)", callback_data="contractor_mode")],
+        [InlineKeyboardButton("👤 Мой профиль", callback_data="profile")],
+        [InlineKeyboardButton("📋 Мои заявки", callback_data="my_requests")],
+        [InlineKeyboardButton("📰 Лента заказов", callback_data="jobs")]
+    ])
+    profile_text = f"""
+👤 Ваш профиль:
+
+🆔 ID: {user.telegram_id}
+👤 Имя: {user.first_name} {user.last_name or ''}
+📱 Username: @{user.username or 'не указан'}
+📞 Телефон: {user.phone or 'не указан'}
+🏗️ Режим: {'Исполнитель' if user.is_contractor else 'Клиент'}
+📅 Регистрация: {user.created_at.strftime('%d.%m.%Y')}
+            """
+    profile = InlineKeyboardMarkup([
+        [InlineKeyboardButton("📞 Указать телефон", callback_data="set_phone")],
+        [InlineKeyboardButton("🔄 Переключить режим", callback_data="toggle_mode")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")]
+    ])
+    contact = InlineKeyboardMarkup([
+        [InlineKeyboardButton("💬 Написать в Telegram", callback_data="contact_message")],
+        [InlineKeyboardButton("📞 Позвонить по телефону", callback_data="contact_call")],
+        [InlineKeyboardButton("❌ Отмена", callback_data="start_menu")]
+    ])
+    return (welcome_text, start), (profile_text, profile), contact
+
+def build_from_assets(user):
+    """Сейчас: готовые клавиатуры, в шаблоны подставляются только поля пользователя"""
+    welcome_text = WELCOME_TEXT.format(first_name=user.first_name)
+    profile_text = PROFILE_TEXT.format(
+        telegram_id=user.telegram_id,
+        first_name=user.first_name,
+        last_name=user.last_name or '',
+        username=user.username or 'не указан',
+        phone=user.phone or 'не указан',
+        mode='Исполнитель' if user.is_contractor else 'Клиент',
+        registered=user.created_at.strftime('%d.%m.%Y')
+    )
+    return (welcome_text, START_KEYBOARD), (profile_text, PROFILE_KEYBOARD), CONTACT_KEYBOARD
+
+def measure(build, updates):
+    """(мкс на апдейт, байт и число новых объектов, которые остаются от одного апдейта)"""
+    started = time.perf_counter()
+    for _ in range(updates):
+        build(USER)
+    elapsed = time.perf_counter() - started
+
+    # Выделения считаем отдельно: tracemalloc сильно замедляет выполнение
+    sample = min(updates, 1000)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [build(USER) for _ in range(sample)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    allocated = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del results
+    return elapsed / updates * 1e6, allocated / sample, blocks / sample
+
+def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    old_us, old_bytes, old_blocks = measure(build_per_update, updates)
+    new_us, new_bytes, new_blocks = measure(build_from_assets, updates)
+
+    print(f"Апдейтов: {updates} (start + профиль + шаг выбора связи)")
+    print(f"Сборка на каждый апдейт: {old_us:7.1f} мкс, {old_bytes:7.0f} байт, {old_blocks:5.0f} объектов")
+    print(f"Готовые из ui_assets:    {new_us:7.1f} мкс, {new_bytes:7.0f} байт, {new_blocks:5.0f} объектов")
+    print(f"Ускорение: x{old_us / new_us:.1f}, памяти на апдейт меньше в {old_bytes / new_bytes:.1f} раза")
+
+if __name__ == "__main__":
+    main()
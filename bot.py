@@ -1,14 +1,57 @@
+import asyncio
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
-from database import get_or_create_user, create_request, get_active_requests, find_matches
+import time
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, InlineQueryHandler, TypeHandler, filters, ContextTypes
+from database import (
+    get_or_create_user, create_request, get_active_requests, find_matches,
+    get_user_requests_page, get_requests_page, expire_requests, backfill_expires_at,
+    backfill_regions, backfill_equipment, backfill_fingerprints, cancel_request, archive_requests, RequestLimitError,
+    AlreadySubmittedError, get_request_by_key,
+    add_availability, get_availability, clear_availability, get_telegram_ids, get_requests_by_ids,
+    search_requests
+)
 from google_sheets import sheets_manager
 from sync_sheets import sheets_sync
 from models import User, Request
 from config import Config
 from request_system import request_system
+from availability import parse_date_range, BUSY, AVAILABLE
+from notifications import subscription_index, notification_sender
+from job_feed import job_feed
+from search_index import request_search_index
+from equipment import request_categories
+from request_events import request_events, USER_CHANGED
+from duplicates import DuplicateRequestError, MERGE, REPLACE, KEEP
+from stats import stats_service
+from flood_control import flood_control
+from view_cache import view_cache
+from update_recorder import update_recorder
+from ui_assets import (
+    START_KEYBOARD, PROFILE_KEYBOARD, REQUEST_CREATED_KEYBOARD, ALREADY_SUBMITTED_KEYBOARD, DUPLICATE_KEYBOARD,
+    MY_REQUESTS_FOOTER, cancel_request_button, WELCOME_TEXT, PROFILE_TEXT, MY_REQUESTS_EMPTY_TEXT,
+    MY_REQUESTS_HEADER, MY_REQUESTS_ITEM, REQUEST_CREATED_TEXT, ALREADY_SUBMITTED_TEXT, DUPLICATE_TEXT
+)
+from metrics import InstrumentedRequest, observe_handler, handler_histogram, callback_route, register_application, current_handler
+from query_stats import query_stats
 import re
 
+# Префиксы callback_data с параметрами - для группировки метрик по маршрутам
+CALLBACK_PREFIXES = (
+    'my_requests_', 'admin_requests_', 'create_request_', 'cancel_request_', 'reply_admin_', 'respond_request_',
+    'jobs_', 'find_'
+)
+# Кнопки без параметров - маршруты как есть
+CALLBACK_ROUTES = frozenset((
+    'client_mode', 'contractor_mode', 'profile', 'my_requests', 'jobs', 'start_menu', 'toggle_mode', 'set_phone',
+    'contact_message', 'contact_call', 'duplicate_merge', 'duplicate_replace', 'duplicate_keep'
+))
+
+REQUEST_LIMIT_TEXT = (
+    "⚠️ У вас уже {limit} активных заявок - это максимум.\n\n"
+    "Отмените одну из них в разделе «📋 Мои заявки» или дождитесь, пока она истечет."
+)
+
 def is_admin(user_id):
     """Проверяет, является ли пользователь админом"""
     return user_id == Config.ADMIN_USER_ID
@@ -21,12 +64,27 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class ConstructionBot:
-    def __init__(self):
-        self.application = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
+    def __init__(self, request=None):
+        """request - свой транспорт Bot API (replay_updates.py подставляет поддельный Telegram)"""
+        self.application = (
+            Application.builder()
+            .token(Config.TELEGRAM_BOT_TOKEN)
+            .request(request or InstrumentedRequest(connection_pool_size=256))
+            .build()
+        )
+        register_application(self.application)
         self.setup_handlers()
+        self.setup_jobs()
     
     def setup_handlers(self):
         """Настраивает обработчики команд"""
+        # Запись апдейтов для воспроизведения нагрузки (RECORD_UPDATES_FILE) - до защиты от флуда
+        if update_recorder:
+            self.application.add_handler(TypeHandler(Update, update_recorder.handle_update), group=-3)
+        
+        # Лимит апдейтов на пользователя - раньше всех, чтобы флуд не доходил до логов и БД
+        self.application.add_handler(TypeHandler(Update, flood_control.handle_update), group=-2)
+        
         # Добавляем общий логгер для всех апдейтов
         async def log_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"📨 Получен update: {update}")
@@ -38,6 +96,10 @@ class ConstructionBot:
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("profile", self.profile_command))
         self.application.add_handler(CommandHandler("my_requests", self.my_requests_command))
+        self.application.add_handler(CommandHandler("jobs", self.jobs_command))
+        self.application.add_handler(CommandHandler("busy", self.busy_command))
+        self.application.add_handler(CommandHandler("free", self.free_command))
+        self.application.add_handler(CommandHandler("calendar", self.calendar_command))
         
         # Админ-команды
         self.application.add_handler(CommandHandler("admin", self.admin_command))
@@ -45,6 +107,9 @@ class ConstructionBot:
         self.application.add_handler(CommandHandler("requests", self.requests_command))
         self.application.add_handler(CommandHandler("send", self.send_message_command))
         self.application.add_handler(CommandHandler("sync", self.sync_command))
+        self.application.add_handler(CommandHandler("queries", self.queries_command))
+        self.application.add_handler(CommandHandler("find", self.find_command))
+        self.application.add_handler(InlineQueryHandler(self.inline_query))
         
         # Обработчики кнопок
         self.application.add_handler(CallbackQueryHandler(self.button_callback))
@@ -52,6 +117,60 @@ class ConstructionBot:
         # Обработчики сообщений
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
     
+    def setup_jobs(self):
+        """Настраивает фоновые задачи"""
+        job_queue = self.application.job_queue
+        if job_queue is None:
+            logger.warning("JobQueue недоступен (нужен python-telegram-bot[job-queue]), истечение заявок отключено")
+            return
+        
+        job_queue.run_repeating(self.expire_requests_job, interval=Config.EXPIRY_SWEEP_INTERVAL, first=10)
+        job_queue.run_repeating(self.archive_requests_job, interval=Config.ARCHIVE_INTERVAL, first=60)
+    
+    async def expire_requests_job(self, context: ContextTypes.DEFAULT_TYPE):
+        """Закрывает просроченные заявки порциями и обновляет их в Google Sheets"""
+        try:
+            backfill_expires_at(Config.EXPIRY_BATCH_SIZE)
+            backfill_regions(Config.EXPIRY_BATCH_SIZE)
+            backfill_equipment(Config.EXPIRY_BATCH_SIZE)
+            backfill_fingerprints(Config.EXPIRY_BATCH_SIZE)
+            
+            expired = []
+            for _ in range(Config.EXPIRY_MAX_BATCHES):
+                batch = expire_requests(Config.EXPIRY_BATCH_SIZE)
+                expired += batch
+                if len(batch) < Config.EXPIRY_BATCH_SIZE:
+                    break
+            
+            if expired:
+                logger.info(f"⏰ Истекло заявок: {len(expired)}")
+                # Google Sheets отвечает медленно - не блокируем обработку апдейтов
+                await asyncio.to_thread(
+                    sheets_sync.update_requests_in_sheets,
+                    [request_id for request_id, _ in expired],
+                    'expired'
+                )
+        except Exception as e:
+            logger.error(f"expire_requests_job: Ошибка: {e}", exc_info=True)
+    
+    async def archive_requests_job(self, context: ContextTypes.DEFAULT_TYPE):
+        """Переносит старые закрытые заявки в архив короткими транзакциями"""
+        try:
+            archived = 0
+            for _ in range(Config.ARCHIVE_MAX_BATCHES):
+                moved = archive_requests(Config.ARCHIVE_BATCH_SIZE)
+                archived += moved
+                if moved < Config.ARCHIVE_BATCH_SIZE:
+                    break
+                # Отдаем цикл событий обработке апдейтов между порциями
+                await asyncio.sleep(0)
+            
+            if archived:
+                logger.info(f"🗄️ Перенесено в архив заявок: {archived}")
+        except Exception as e:
+            logger.error(f"archive_requests_job: Ошибка: {e}", exc_info=True)
+    
+    @observe_handler('start_command')
     async def start_command(self, update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
         logger.info(f"=== START COMMAND от пользователя {update.effective_user.id if hasattr(update, 'effective_user') and update.effective_user else 'Unknown'}")
@@ -72,26 +191,8 @@ class ConstructionBot:
                 last_name=user.last_name
             )
             
-            welcome_text = f"""
-🏗️ Добро пожаловать в бот диспетчеризации строительной техники!
-
-Привет, {user.first_name}! 
-
-Этот бот поможет вам:
-• Найти строительную технику для ваших проектов
-• Найти клиентов для вашей техники
-• Связаться с подходящими партнерами
-
-Выберите, что вас интересует:
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("🔍 Ищу технику (Клиент)", callback_data="client_mode")],
-                [InlineKeyboardButton("🚛 Предлагаю технику (Исполнитель)", callback_data="contractor_mode")],
-                [InlineKeyboardButton("👤 Мой профиль", callback_data="profile")],
-                [InlineKeyboardButton("📋 Мои заявки", callback_data="my_requests")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            welcome_text = WELCOME_TEXT.format(first_name=user.first_name)
+            reply_markup = START_KEYBOARD
             
             if hasattr(update, 'message') and update.message:
                 await update.message.reply_text(welcome_text, reply_markup=reply_markup)
@@ -135,13 +236,19 @@ class ConstructionBot:
 /help - Эта справка
 /profile - Настройки профиля
 /my_requests - Мои заявки
+/jobs - Лента заказов для исполнителей
+/busy <ID заявки> <с>-<по> - Техника занята в эти дни
+/free <ID заявки> <с>-<по> - Техника свободна в эти дни
+/calendar <ID заявки> [clear] - Календарь заявки
 
 **Админ-команды:**
 /admin - Админ-панель
 /users - Список пользователей
-/requests - Все заявки
+/requests [client|contractor] [статус] - Все заявки
 /send <user_id> <сообщение> - Отправить сообщение
 /sync - Синхронизировать Google Sheets с БД
+/queries [N] - Самые тяжелые SQL-запросы
+/find <текст> - Поиск заявок (и архива) по тексту, имени и телефону
         """
         await update.message.reply_text(help_text)
     
@@ -153,6 +260,125 @@ class ConstructionBot:
         """Обработчик команды /my_requests"""
         await self.show_my_requests(update, context)
     
+    async def jobs_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /jobs"""
+        await self.show_job_feed(update, context)
+    
+    async def show_job_feed(self, update, context: ContextTypes.DEFAULT_TYPE, offset=0):
+        """Показывает ленту заказов исполнителя; страница - срез закэшированного списка"""
+        user = update.effective_user if hasattr(update, 'effective_user') and update.effective_user else update.from_user
+        db_user = get_or_create_user(telegram_id=user.id, username=user.username,
+                                     first_name=user.first_name, last_name=user.last_name)
+        
+        limit = Config.JOB_FEED_PAGE_SIZE
+        request_ids, total = job_feed.page(db_user.id, offset, limit)
+        jobs = get_requests_by_ids(request_ids)
+        
+        if not jobs:
+            text = (
+                "📰 Лента заказов\n\n"
+                "Подходящих заказов пока нет.\n\n"
+                "Лента строится по вашим активным предложениям техники: регион и вид техники."
+            )
+        else:
+            text = f"📰 Лента заказов ({offset + 1}-{offset + len(request_ids)} из {total}):\n\n"
+            for job in jobs:
+                text += f"🔍 #{job.id} {job.equipment_type or 'Техника'}\n"
+                text += f"   📍 {job.location}\n"
+                if job.budget:
+                    text += f"   💰 {job.budget:.0f} грн\n"
+                if job.work_duration:
+                    text += f"   ⏱ {job.work_duration}\n"
+                text += "\n"
+        
+        keyboard = [
+            [InlineKeyboardButton(f"✋ Откликнуться на #{job.id}", callback_data=f"respond_request_{job.id}")]
+            for job in jobs
+        ]
+        navigation = []
+        if offset > 0:
+            navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"jobs_{max(offset - limit, 0)}"))
+        if offset + limit < total:
+            navigation.append(InlineKeyboardButton("Дальше ➡️", callback_data=f"jobs_{offset + limit}"))
+        if navigation:
+            keyboard.append(navigation)
+        keyboard.append([InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        if hasattr(update, 'edit_message_text'):
+            await update.edit_message_text(text, reply_markup=reply_markup)
+        else:
+            await update.message.reply_text(text, reply_markup=reply_markup)
+    
+    async def busy_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /busy - отметить занятые дни"""
+        await self.add_calendar_period(update, context, BUSY)
+    
+    async def free_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /free - отметить свободные дни"""
+        await self.add_calendar_period(update, context, AVAILABLE)
+    
+    async def add_calendar_period(self, update: Update, context: ContextTypes.DEFAULT_TYPE, kind):
+        """Добавляет период в календарь заявки исполнителя"""
+        args = context.args
+        period = parse_date_range(' '.join(args[1:])) if len(args) >= 2 else None
+        if not args or not args[0].isdigit() or not period:
+            await update.message.reply_text(
+                "❌ Неверный формат команды.\n\n"
+                f"Использование: `/{'busy' if kind == BUSY else 'free'} <ID заявки> <с>-<по>`\n"
+                "Пример: `/busy 15 10.11-15.11`",
+                parse_mode='Markdown'
+            )
+            return
+        
+        db_user = get_or_create_user(update.effective_user.id)
+        start_date, end_date = period
+        if not add_availability(int(args[0]), db_user.id, kind, start_date, end_date):
+            await update.message.reply_text("❌ Активная заявка исполнителя с таким ID не найдена.")
+            return
+        
+        label = "занята" if kind == BUSY else "свободна"
+        await update.message.reply_text(
+            f"✅ Техника по заявке #{args[0]} {label} {start_date:%d.%m.%Y} - {end_date:%d.%m.%Y}"
+        )
+    
+    async def calendar_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /calendar - показать или очистить календарь заявки"""
+        args = context.args
+        if not args or not args[0].isdigit():
+            await update.message.reply_text(
+                "❌ Использование: `/calendar <ID заявки>` или `/calendar <ID заявки> clear`",
+                parse_mode='Markdown'
+            )
+            return
+        
+        db_user = get_or_create_user(update.effective_user.id)
+        request_id = int(args[0])
+        if len(args) > 1 and args[1] == 'clear':
+            deleted = clear_availability(request_id, db_user.id)
+            if deleted is None:
+                await update.message.reply_text("❌ Активная заявка исполнителя с таким ID не найдена.")
+            else:
+                await update.message.reply_text(f"🗑 Календарь заявки #{request_id} очищен ({deleted} периодов).")
+            return
+        
+        periods = get_availability(request_id, db_user.id)
+        if periods is None:
+            await update.message.reply_text("❌ Активная заявка исполнителя с таким ID не найдена.")
+            return
+        if not periods:
+            await update.message.reply_text(
+                f"📅 Календарь заявки #{request_id} пуст - техника считается свободной.\n\n"
+                "Отметить дни: /busy или /free"
+            )
+            return
+        
+        lines = [f"📅 Календарь заявки #{request_id}:\n"]
+        for period in periods:
+            icon = "🔴 занята" if period.kind == BUSY else "🟢 свободна"
+            lines.append(f"{icon}: {period.start_date:%d.%m.%Y} - {period.end_date:%d.%m.%Y}")
+        await update.message.reply_text('\n'.join(lines))
+    
     async def admin_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Админ-панель"""
         user_id = update.effective_user.id
@@ -166,29 +392,21 @@ class ConstructionBot:
 
 **Доступные команды:**
 • `/users` - Список пользователей
-• `/requests` - Все заявки
+• `/requests [client|contractor] [статус]` - Все заявки
 • `/send <user_id> <сообщение>` - Отправить сообщение пользователю
+• `/queries [N]` - Самые тяжелые SQL-запросы
 
 **Статистика:**
         """
         
-        # Получаем статистику
-        from database import SessionLocal, User, Request
-        db = SessionLocal()
-        try:
-            total_users = db.query(User).count()
-            active_requests = db.query(Request).filter(Request.status == 'active').count()
-            clients = db.query(User).filter(User.is_contractor == False).count()
-            contractors = db.query(User).filter(User.is_contractor == True).count()
-            
-            text += f"""
-👥 Пользователей: {total_users}
-   • Клиентов: {clients}
-   • Исполнителей: {contractors}
-📋 Активных заявок: {active_requests}
-            """
-        finally:
-            db.close()
+        # Получаем статистику (тот же снимок, что и для /metrics)
+        stats = stats_service.get_snapshot()
+        text += f"""
+👥 Пользователей: {stats['total_users']}
+   • Клиентов: {stats['clients']}
+   • Исполнителей: {stats['contractors']}
+📋 Активных заявок: {stats['active_requests']}
+        """
         
         await update.message.reply_text(text, parse_mode='Markdown')
     
@@ -223,44 +441,122 @@ class ConstructionBot:
         await update.message.reply_text(text, parse_mode='Markdown')
     
     async def requests_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Все заявки"""
+        """Все заявки: /requests [client|contractor] [статус]"""
         user_id = update.effective_user.id
         
         if not is_admin(user_id):
             await update.message.reply_text("❌ У вас нет прав администратора.")
             return
         
+        request_type = None
+        status = None
+        for arg in context.args or []:
+            if arg in ('client', 'contractor'):
+                request_type = arg
+            else:
+                status = arg
+        
+        await self.show_admin_requests(update, request_type, status)
+    
+    async def show_admin_requests(self, update_or_query, request_type=None, status=None, cursor=None, direction='next'):
+        """Показывает админу страницу заявок с фильтрами"""
         try:
-            from database import SessionLocal, Request, User
-            db = SessionLocal()
-            try:
-                requests = db.query(Request).order_by(Request.created_at.desc()).limit(10).all()
-                
-                text = "📋 **Последние 10 заявок:**\n\n"
-                for req in requests:
-                    user = db.query(User).filter(User.id == req.user_id).first()
-                    type_emoji = "🔍" if req.request_type == "client" else "🚛"
-                    contact_pref = req.contact_preference or "message"
-                    contact_emoji = "💬" if contact_pref == "message" else "📞"
-                    
-                    text += f"{type_emoji} **ID: {req.id}**\n"
-                    text += f"👤 {user.first_name if user else 'Неизвестно'}\n"
-                    text += f"📍 {req.location}\n"
-                    text += f"📝 {req.title}\n"
-                    text += f"{contact_emoji} {contact_pref}\n"
-                    text += f"📅 {req.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+            requests, has_newer, has_older = get_requests_page(
+                request_type=request_type,
+                status=status,
+                cursor=cursor,
+                direction=direction,
+                limit=10
+            )
+            
+            filters_text = ", ".join(f for f in (request_type, status) if f)
+            text = f"📋 **Заявки{f' ({filters_text})' if filters_text else ''}:**\n\n"
+            for req in requests:
+                type_emoji = "🔍" if req.request_type == "client" else "🚛"
+                contact_pref = req.contact_preference or "message"
+                contact_emoji = "💬" if contact_pref == "message" else "📞"
                 
-                if not requests:
-                    text = "📋 Заявок пока нет."
-                    
-            finally:
-                db.close()
+                text += f"{type_emoji} **ID: {req.id}** ({req.status})\n"
+                text += f"👤 {req.user.first_name if req.user else 'Неизвестно'}\n"
+                text += f"📍 {req.location}\n"
+                text += f"📝 {req.title}\n"
+                text += f"{contact_emoji} {contact_pref}\n"
+                text += f"📅 {req.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+            
+            if not requests:
+                text = "📋 Заявок пока нет."
+            
+            # Фильтры передаем в callback_data, чтобы листать тот же срез
+            page_key = f"{request_type or 'all'}_{status or 'all'}"
+            navigation = []
+            if requests and has_newer:
+                navigation.append(InlineKeyboardButton("⬅️ Новее", callback_data=f"admin_requests_prev_{page_key}_{requests[0].id}"))
+            if requests and has_older:
+                navigation.append(InlineKeyboardButton("Старее ➡️", callback_data=f"admin_requests_next_{page_key}_{requests[-1].id}"))
+            reply_markup = InlineKeyboardMarkup([navigation]) if navigation else None
             
-            await update.message.reply_text(text, parse_mode='Markdown')
+            if hasattr(update_or_query, 'edit_message_text'):
+                await update_or_query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+            else:
+                await update_or_query.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
             
         except Exception as e:
-            logger.error(f"requests_command: Ошибка: {e}", exc_info=True)
-            await update.message.reply_text(f"❌ Ошибка при получении заявок: {str(e)}")
+            logger.error(f"show_admin_requests: Ошибка: {e}", exc_info=True)
+            error_text = f"❌ Ошибка при получении заявок: {str(e)}"
+            if hasattr(update_or_query, 'edit_message_text'):
+                await update_or_query.edit_message_text(error_text)
+            else:
+                await update_or_query.message.reply_text(error_text)
+    
+    async def find_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Полнотекстовый поиск заявок: /find <текст>"""
+        if not is_admin(update.effective_user.id):
+            await update.message.reply_text("❌ У вас нет прав администратора.")
+            return
+        
+        query_text = ' '.join(context.args or [])
+        if not query_text:
+            await update.message.reply_text(
+                "Использование: `/find <текст>`\nИщет по заголовку, описанию, локации, технике, имени и телефону, включая архивные заявки.",
+                parse_mode='Markdown'
+            )
+            return
+        
+        # Текст запроса не помещается в callback_data - храним его для кнопок листания
+        context.user_data['find_query'] = await self.show_search_results(update, query_text)
+    
+    async def show_search_results(self, update_or_query, query_text, offset=0):
+        """Показывает админу страницу результатов поиска; возвращает запрос, по которому искали"""
+        limit = Config.FIND_PAGE_SIZE
+        requests, has_more, used_query = search_requests(query_text, offset, limit)
+        
+        if not requests:
+            text = f"🔎 По запросу «{query_text}» ничего не найдено."
+        else:
+            text = f"🔎 «{used_query}» - результаты {offset + 1}-{offset + len(requests)}:\n\n"
+            if used_query != query_text:
+                text = f"✏️ По запросу «{query_text}» ничего нет, показаны результаты по «{used_query}»\n" + text
+            for req in requests:
+                type_emoji = "🔍" if req.request_type == "client" else "🚛"
+                user = req.user
+                text += f"{type_emoji} ID: {req.id} ({req.status})\n"
+                text += f"👤 {user.first_name or ''} {user.last_name or ''} {user.phone or ''}\n" if user else ""
+                text += f"📍 {req.location}\n"
+                text += f"📝 {req.title}\n"
+                text += f"📅 {req.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+        
+        navigation = []
+        if offset > 0:
+            navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"find_{max(offset - limit, 0)}"))
+        if has_more:
+            navigation.append(InlineKeyboardButton("Дальше ➡️", callback_data=f"find_{offset + limit}"))
+        reply_markup = InlineKeyboardMarkup([navigation]) if navigation else None
+        
+        if hasattr(update_or_query, 'edit_message_text'):
+            await update_or_query.edit_message_text(text, reply_markup=reply_markup)
+        else:
+            await update_or_query.message.reply_text(text, reply_markup=reply_markup)
+        return used_query
     
     async def send_message_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Отправить сообщение пользователю"""
@@ -319,7 +615,68 @@ class ConstructionBot:
             logger.error(f"sync_command: Ошибка: {e}", exc_info=True)
             await update.message.reply_text(f"❌ Ошибка синхронизации: {str(e)}")
     
+    async def queries_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Самые тяжелые формы SQL-запросов: /queries [N]"""
+        user_id = update.effective_user.id
+        
+        if not is_admin(user_id):
+            await update.message.reply_text("❌ У вас нет прав администратора.")
+            return
+        
+        try:
+            limit = int(context.args[0]) if context.args else 10
+        except ValueError:
+            limit = 10
+        
+        rows = query_stats.top(limit)
+        if not rows:
+            await update.message.reply_text("🗄️ Запросов пока не было.")
+            return
+        
+        text = f"🗄️ Топ-{len(rows)} запросов по суммарному времени (всего: {query_stats.total_queries}):\n\n"
+        for row in rows:
+            text += f"• {row['count']}× | всего {row['total_ms']} мс | p50 {row['p50_ms']} | p99 {row['p99_ms']} мс\n"
+            text += f"  {row['shape'][:200]}\n\n"
+        
+        # Формы запросов содержат символы разметки, поэтому шлем простым текстом
+        await update.message.reply_text(text[:4000])
+    
+    @observe_handler('inline_query')
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Inline-поиск диспетчера по активным заявкам: @bot экскаватор Київ"""
+        query = update.inline_query
+        if not is_admin(query.from_user.id):
+            await query.answer([], cache_time=300, is_personal=True)
+            return
+        
+        results = []
+        for doc in request_search_index.documents(request_search_index.search(query.query)):
+            type_emoji = "🔍" if doc.request_type == 'client' else "🚛"
+            if doc.request_type == 'client':
+                price = f"💰 {doc.budget:.0f} грн" if doc.budget else ""
+            else:
+                price = f"💰 {doc.price_per_hour:.0f} грн/ч" if doc.price_per_hour else ""
+            description = ' · '.join(part for part in (f"📍 {doc.location}", doc.equipment, price) if part)
+            results.append(InlineQueryResultArticle(
+                id=str(doc.id),
+                title=f"{type_emoji} #{doc.id} {doc.title}",
+                description=description,
+                input_message_content=InputTextMessageContent(f"{type_emoji} Заявка #{doc.id}\n{doc.title}\n{description}")
+            ))
+        await query.answer(results, cache_time=10, is_personal=True)
+    
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик нажатий на кнопки с замером времени по маршруту"""
+        name = f"button_callback:{callback_route(update.callback_query.data or '', CALLBACK_PREFIXES, CALLBACK_ROUTES)}"
+        token = current_handler.set(name)
+        start = time.perf_counter()
+        try:
+            await self.handle_button(update, context)
+        finally:
+            handler_histogram(name).observe(time.perf_counter() - start)
+            current_handler.reset(token)
+    
+    async def handle_button(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик нажатий на кнопки"""
         query = update.callback_query
         await query.answer()
@@ -341,39 +698,79 @@ class ConstructionBot:
             elif data == "my_requests":
                 logger.info("button_callback: Обрабатываем my_requests")
                 await self.show_my_requests(query, context)
-        elif data == "start_menu":
-            logger.info("button_callback: Обрабатываем start_menu")
-            # Сбрасываем данные заявки при возврате в главное меню
-            request_system.clear_context(context)
-            await self.start_command(query, context)
-        elif data.startswith("create_request_"):
-            request_type = data.split("_")[2]
-            logger.info(f"button_callback: Обрабатываем create_request_{request_type}")
-            if request_type == 'client':
-                await self.start_client_request(query, context)
+            elif data == "jobs":
+                await self.show_job_feed(query, context)
+            elif data.startswith("jobs_"):
+                await self.show_job_feed(query, context, offset=int(data.split("_")[1]))
+            elif data.startswith("my_requests_"):
+                # my_requests_next_<id> / my_requests_prev_<id>
+                _, _, direction, cursor = data.split("_")
+                logger.info(f"button_callback: Обрабатываем my_requests {direction} от {cursor}")
+                await self.show_my_requests(query, context, cursor=int(cursor), direction=direction)
+            elif data == "start_menu":
+                logger.info("button_callback: Обрабатываем start_menu")
+                # Сбрасываем данные заявки при возврате в главное меню
+                request_system.clear_context(context)
+                await self.start_command(query, context)
+            elif data.startswith("create_request_"):
+                request_type = data.split("_")[2]
+                logger.info(f"button_callback: Обрабатываем create_request_{request_type}")
+                if request_type == 'client':
+                    await self.start_client_request(query, context)
+                else:
+                    await self.start_contractor_request(query, context)
+            elif data == "toggle_mode":
+                logger.info("button_callback: Обрабатываем toggle_mode")
+                await self.toggle_mode(query, context)
+            elif data == "set_phone":
+                logger.info("button_callback: Обрабатываем set_phone")
+                await self.set_phone(query, context)
+            elif data == "contact_message":
+                logger.info("button_callback: Обрабатываем contact_message")
+                await self.handle_contact_button(query, context, "contact_message")
+            elif data == "contact_call":
+                logger.info("button_callback: Обрабатываем contact_call")
+                await self.handle_contact_button(query, context, "contact_call")
+            elif data in ("duplicate_merge", "duplicate_replace", "duplicate_keep"):
+                if not context.user_data.get('request_data'):
+                    await query.edit_message_text("Черновик заявки устарел. Создайте заявку заново через /start.")
+                    return
+                await self.save_completed_request(query, context, on_duplicate=data.split("_")[1])
+            elif data.startswith("cancel_request_"):
+                request_id = int(data.split("_")[2])
+                logger.info(f"button_callback: Обрабатываем cancel_request {request_id}")
+                await self.cancel_user_request(query, context, request_id)
+            elif data.startswith("admin_requests_"):
+                # admin_requests_<next|prev>_<тип|all>_<статус|all>_<id>
+                _, _, direction, request_type, status, cursor = data.split("_")
+                if not is_admin(query.from_user.id):
+                    await query.edit_message_text("❌ У вас нет прав администратора.")
+                    return
+                await self.show_admin_requests(
+                    query,
+                    request_type=None if request_type == 'all' else request_type,
+                    status=None if status == 'all' else status,
+                    cursor=int(cursor),
+                    direction=direction
+                )
+            elif data.startswith("find_"):
+                query_text = context.user_data.get('find_query')
+                if not is_admin(query.from_user.id) or not query_text:
+                    await query.edit_message_text("Поиск устарел. Повторите команду /find.")
+                    return
+                await self.show_search_results(query, query_text, offset=int(data.split("_")[1]))
+            elif data.startswith("respond_request_"):
+                request_id = int(data.split("_")[2])
+                await self.respond_to_request(query, request_id)
+            elif data.startswith("reply_admin_"):
+                admin_id = int(data.split("_")[2])
+                context.user_data['replying_to_admin'] = True
+                context.user_data['admin_reply_target_id'] = admin_id
+                await query.edit_message_text("💬 Введите ваш ответ администратору:")
             else:
-                await self.start_contractor_request(query, context)
-        elif data == "toggle_mode":
-            logger.info("button_callback: Обрабатываем toggle_mode")
-            await self.toggle_mode(query, context)
-        elif data == "set_phone":
-            logger.info("button_callback: Обрабатываем set_phone")
-            await self.set_phone(query, context)
-        elif data == "contact_message":
-            logger.info("button_callback: Обрабатываем contact_message")
-            await self.handle_contact_button(query, context, "contact_message")
-        elif data == "contact_call":
-            logger.info("button_callback: Обрабатываем contact_call")
-            await self.handle_contact_button(query, context, "contact_call")
-        elif data.startswith("reply_admin_"):
-            admin_id = int(data.split("_")[2])
-            context.user_data['replying_to_admin'] = True
-            context.user_data['admin_reply_target_id'] = admin_id
-            await query.edit_message_text("💬 Введите ваш ответ администратору:")
-        else:
-            # Обработка неизвестных callback'ов
-            logger.warning(f"button_callback: Неизвестный callback: {data}")
-            await query.edit_message_text("Неизвестная команда. Используйте /start для возврата в главное меню.")
+                # Обработка неизвестных callback'ов
+                logger.warning(f"button_callback: Неизвестный callback: {data}")
+                await query.edit_message_text("Неизвестная команда. Используйте /start для возврата в главное меню.")
         except Exception as e:
             logger.error(f"button_callback: Ошибка при обработке {data}: {e}", exc_info=True)
             try:
@@ -381,14 +778,39 @@ class ConstructionBot:
             except Exception as e2:
                 logger.error(f"button_callback: Ошибка при отправке сообщения об ошибке: {e2}")
     
+    async def check_request_limit(self, query):
+        """Проверяет лимит активных заявок до начала заполнения; True - можно создавать"""
+        user = query.from_user
+        db_user = get_or_create_user(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+        if db_user.active_requests_count >= Config.MAX_REQUESTS_PER_USER:
+            keyboard = [
+                [InlineKeyboardButton("📋 Мои заявки", callback_data="my_requests")],
+                [InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")]
+            ]
+            await query.edit_message_text(
+                REQUEST_LIMIT_TEXT.format(limit=Config.MAX_REQUESTS_PER_USER),
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return False
+        return True
+    
     async def start_client_request(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Начинает процесс создания заявки клиента"""
+        if not await self.check_request_limit(query):
+            return
         question = request_system.start_request('client', context)
         text = f"🔍 Создание заявки клиента\n\n{question}"
         await query.edit_message_text(text)
     
     async def start_contractor_request(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Начинает процесс создания заявки исполнителя"""
+        if not await self.check_request_limit(query):
+            return
         question = request_system.start_request('contractor', context)
         text = f"🚛 Создание заявки исполнителя\n\n{question}"
         await query.edit_message_text(text)
@@ -409,32 +831,31 @@ class ConstructionBot:
                 return
             
             logger.info(f"show_profile: Пользователь: {user.id}, {user.first_name}")
-                
-            db_user = get_or_create_user(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name
-            )
-            logger.info(f"show_profile: DB пользователь создан/найден: {db_user.id}")
-            
-            profile_text = f"""
-👤 Ваш профиль:
-
-🆔 ID: {db_user.telegram_id}
-👤 Имя: {db_user.first_name} {db_user.last_name or ''}
-📱 Username: @{db_user.username or 'не указан'}
-📞 Телефон: {db_user.phone or 'не указан'}
-🏗️ Режим: {'Исполнитель' if db_user.is_contractor else 'Клиент'}
-📅 Регистрация: {db_user.created_at.strftime('%d.%m.%Y')}
-            """
             
-            keyboard = [
-                [InlineKeyboardButton("📞 Указать телефон", callback_data="set_phone")],
-                [InlineKeyboardButton("🔄 Переключить режим", callback_data="toggle_mode")],
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            # Готовый экран из кэша - без запроса к БД
+            cached = view_cache.get(user.id, 'profile')
+            if cached:
+                profile_text, reply_markup = cached
+            else:
+                db_user = get_or_create_user(
+                    telegram_id=user.id,
+                    username=user.username,
+                    first_name=user.first_name,
+                    last_name=user.last_name
+                )
+                logger.info(f"show_profile: DB пользователь создан/найден: {db_user.id}")
+                
+                profile_text = PROFILE_TEXT.format(
+                    telegram_id=db_user.telegram_id,
+                    first_name=db_user.first_name,
+                    last_name=db_user.last_name or '',
+                    username=db_user.username or 'не указан',
+                    phone=db_user.phone or 'не указан',
+                    mode='Исполнитель' if db_user.is_contractor else 'Клиент',
+                    registered=db_user.created_at.strftime('%d.%m.%Y')
+                )
+                reply_markup = PROFILE_KEYBOARD
+                view_cache.put(user.id, db_user.id, 'profile', (), profile_text, reply_markup)
             
             logger.info("show_profile: Отправляем сообщение")
             if hasattr(update, 'message') and update.message:
@@ -457,8 +878,61 @@ class ConstructionBot:
             except Exception as e2:
                 logger.error(f"show_profile: Ошибка при отправке сообщения об ошибке: {e2}")
     
-    async def show_my_requests(self, update, context: ContextTypes.DEFAULT_TYPE):
-        """Показывает заявки пользователя"""
+    def render_my_requests(self, user, cursor, direction):
+        """Текст и клавиатура страницы "Мои заявки" из БД; результат сохраняется в кэш экранов"""
+        db_user = get_or_create_user(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+        logger.info(f"show_my_requests: DB пользователь создан/найден: {db_user.id}")
+        
+        # Получаем одну страницу заявок, LIMIT выполняется в SQL
+        user_requests, has_newer, has_older = get_user_requests_page(
+            db_user.id,
+            cursor=cursor,
+            direction=direction,
+            limit=Config.MY_REQUESTS_PAGE_SIZE
+        )
+        logger.info(f"show_my_requests: Заявок на странице: {len(user_requests)}")
+        
+        if not user_requests:
+            text = MY_REQUESTS_EMPTY_TEXT
+            logger.info("show_my_requests: Нет заявок, показываем заглушку")
+        else:
+            text = MY_REQUESTS_HEADER + ''.join(
+                MY_REQUESTS_ITEM.format(
+                    status_emoji="✅" if req.status == "active" else "⏸️",
+                    type_emoji="🔍" if req.request_type == "client" else "🚛",
+                    id=req.id,
+                    location=req.location,
+                    created=req.created_at.strftime('%d.%m.%Y %H:%M'),
+                    status=req.status
+                )
+                for req in user_requests
+            )
+        
+        # Активные заявки можно отменить, освобождая место под новые
+        keyboard = [
+            [cancel_request_button(req.id)]
+            for req in user_requests
+            if req.status == 'active'
+        ]
+        navigation = []
+        if user_requests and has_newer:
+            navigation.append(InlineKeyboardButton("⬅️ Новее", callback_data=f"my_requests_prev_{user_requests[0].id}"))
+        if user_requests and has_older:
+            navigation.append(InlineKeyboardButton("Старее ➡️", callback_data=f"my_requests_next_{user_requests[-1].id}"))
+        if navigation:
+            keyboard.append(navigation)
+        keyboard += MY_REQUESTS_FOOTER
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        view_cache.put(user.id, db_user.id, 'my_requests', (cursor, direction), text, reply_markup)
+        return text, reply_markup
+    
+    async def show_my_requests(self, update, context: ContextTypes.DEFAULT_TYPE, cursor=None, direction='next'):
+        """Показывает заявки пользователя постранично"""
         try:
             logger.info("show_my_requests: Начало функции")
             
@@ -473,63 +947,21 @@ class ConstructionBot:
             
             logger.info(f"show_my_requests: Пользователь: {user.id}, {user.first_name}")
                 
-            db_user = get_or_create_user(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name
-            )
-            logger.info(f"show_my_requests: DB пользователь создан/найден: {db_user.id}")
-            
-            # Получаем заявки пользователя из базы данных
-            from database import SessionLocal, Request
-            logger.info("show_my_requests: Подключаемся к базе данных")
-            db = SessionLocal()
-            try:
-                logger.info(f"show_my_requests: Ищем заявки для пользователя {db_user.id}")
-                user_requests = db.query(Request).filter(Request.user_id == db_user.id).order_by(Request.created_at.desc()).all()
-                logger.info(f"show_my_requests: Найдено заявок: {len(user_requests)}")
-                
-                if not user_requests:
-                    text = """
-📋 Ваши заявки:
-
-У вас пока нет активных заявок.
-
-Создайте первую заявку, чтобы начать поиск партнеров!
-                    """
-                    logger.info("show_my_requests: Нет заявок, показываем заглушку")
-                else:
-                    text = "📋 Ваши заявки:\n\n"
-                    for req in user_requests[:5]:  # Показываем последние 5 заявок
-                        status_emoji = "✅" if req.status == "active" else "⏸️"
-                        type_emoji = "🔍" if req.request_type == "client" else "🚛"
-                        text += f"{status_emoji} {type_emoji} ID: {req.id}\n"
-                        text += f"   📍 {req.location}\n"
-                        text += f"   📅 {req.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-                        text += f"   📊 Статус: {req.status}\n\n"
-                    
-                    if len(user_requests) > 5:
-                        text += f"... и еще {len(user_requests) - 5} заявок"
-                    logger.info(f"show_my_requests: Сформирован текст с {len(user_requests)} заявками")
-                
-            finally:
-                db.close()
-                logger.info("show_my_requests: База данных закрыта")
-            
-            keyboard = [
-                [InlineKeyboardButton("➕ Создать заявку", callback_data="start_menu")],
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            # Готовый экран из кэша - без запросов к БД
+            cached = view_cache.get(user.id, 'my_requests', cursor, direction)
+            if cached:
+                text, reply_markup = cached
+            else:
+                text, reply_markup = self.render_my_requests(user, cursor, direction)
             
             logger.info("show_my_requests: Отправляем сообщение")
-            if hasattr(update, 'message') and update.message:
+            if hasattr(update, 'edit_message_text'):
+                # Нажатие кнопки - листаем в том же сообщении
+                logger.info("show_my_requests: Отправляем через edit_message_text")
+                await update.edit_message_text(text, reply_markup=reply_markup)
+            elif hasattr(update, 'message') and update.message:
                 logger.info("show_my_requests: Отправляем через message")
                 await update.message.reply_text(text, reply_markup=reply_markup)
-            elif hasattr(update, 'callback_query') and update.callback_query:
-                logger.info("show_my_requests: Отправляем через callback_query")
-                await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
             else:
                 logger.error(f"show_my_requests: Неизвестный тип update: {type(update)}")
                 
@@ -537,13 +969,29 @@ class ConstructionBot:
             logger.error(f"show_my_requests: Ошибка: {e}", exc_info=True)
             error_text = "Произошла ошибка при загрузке заявок. Попробуйте еще раз."
             try:
-                if hasattr(update, 'message') and update.message:
+                if hasattr(update, 'edit_message_text'):
+                    await update.edit_message_text(error_text)
+                elif hasattr(update, 'message') and update.message:
                     await update.message.reply_text(error_text)
-                elif hasattr(update, 'callback_query') and update.callback_query:
-                    await update.callback_query.edit_message_text(error_text)
             except Exception as e2:
                 logger.error(f"show_my_requests: Ошибка при отправке сообщения об ошибке: {e2}")
     
+    async def cancel_user_request(self, query, context: ContextTypes.DEFAULT_TYPE, request_id):
+        """Отменяет заявку пользователя и показывает обновленный список"""
+        user = query.from_user
+        db_user = get_or_create_user(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+        
+        if cancel_request(request_id, db_user.id):
+            # gspread блокирует - запрос к таблице уходит в поток, как в очистке просроченных
+            await asyncio.to_thread(sheets_sync.update_request_in_sheets, request_id, 'cancelled')
+        
+        await self.show_my_requests(query, context)
+    
     async def toggle_mode(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Переключает режим пользователя между клиентом и исполнителем"""
         try:
@@ -555,15 +1003,19 @@ class ConstructionBot:
                 last_name=user.last_name
             )
             
-            # Переключаем режим
+            # Переключаем режим; меняем только этот столбец, иначе устаревший объект
+            # перезапишет active_requests_count, который обновляют create_request и cancel_request
             db_user.is_contractor = not db_user.is_contractor
             from database import SessionLocal
             db = SessionLocal()
             try:
-                db.merge(db_user)
+                db.query(User).filter(User.id == db_user.id).update(
+                    {User.is_contractor: db_user.is_contractor}, synchronize_session=False
+                )
                 db.commit()
             finally:
                 db.close()
+            request_events.emit(USER_CHANGED, db_user.id)
             
             # Показываем обновленное меню
             await self.start_command(query, context)
@@ -633,10 +1085,13 @@ class ConstructionBot:
             from database import SessionLocal
             db = SessionLocal()
             try:
-                db.merge(db_user)
+                db.query(User).filter(User.id == db_user.id).update(
+                    {User.phone: clean_phone}, synchronize_session=False
+                )
                 db.commit()
             finally:
                 db.close()
+            request_events.emit(USER_CHANGED, db_user.id)
             
             # Очищаем флаг ожидания
             context.user_data.pop('waiting_for_phone', None)
@@ -709,6 +1164,7 @@ class ConstructionBot:
                 "Используйте команды или кнопки для навигации. /help - для справки."
             )
     
+    @observe_handler('handle_request_step')
     async def handle_request_step(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обрабатывает шаг создания заявки"""
         text = update.message.text
@@ -731,14 +1187,21 @@ class ConstructionBot:
         """Обрабатывает нажатие кнопки выбора связи"""
         result = request_system.process_button_input(button_data, context)
         
+        if 'error' in result and not request_system.is_request_active(context):
+            # Повторное нажатие после того, как черновик уже сохранен
+            existing = get_request_by_key(context.user_data.get('request_key'))
+            if existing:
+                await self.show_already_submitted(query, existing)
+                return
         if 'error' in result:
             await query.edit_message_text(result['error'])
         elif 'completed' in result:
             # Заявка завершена, сохраняем
             await self.save_completed_request(query, context)
     
-    async def save_completed_request(self, update_or_query, context: ContextTypes.DEFAULT_TYPE):
-        """Сохраняет завершенную заявку"""
+    @observe_handler('save_completed_request')
+    async def save_completed_request(self, update_or_query, context: ContextTypes.DEFAULT_TYPE, on_duplicate=None):
+        """Сохраняет завершенную заявку; on_duplicate - выбор пользователя для повторной заявки"""
         try:
             request_data = context.user_data.get('request_data', {})
             request_type = context.user_data.get('request_type')
@@ -769,6 +1232,7 @@ class ConstructionBot:
                     if fresh_user:
                         fresh_user.phone = request_data['phone']
                         db.commit()
+                        request_events.emit(USER_CHANGED, fresh_user.id)
                 except Exception as e:
                     logger.error(f"Ошибка обновления телефона: {e}")
                 finally:
@@ -786,40 +1250,41 @@ class ConstructionBot:
                 del request_data_for_db['phone']
             
             # Создаем заявку
+            duplicate_of = context.user_data.get('duplicate_of')
             request = create_request(
                 user_id=db_user.id,
                 request_type=request_type,
+                on_duplicate=on_duplicate,
+                idempotency_key=context.user_data.get('request_key'),
                 title=title,
                 **request_data_for_db
             )
+            merged = on_duplicate == MERGE and request.id == duplicate_of
             
-            # Добавляем в Google Sheets
-            sheets_sync.add_request_to_sheets(request, db_user)
-            
-            # Уведомляем админа
-            await self.notify_admin_about_new_request(request, db_user)
+            # gspread блокирует - запросы к таблице уходят в поток, как в cancel_user_request
+            if on_duplicate == REPLACE and duplicate_of:
+                await asyncio.to_thread(sheets_sync.update_request_in_sheets, duplicate_of, 'cancelled')
+            if merged:
+                await asyncio.to_thread(sheets_sync.update_request_row_in_sheets, request, db_user)
+            else:
+                # Добавляем в Google Sheets
+                sheets_sync.add_request_to_sheets(request, db_user)
+                
+                # Уведомляем админа
+                await self.notify_admin_about_new_request(request, db_user)
+                self.notify_contractors_about_request(request, db_user)
             
             # Очищаем контекст
             request_system.clear_context(context)
             
-            success_text = f"""
-✅ Заявка успешно создана!
-
-🆔 ID заявки: {request.id}
-📋 Тип: {'Клиент' if request_type == 'client' else 'Исполнитель'}
-📍 Локация: {request_data.get('location', '')}
-📅 Создана: {request.created_at.strftime('%d.%m.%Y %H:%M')}
-
-Ваша заявка добавлена в систему и будет рассмотрена диспетчером. 
-Вы получите уведомления о подходящих совпадениях!
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("📋 Мои заявки", callback_data="my_requests")],
-                [InlineKeyboardButton("➕ Создать еще заявку", callback_data="start_menu")],
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            success_text = REQUEST_CREATED_TEXT.format(
+                action='обновлена' if merged else 'успешно создана',
+                id=request.id,
+                type_name='Клиент' if request_type == 'client' else 'Исполнитель',
+                location=request_data.get('location', ''),
+                created=request.created_at.strftime('%d.%m.%Y %H:%M')
+            )
+            reply_markup = REQUEST_CREATED_KEYBOARD
             
             # Отправляем сообщение в зависимости от типа объекта
             if hasattr(update_or_query, 'message') and update_or_query.message:
@@ -829,6 +1294,25 @@ class ConstructionBot:
             else:
                 logger.error("save_completed_request: Cannot send message")
                 
+        except AlreadySubmittedError as e:
+            # Второй обработчик того же черновика: заявка, Sheets и уведомления уже сделаны первым
+            request_system.clear_context(context)
+            await self.show_already_submitted(update_or_query, e.request)
+        except DuplicateRequestError as e:
+            # Черновик не сбрасываем - он понадобится после выбора пользователя
+            context.user_data['duplicate_of'] = e.request_id
+            duplicate_text = DUPLICATE_TEXT.format(id=e.request_id)
+            if hasattr(update_or_query, 'edit_message_text'):
+                await update_or_query.edit_message_text(duplicate_text, reply_markup=DUPLICATE_KEYBOARD)
+            else:
+                await update_or_query.message.reply_text(duplicate_text, reply_markup=DUPLICATE_KEYBOARD)
+        except RequestLimitError:
+            request_system.clear_context(context)
+            limit_text = REQUEST_LIMIT_TEXT.format(limit=Config.MAX_REQUESTS_PER_USER)
+            if hasattr(update_or_query, 'edit_message_text'):
+                await update_or_query.edit_message_text(limit_text)
+            else:
+                await update_or_query.message.reply_text(limit_text)
         except Exception as e:
             logger.error(f"save_completed_request: Ошибка: {e}", exc_info=True)
             if hasattr(update_or_query, 'edit_message_text'):
@@ -836,6 +1320,14 @@ class ConstructionBot:
             else:
                 await update_or_query.message.reply_text("Произошла ошибка при создании заявки. Попробуйте еще раз.")
     
+    async def show_already_submitted(self, update_or_query, request):
+        """Ответ на повторное сохранение черновика"""
+        text = ALREADY_SUBMITTED_TEXT.format(id=request.id, location=request.location)
+        if hasattr(update_or_query, 'edit_message_text'):
+            await update_or_query.edit_message_text(text, reply_markup=ALREADY_SUBMITTED_KEYBOARD)
+        else:
+            await update_or_query.message.reply_text(text, reply_markup=ALREADY_SUBMITTED_KEYBOARD)
+    
     async def handle_admin_reply(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обрабатывает ответ пользователя админу"""
         try:
@@ -855,9 +1347,7 @@ class ConstructionBot:
                            f"💬 **Сообщение:**\n{message_text}"
             
             # Отправляем ответ админу
-            from telegram import Bot
-            bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
-            await bot.send_message(
+            await self.application.bot.send_message(
                 chat_id=admin_id,
                 text=reply_message,
                 parse_mode='Markdown'
@@ -939,9 +1429,11 @@ class ConstructionBot:
                 title = f"Предлагаю {request_data.get('available_equipment', 'технику')} в {request_data.get('location', '')}"
             
             # Создаем заявку
+            # Старый сценарий без выбора, что делать с повтором
             request = create_request(
                 user_id=db_user.id,
                 request_type=request_type,
+                on_duplicate=KEEP,
                 title=title,
                 **request_data
             )
@@ -952,6 +1444,7 @@ class ConstructionBot:
             
             # Уведомляем админа
             await self.notify_admin_about_new_request(request, db_user)
+            self.notify_contractors_about_request(request, db_user)
             
             # Очищаем данные пользователя
             context.user_data.pop('creating_request', None)
@@ -1015,9 +1508,7 @@ class ConstructionBot:
             """
             
             # Отправляем уведомление админу
-            from telegram import Bot
-            bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
-            await bot.send_message(
+            await self.application.bot.send_message(
                 chat_id=admin_id,
                 text=admin_message,
                 parse_mode='Markdown'
@@ -1026,6 +1517,52 @@ class ConstructionBot:
         except Exception as e:
             logger.error(f"notify_admin_about_new_request: Ошибка: {e}")
     
+    def notify_contractors_about_request(self, request, user):
+        """Ставит в очередь уведомления исполнителям, подписанным на регион и технику заявки"""
+        if request.request_type != 'client':
+            return
+        try:
+            subscribers = subscription_index.subscribers(request.region_id, request_categories(request))
+            subscribers.discard(user.id)
+            if not subscribers:
+                return
+            
+            text = (
+                f"🔔 Новая заявка #{request.id} по вашей технике\n\n"
+                f"🚜 Техника: {request.equipment_type or 'не указана'}\n"
+                f"📍 Локация: {request.location}\n"
+                f"💰 Бюджет: {f'{request.budget:.0f} грн' if request.budget else 'не указан'}\n"
+                f"⏱ Сроки: {request.work_duration or 'не указаны'}"
+            )
+            keyboard = InlineKeyboardMarkup([
+                [InlineKeyboardButton("✋ Откликнуться", callback_data=f"respond_request_{request.id}")]
+            ])
+            queued = 0
+            for telegram_id in get_telegram_ids(subscribers).values():
+                queued += notification_sender.enqueue(
+                    self.application.bot, telegram_id, text, dedup_key=request.id, reply_markup=keyboard
+                )
+            logger.info(f"🔔 Заявка #{request.id}: уведомлений в очереди {queued} из {len(subscribers)}")
+        except Exception as e:
+            logger.error(f"notify_contractors_about_request: Ошибка: {e}", exc_info=True)
+    
+    async def respond_to_request(self, query, request_id):
+        """Передает диспетчеру отклик исполнителя на заявку из уведомления или ленты"""
+        user = query.from_user
+        admin_id = Config.ADMIN_USER_ID
+        if admin_id:
+            await self.application.bot.send_message(
+                chat_id=admin_id,
+                text=(
+                    f"✋ Отклик на заявку #{request_id}\n\n"
+                    f"👤 {user.first_name} {user.last_name or ''} (@{user.username or 'нет'})\n"
+                    f"🆔 ID: {user.id}"
+                )
+            )
+        await query.edit_message_text(
+            f"{query.message.text}\n\n✅ Отклик отправлен диспетчеру, с вами свяжутся."
+        )
+    
     async def forward_to_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Пересылает сообщения админу"""
         try:
@@ -1222,9 +1759,11 @@ class ConstructionBot:
                     title = f"Предлагаю {request_data.get('available_equipment', 'технику')} в {request_data.get('location', '')}"
                 
                 # Создаем заявку в базе данных
+                # Старый сценарий без выбора, что делать с повтором
                 request = create_request(
                     user_id=db_user.id,
                     request_type=request_type,
+                    on_duplicate=KEEP,
                     title=title,
                     contact_preference=request_data.get('contact_preference', 'message'),
                     **request_data
@@ -1235,6 +1774,7 @@ class ConstructionBot:
                 
                 # Уведомляем админа о новой заявке
                 await self.notify_admin_about_new_request(request, db_user)
+                self.notify_contractors_about_request(request, db_user)
                 
                 # Очищаем данные пользователя
                 context.user_data.pop('creating_request', None)
@@ -1304,9 +1844,7 @@ class ConstructionBot:
             """
             
             # Отправляем уведомление админу
-            from telegram import Bot
-            bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
-            await bot.send_message(
+            await self.application.bot.send_message(
                 chat_id=admin_id,
                 text=admin_message,
                 parse_mode='Markdown'
@@ -21,5 +21,42 @@ class Config:
         ADMIN_USER_ID = 0
     
     # Bot settings
-    MAX_REQUESTS_PER_USER = 10
+    MAX_REQUESTS_PER_USER = int(os.getenv('MAX_REQUESTS_PER_USER', '10'))  # активных заявок одновременно
     REQUEST_EXPIRY_HOURS = 24
+    MY_REQUESTS_PAGE_SIZE = 5
+    JOB_FEED_PAGE_SIZE = 5
+    FIND_PAGE_SIZE = 10
+    JOB_FEED_TTL = int(os.getenv('JOB_FEED_TTL', '600'))  # секунд, ранжированная лента исполнителя
+    MATCH_RADIUS_KM = int(os.getenv('MATCH_RADIUS_KM', '100'))  # 0 - подбор только по региону
+    FUZZY_THRESHOLD = float(os.getenv('FUZZY_THRESHOLD', '0.45'))  # сходство по триграммам для опечаток
+    VIEW_CACHE_MAX_BYTES = int(os.getenv('VIEW_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))  # экраны профиля и заявок
+    VIEW_CACHE_TTL = int(os.getenv('VIEW_CACHE_TTL', '3600'))  # секунд, страховка от изменений без событий
+    MATCH_WEIGHTS_FILE = os.getenv('MATCH_WEIGHTS_FILE', 'match_weights.json')  # веса train_match_weights.py
+    
+    # Уведомления исполнителям
+    NOTIFY_RATE_PER_SECOND = 20  # ниже лимита Telegram в 30 сообщений в секунду
+    NOTIFY_MAX_PER_USER_PER_HOUR = int(os.getenv('NOTIFY_MAX_PER_USER_PER_HOUR', '5'))
+    
+    # Защита от флуда: пользователь может отправить FLOOD_BURST апдейтов подряд,
+    # дальше - не больше FLOOD_RATE в секунду; лишние апдейты отбрасываются
+    FLOOD_RATE = float(os.getenv('FLOOD_RATE', '1'))
+    FLOOD_BURST = int(os.getenv('FLOOD_BURST', '10'))
+    
+    # Истечение заявок
+    EXPIRY_SWEEP_INTERVAL = int(os.getenv('EXPIRY_SWEEP_INTERVAL', '300'))  # секунд
+    EXPIRY_BATCH_SIZE = 500
+    EXPIRY_MAX_BATCHES = 20  # не больше стольких порций за один проход
+    
+    # Архив заявок
+    ARCHIVE_RETENTION_DAYS = int(os.getenv('ARCHIVE_RETENTION_DAYS', '30'))
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', '3600'))  # секунд
+    ARCHIVE_BATCH_SIZE = 500
+    ARCHIVE_MAX_BATCHES = 20
+    
+    # Мониторинг
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '30'))  # секунд
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '200'))
+    # Запись входящих апдейтов для replay_updates.py; пусто - не записывать
+    RECORD_UPDATES_FILE = os.getenv('RECORD_UPDATES_FILE', '')
+    # Токен для админских эндпоинтов веб-сервера (/search, /flood); пустой - эндпоинты закрыты
+    ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
@@ -0,0 +1,98 @@
+"""
+Базовый класс индексов активных заявок в памяти (по умолчанию - заявок исполнителей)
+Загружается из БД при первом запросе и дальше обновляется по событиям request_events
+"""
+import logging
+import threading
+from models import Request
+from request_events import request_events, REQUEST_CREATED, REQUEST_UPDATED, REQUESTS_STATUS_CHANGED, REQUESTS_BACKFILLED
+
+logger = logging.getLogger(__name__)
+
+class ContractorIndex:
+    """Наследники задают columns (или _load_rows), _clear, _add(row) и _discard(request_id)
+    Изменения - под self.lock"""
+    name = 'индекс'
+    columns = ()
+    request_type = 'contractor'  # None - заявки всех типов
+
+    def __init__(self):
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            # database импортирует индексы, поэтому импорт здесь
+            from database import SessionLocal
+
+            db = SessionLocal()
+            try:
+                rows = self._load_rows(db)
+            finally:
+                db.close()
+
+            self._clear()
+            for row in rows:
+                self._add(row)
+            self.loaded = True
+            logger.info(f"{self.name} загружен: {len(rows)} заявок")
+
+    def _load_rows(self, db):
+        """Строки активных заявок типа request_type: id и колонки из columns"""
+        query = db.query(Request.id, *[getattr(Request, column) for column in self.columns]).filter(
+            Request.status == 'active'
+        )
+        if self.request_type:
+            query = query.filter(Request.request_type == self.request_type)
+        return query.all()
+
+    def subscribe(self):
+        """Подписывает индекс на события заявок"""
+        request_events.subscribe(REQUEST_CREATED, self.on_request_created)
+        request_events.subscribe(REQUEST_UPDATED, self.on_request_updated)
+        request_events.subscribe(REQUESTS_STATUS_CHANGED, self.on_status_changed)
+        request_events.subscribe(REQUESTS_BACKFILLED, self.reset)
+
+    def on_request_created(self, request):
+        # До первой загрузки индекс пуст - новая заявка попадет в него при загрузке
+        if not self.loaded or request.status != 'active':
+            return
+        if self.request_type and request.request_type != self.request_type:
+            return
+        with self.lock:
+            self._add(request)
+
+    def on_request_updated(self, request):
+        """Заменяет запись заявки, у которой изменились поля"""
+        if not self.loaded:
+            return
+        if self.request_type and request.request_type != self.request_type:
+            return
+        with self.lock:
+            self._discard(request.id)
+            if request.status == 'active':
+                self._add(request)
+
+    def on_status_changed(self, changes, new_status):
+        if new_status == 'active' or not self.loaded:
+            return
+        with self.lock:
+            for request_id, _ in changes:
+                self._discard(request_id)
+
+    def reset(self, *args):
+        """Перечитать индекс из БД при следующем запросе"""
+        self.loaded = False
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, row):
+        raise NotImplementedError
+
+    def _discard(self, request_id):
+        raise NotImplementedError
@@ -1,15 +1,104 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import Base, User, Request, Match
+from datetime import datetime, timedelta
+from collections import Counter
+from sqlalchemy import create_engine, select, tuple_, or_, case, func, inspect, text, insert, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, joinedload
+from models import Base, User, Request, RequestArchive, Match, ContractorAvailability
 from config import Config
+from request_events import (
+    request_events, REQUEST_CREATED, REQUEST_UPDATED, REQUESTS_STATUS_CHANGED, REQUESTS_BACKFILLED, AVAILABILITY_CHANGED, USER_CHANGED
+)
+from query_stats import query_stats
+from gazetteer import gazetteer
+from geo_index import contractor_geo_index
+from equipment import equipment_taxonomy, contractor_equipment_index, request_categories, capacity_fits
+from pricing import contractor_price_index, max_price_per_hour
+from availability import contractor_calendar_index, parse_work_period, parse_period_days
+from match_scoring import match_scorer, build_features, accept_rate
+from fulltext import setup_fulltext, search_request_ids
+from trigram import setup_trigram, set_similarity_threshold
+from search_index import request_search_index
+from duplicates import (
+    duplicate_index, request_fingerprint, DuplicateRequestError, MERGE, REPLACE, KEEP, MERGE_FIELDS
+)
 
 # Создаем движок базы данных
 engine = create_engine(Config.DATABASE_URL, echo=False)
+query_stats.instrument(engine)
+set_similarity_threshold(engine, Config.FUZZY_THRESHOLD)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Статусы, с которыми заявки уходят в архив после срока хранения
+ARCHIVED_STATUSES = ('completed', 'cancelled', 'expired')
+
+class RequestLimitError(Exception):
+    """У пользователя уже максимум активных заявок"""
+
+class AlreadySubmittedError(Exception):
+    """Заявка по этому черновику уже создана; request - созданная заявка"""
+    def __init__(self, request):
+        super().__init__(f"Черновик уже сохранен как заявка {request.id}")
+        self.request = request
+
 def create_tables():
     """Создает все таблицы в базе данных"""
     Base.metadata.create_all(bind=engine)
+    added_columns = _add_missing_columns()
+    # create_all не добавляет новые индексы в уже существующие таблицы
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    if 'users.active_requests_count' in added_columns:
+        rebuild_active_counters()
+    
+    setup_fulltext(engine)
+    setup_trigram(engine)
+
+def _add_missing_columns():
+    """Добавляет в существующие таблицы новые столбцы моделей"""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def rebuild_active_counters():
+    """Пересчитывает счетчики активных заявок всех пользователей"""
+    db = SessionLocal()
+    try:
+        db.query(User).update({User.active_requests_count: 0}, synchronize_session=False)
+        counts = db.query(Request.user_id, func.count()).filter(
+            Request.status == 'active'
+        ).group_by(Request.user_id).all()
+        if counts:
+            db.bulk_update_mappings(User, [
+                {'id': user_id, 'active_requests_count': total} for user_id, total in counts
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+def _release_active_slots(db, user_ids):
+    """Уменьшает счетчики активных заявок (в текущей транзакции)"""
+    released = Counter(user_ids)
+    if released:
+        db.query(User).filter(User.id.in_(released)).update({
+            User.active_requests_count: User.active_requests_count - case(released, value=User.id, else_=0)
+        }, synchronize_session=False)
 
 def get_db():
     """Получает сессию базы данных"""
@@ -34,26 +123,539 @@ def get_or_create_user(telegram_id, username=None, first_name=None, last_name=No
             db.add(user)
             db.commit()
             db.refresh(user)
+            request_events.emit(USER_CHANGED, user.id)
         return user
     finally:
         db.close()
 
-def create_request(user_id, request_type, **kwargs):
-    """Создает новую заявку"""
+def create_request(user_id, request_type, on_duplicate=None, **kwargs):
+    """Создает новую заявку
+    
+    Если у пользователя уже есть такая же активная заявка, без on_duplicate выбрасывает DuplicateRequestError;
+    MERGE - обновляет старую заявку и возвращает ее, REPLACE - отменяет старую, KEEP - создает еще одну.
+    Если заявка с таким idempotency_key уже есть, выбрасывает AlreadySubmittedError с ней.
+    """
+    idempotency_key = kwargs.get('idempotency_key')
+    if idempotency_key:
+        existing = get_request_by_key(idempotency_key)
+        if existing:
+            raise AlreadySubmittedError(existing)
+    
+    # created_at ставит БД в UTC, поэтому и срок считаем в UTC
+    kwargs.setdefault('expires_at', datetime.utcnow() + timedelta(hours=Config.REQUEST_EXPIRY_HOURS))
+    # Старые сценарии создания заявок не проходят шаг локации RequestSystem
+    if 'region_id' not in kwargs and kwargs.get('location'):
+        kwargs.update(gazetteer.location_fields(kwargs['location']) or {'region_id': ''})
+    if request_type == 'client' and 'work_start' not in kwargs:
+        kwargs['work_start'], kwargs['work_end'] = parse_work_period(kwargs.get('work_duration'))
+    if request_type == 'client' and 'work_days' not in kwargs:
+        # Если указаны даты, срок - длина периода, а не первое число в тексте
+        kwargs['work_days'] = parse_period_days(kwargs.get('work_duration'))
+    if 'equipment_categories' not in kwargs:
+        kwargs.update(equipment_taxonomy.request_fields(
+            kwargs.get('equipment_type') if request_type == 'client' else kwargs.get('available_equipment')
+        ))
+    kwargs.update(request_fingerprint(user_id, request_type, kwargs))
+    
+    duplicate_id = duplicate_index.find(kwargs['fingerprint'], kwargs['description_simhash'])
+    if duplicate_id and on_duplicate != KEEP:
+        if on_duplicate == MERGE:
+            merged = _merge_request(duplicate_id, user_id, kwargs)
+            if merged:
+                return merged
+        elif on_duplicate == REPLACE:
+            cancel_request(duplicate_id, user_id)
+        else:
+            raise DuplicateRequestError(duplicate_id)
+    
     db = SessionLocal()
     try:
+        # Проверка лимита и резерв места одним UPDATE, без COUNT(*) по заявкам
+        reserved = db.query(User).filter(
+            User.id == user_id,
+            User.active_requests_count < Config.MAX_REQUESTS_PER_USER
+        ).update({User.active_requests_count: User.active_requests_count + 1}, synchronize_session=False)
+        if not reserved:
+            db.rollback()
+            raise RequestLimitError(f"Пользователь {user_id} достиг лимита активных заявок")
+        
         request = Request(
             user_id=user_id,
             request_type=request_type,
             **kwargs
         )
         db.add(request)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Параллельное сохранение того же черновика успело раньше; резерв места откатился вместе с ним
+            db.rollback()
+            existing = get_request_by_key(idempotency_key) if idempotency_key else None
+            if existing:
+                raise AlreadySubmittedError(existing)
+            raise
+        db.refresh(request)
+        request_events.emit(REQUEST_CREATED, request)
+        return request
+    finally:
+        db.close()
+
+def get_request_by_key(idempotency_key):
+    """Заявка, созданная по черновику с этим ключом, или None"""
+    if not idempotency_key:
+        return None
+    db = SessionLocal()
+    try:
+        return db.query(Request).filter(Request.idempotency_key == idempotency_key).first()
+    finally:
+        db.close()
+
+def _merge_request(request_id, user_id, fields):
+    """Переносит в активную заявку пользователя новые описание, сроки и контакты; None - заявка уже не активна"""
+    db = SessionLocal()
+    try:
+        request = db.query(Request).filter(
+            Request.id == request_id,
+            Request.user_id == user_id,
+            Request.status == 'active'
+        ).first()
+        if not request:
+            return None
+        for field in MERGE_FIELDS:
+            if fields.get(field) is not None:
+                setattr(request, field, fields[field])
+        request.description_simhash = fields['description_simhash']
         db.commit()
         db.refresh(request)
+        # Индексы, кэши экранов и ленты держат старые описание и сроки
+        request_events.emit(REQUEST_UPDATED, request)
         return request
     finally:
         db.close()
 
+def _keyset_rows(query, model, cursor, direction, count, anchor=None):
+    """Выбирает count записей по ключу (created_at, id) от заявки cursor
+    
+    'next' - более старые (по убыванию), 'prev' - более новые (по возрастанию).
+    """
+    if cursor:
+        # created_at берем из самой БД, чтобы сравнение шло в ее формате
+        if anchor is None:
+            anchor = select(model.created_at).where(model.id == cursor).scalar_subquery()
+        position = tuple_(model.created_at, model.id)
+        if direction == 'prev':
+            query = query.filter(position > tuple_(anchor, cursor))
+        else:
+            query = query.filter(position < tuple_(anchor, cursor))
+    
+    if direction == 'prev':
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    else:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    
+    return query.limit(count).all()
+
+def _keyset_result(requests, cursor, direction, limit):
+    """Превращает limit+1 записей в (заявки, есть_более_новые, есть_более_старые)"""
+    has_more = len(requests) > limit
+    requests = requests[:limit]
+    
+    if direction == 'prev':
+        requests.reverse()
+        return requests, has_more, bool(cursor)
+    return requests, bool(cursor), has_more
+
+def _keyset_page(db, query, cursor, direction, limit):
+    """Выбирает страницу заявок по ключу (created_at, id)"""
+    # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+    requests = _keyset_rows(query, Request, cursor, direction, limit + 1)
+    return _keyset_result(requests, cursor, direction, limit)
+
+def get_user_requests_page(user_id, cursor=None, direction='next', limit=5):
+    """Получает страницу заявок пользователя (keyset-пагинация по created_at, id)
+    
+    Архив подключается, только когда страница доходит до заявок старше срока хранения.
+    """
+    db = SessionLocal()
+    try:
+        anchor = None
+        if cursor:
+            # Заявка-курсор может быть уже в архиве
+            anchor = func.coalesce(
+                select(Request.created_at).where(Request.id == cursor).scalar_subquery(),
+                select(RequestArchive.created_at).where(RequestArchive.id == cursor).scalar_subquery()
+            )
+        
+        query = db.query(Request).filter(Request.user_id == user_id)
+        requests = _keyset_rows(query, Request, cursor, direction, limit + 1, anchor)
+        
+        # В архиве только заявки, созданные раньше границы хранения
+        cutoff = datetime.utcnow() - timedelta(days=Config.ARCHIVE_RETENTION_DAYS)
+        if direction == 'prev':
+            cursor_created_at = db.query(anchor).scalar() if cursor else None
+            needs_archive = cursor_created_at is not None and cursor_created_at < cutoff
+        else:
+            needs_archive = len(requests) <= limit or requests[-1].created_at < cutoff
+        
+        if needs_archive:
+            archive_query = db.query(RequestArchive).filter(RequestArchive.user_id == user_id)
+            requests += _keyset_rows(archive_query, RequestArchive, cursor, direction, limit + 1, anchor)
+            requests.sort(key=lambda req: (req.created_at, req.id), reverse=(direction != 'prev'))
+            requests = requests[:limit + 1]
+        
+        return _keyset_result(requests, cursor, direction, limit)
+    finally:
+        db.close()
+
+def get_requests_page(request_type=None, status=None, cursor=None, direction='next', limit=10):
+    """Получает страницу всех заявок с авторами одним запросом (для админа)"""
+    db = SessionLocal()
+    try:
+        query = db.query(Request).options(joinedload(Request.user))
+        
+        if status:
+            query = query.filter(Request.status == status)
+        
+        if request_type:
+            query = query.filter(Request.request_type == request_type)
+        
+        return _keyset_page(db, query, cursor, direction, limit)
+    finally:
+        db.close()
+
+def expire_requests(batch_size=500, now=None):
+    """Переводит одну порцию просроченных активных заявок в статус expired
+    
+    Возвращает список (request_id, user_id) истекших заявок.
+    """
+    now = now or datetime.utcnow()
+    db = SessionLocal()
+    try:
+        # Индекс (status, expires_at) отдает самые старые сроки первыми
+        rows = db.query(Request.id, Request.user_id).filter(
+            Request.status == 'active',
+            Request.expires_at <= now
+        ).order_by(Request.expires_at).limit(batch_size).all()
+        
+        if not rows:
+            return []
+        
+        request_ids = [row.id for row in rows]
+        db.query(Request).filter(
+            Request.id.in_(request_ids),
+            Request.status == 'active'
+        ).update({Request.status: 'expired'}, synchronize_session=False)
+        
+        _release_active_slots(db, [row.user_id for row in rows])
+        
+        # Несостоявшиеся сопоставления с истекшими заявками тоже закрываем
+        db.query(Match).filter(
+            Match.status == 'pending',
+            or_(Match.client_request_id.in_(request_ids), Match.contractor_request_id.in_(request_ids))
+        ).update({Match.status: 'expired'}, synchronize_session=False)
+        
+        db.commit()
+    finally:
+        db.close()
+    
+    changes = [(row.id, row.user_id) for row in rows]
+    request_events.emit(REQUESTS_STATUS_CHANGED, changes, 'expired')
+    return changes
+
+def cancel_request(request_id, user_id):
+    """Отменяет активную заявку пользователя, возвращает True при успехе"""
+    db = SessionLocal()
+    try:
+        cancelled = db.query(Request).filter(
+            Request.id == request_id,
+            Request.user_id == user_id,
+            Request.status == 'active'
+        ).update({Request.status: 'cancelled'}, synchronize_session=False)
+        if not cancelled:
+            return False
+        
+        _release_active_slots(db, [user_id])
+        db.query(Match).filter(
+            Match.status == 'pending',
+            or_(Match.client_request_id == request_id, Match.contractor_request_id == request_id)
+        ).update({Match.status: 'cancelled'}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    
+    request_events.emit(REQUESTS_STATUS_CHANGED, [(request_id, user_id)], 'cancelled')
+    return True
+
+def _own_contractor_request(db, request_id, user_id):
+    """Активная заявка исполнителя, принадлежащая пользователю, или None"""
+    return db.query(Request).filter(
+        Request.id == request_id,
+        Request.user_id == user_id,
+        Request.request_type == 'contractor',
+        Request.status == 'active'
+    ).first()
+
+def add_availability(request_id, user_id, kind, start_date, end_date):
+    """Добавляет период в календарь заявки исполнителя; False - заявка не найдена"""
+    db = SessionLocal()
+    try:
+        if not _own_contractor_request(db, request_id, user_id):
+            return False
+        db.add(ContractorAvailability(request_id=request_id, kind=kind, start_date=start_date, end_date=end_date))
+        db.commit()
+    finally:
+        db.close()
+    
+    request_events.emit(AVAILABILITY_CHANGED, request_id)
+    return True
+
+def get_availability(request_id, user_id):
+    """Календарь заявки исполнителя по датам; None - заявка не найдена"""
+    db = SessionLocal()
+    try:
+        if not _own_contractor_request(db, request_id, user_id):
+            return None
+        return db.query(ContractorAvailability).filter(
+            ContractorAvailability.request_id == request_id
+        ).order_by(ContractorAvailability.start_date).all()
+    finally:
+        db.close()
+
+def clear_availability(request_id, user_id):
+    """Очищает календарь заявки исполнителя; None - заявка не найдена"""
+    db = SessionLocal()
+    try:
+        if not _own_contractor_request(db, request_id, user_id):
+            return None
+        deleted = db.query(ContractorAvailability).filter(
+            ContractorAvailability.request_id == request_id
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    
+    request_events.emit(AVAILABILITY_CHANGED, request_id)
+    return deleted
+
+def archive_requests(batch_size=500, retention_days=None):
+    """Переносит одну порцию старых неактивных заявок в requests_archive
+    
+    Копирование и удаление идут в одной транзакции. Возвращает число перенесенных заявок.
+    """
+    retention_days = Config.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    
+    db = SessionLocal()
+    try:
+        request_ids = [row.id for row in db.query(Request.id).filter(
+            Request.status.in_(ARCHIVED_STATUSES),
+            Request.created_at < cutoff
+        ).order_by(Request.created_at).limit(batch_size).all()]
+        
+        if not request_ids:
+            return 0
+        
+        columns = [column.name for column in RequestArchive.__table__.columns if column.name != 'archived_at']
+        db.execute(
+            insert(RequestArchive).from_select(
+                columns,
+                select(*[Request.__table__.c[name] for name in columns]).where(Request.id.in_(request_ids))
+            )
+        )
+        db.execute(delete(Request).where(Request.id.in_(request_ids)))
+        db.execute(delete(ContractorAvailability).where(ContractorAvailability.request_id.in_(request_ids)))
+        db.commit()
+        return len(request_ids)
+    finally:
+        db.close()
+
+def backfill_expires_at(batch_size=500):
+    """Проставляет срок действия старым активным заявкам, созданным без него"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Request.id, Request.created_at).filter(
+            Request.status == 'active',
+            Request.expires_at.is_(None)
+        ).limit(batch_size).all()
+        
+        if rows:
+            lifetime = timedelta(hours=Config.REQUEST_EXPIRY_HOURS)
+            db.bulk_update_mappings(Request, [
+                {'id': row.id, 'expires_at': (row.created_at or datetime.utcnow()) + lifetime}
+                for row in rows
+            ])
+            db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+def backfill_regions(batch_size=500):
+    """Нормализует локацию заявок, созданных до появления region_id"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Request.id, Request.location).filter(
+            Request.region_id.is_(None)
+        ).limit(batch_size).all()
+        
+        if rows:
+            # Нераспознанным ставим '', чтобы не разбирать их повторно
+            db.bulk_update_mappings(Request, [
+                {'id': row.id, **(gazetteer.location_fields(row.location or '') or {'region_id': ''})}
+                for row in rows
+            ])
+            db.commit()
+            request_events.emit(REQUESTS_BACKFILLED, [row.id for row in rows])
+        return len(rows)
+    finally:
+        db.close()
+
+def backfill_equipment(batch_size=500):
+    """Разбирает технику заявок, созданных до появления категорий"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Request.id, Request.request_type, Request.equipment_type, Request.available_equipment).filter(
+            Request.equipment_categories.is_(None)
+        ).limit(batch_size).all()
+        
+        if rows:
+            db.bulk_update_mappings(Request, [
+                {'id': row.id, **equipment_taxonomy.request_fields(
+                    row.equipment_type if row.request_type == 'client' else row.available_equipment
+                )}
+                for row in rows
+            ])
+            db.commit()
+            request_events.emit(REQUESTS_BACKFILLED, [row.id for row in rows])
+        return len(rows)
+    finally:
+        db.close()
+
+def backfill_fingerprints(batch_size=500):
+    """Считает отпечатки активных заявок, созданных до поиска повторов"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Request).filter(
+            Request.status == 'active',
+            Request.fingerprint.is_(None),
+            # Отпечаток зависит от региона и техники - ждем, пока их заполнят backfill_regions/backfill_equipment
+            Request.region_id.isnot(None),
+            Request.equipment_categories.isnot(None)
+        ).limit(batch_size).all()
+        
+        if rows:
+            db.bulk_update_mappings(Request, [
+                {'id': row.id, **request_fingerprint(row.user_id, row.request_type, {
+                    'region_id': row.region_id,
+                    'equipment_categories': row.equipment_categories,
+                    'budget': row.budget,
+                    'price_per_hour': row.price_per_hour,
+                    'description': row.description,
+                })}
+                for row in rows
+            ])
+            db.commit()
+            request_events.emit(REQUESTS_BACKFILLED, [row.id for row in rows])
+        return len(rows)
+    finally:
+        db.close()
+
+def _location_filter(location, region_id=None):
+    """Условие по локации: равенство по региону, если он известен, иначе ILIKE
+
+    На PostgreSQL к ILIKE добавляется оператор % из pg_trgm (порог - FUZZY_THRESHOLD), чтобы находить
+    написания с опечатками; оба условия обслуживает GIN-индекс ix_requests_location_trgm.
+    """
+    if region_id is None:
+        place = gazetteer.resolve(location)
+        region_id = place.region_id if place else None
+    if region_id:
+        return Request.region_id == region_id
+    condition = Request.location.ilike(f'%{location}%')
+    if engine.dialect.name == 'postgresql':
+        condition = or_(condition, Request.location.op('%')(location))
+    return condition
+
+def get_feed_candidates(user_id, limit=500):
+    """Активные предложения исполнителя и свежие заявки клиентов в их регионах"""
+    db = SessionLocal()
+    try:
+        offers = db.query(Request).filter(
+            Request.user_id == user_id,
+            Request.request_type == 'contractor',
+            Request.status == 'active'
+        ).all()
+        regions = {offer.region_id for offer in offers if offer.region_id}
+        if not regions:
+            return offers, []
+        
+        clients = db.query(Request).filter(
+            Request.request_type == 'client',
+            Request.status == 'active',
+            Request.region_id.in_(regions),
+            Request.user_id != user_id
+        ).order_by(Request.created_at.desc(), Request.id.desc()).limit(limit).all()
+        return offers, clients
+    finally:
+        db.close()
+
+def get_requests_by_ids(request_ids):
+    """Заявки по списку ID в том же порядке; отсутствующие пропускаются"""
+    if not request_ids:
+        return []
+    db = SessionLocal()
+    try:
+        by_id = {request.id: request for request in db.query(Request).filter(Request.id.in_(request_ids)).all()}
+        return [by_id[request_id] for request_id in request_ids if request_id in by_id]
+    finally:
+        db.close()
+
+def search_requests(query, offset=0, limit=10):
+    """Полнотекстовый поиск заявок с авторами
+
+    Если по запросу ничего нет, повторяет поиск с исправленными опечатками.
+    Возвращает (заявки, есть ли следующая страница, запрос, по которому искали).
+    """
+    db = SessionLocal()
+    try:
+        request_ids, has_more = search_request_ids(db, query, offset, limit)
+        if not request_ids and offset == 0:
+            corrected = request_search_index.correct(query)
+            if corrected:
+                request_ids, has_more = search_request_ids(db, corrected, offset, limit)
+                if request_ids:
+                    query = corrected
+        if not request_ids:
+            return [], False, query
+        by_id = {
+            request.id: request
+            for request in db.query(Request).options(joinedload(Request.user)).filter(Request.id.in_(request_ids))
+        }
+        archived_ids = [request_id for request_id in request_ids if request_id not in by_id]
+        if archived_ids:
+            by_id.update(
+                (request.id, request)
+                for request in db.query(RequestArchive).options(joinedload(RequestArchive.user)).filter(
+                    RequestArchive.id.in_(archived_ids)
+                )
+            )
+        return [by_id[request_id] for request_id in request_ids if request_id in by_id], has_more, query
+    finally:
+        db.close()
+
+def get_telegram_ids(user_ids):
+    """telegram_id активных пользователей по их ID"""
+    if not user_ids:
+        return {}
+    db = SessionLocal()
+    try:
+        rows = db.query(User.id, User.telegram_id).filter(
+            User.id.in_(user_ids),
+            User.is_active == True
+        ).all()
+        return {row.id: row.telegram_id for row in rows}
+    finally:
+        db.close()
+
 def get_active_requests(request_type=None, location=None):
     """Получает активные заявки с фильтрами"""
     db = SessionLocal()
@@ -64,41 +666,104 @@ def get_active_requests(request_type=None, location=None):
             query = query.filter(Request.request_type == request_type)
         
         if location:
-            query = query.filter(Request.location.ilike(f'%{location}%'))
+            query = query.filter(_location_filter(location))
         
         return query.all()
     finally:
         db.close()
 
-def find_matches(client_request):
+def _contractor_accept_rates(db, user_ids):
+    """Доля принятых совпадений по исполнителям (user_id -> 0-1), включая архивные заявки"""
+    if not user_ids:
+        return {}
+    
+    totals = Counter()
+    accepted = Counter()
+    for model in (Request, RequestArchive):
+        rows = db.query(
+            model.user_id,
+            func.count(),
+            func.sum(case((Match.status == 'accepted', 1), else_=0))
+        ).join(Match, Match.contractor_request_id == model.id).filter(
+            model.user_id.in_(user_ids),
+            Match.status.in_(('accepted', 'rejected'))
+        ).group_by(model.user_id).all()
+        for user_id, total, accepted_count in rows:
+            totals[user_id] += total
+            accepted[user_id] += accepted_count or 0
+    return {user_id: accept_rate(accepted[user_id], totals[user_id]) for user_id in totals}
+
+def find_matches(client_request, radius_km=None):
     """Находит подходящие заявки исполнителей для клиентской заявки"""
+    if radius_km is None:
+        radius_km = Config.MATCH_RADIUS_KM
+    
     db = SessionLocal()
     try:
-        # Ищем исполнителей в том же регионе
-        contractor_requests = db.query(Request).filter(
+        query = db.query(Request).filter(
             Request.request_type == 'contractor',
-            Request.status == 'active',
-            Request.location.ilike(f'%{client_request.location}%')
-        ).all()
+            Request.status == 'active'
+        )
+        candidate_ids = None
+        price_region = None
+        distances = None
+        if radius_km and client_request.latitude is not None:
+            # Исполнители в радиусе radius_km по гео-индексу
+            distances = dict(contractor_geo_index.within(client_request.latitude, client_request.longitude, radius_km))
+            candidate_ids = set(distances)
+        else:
+            # Ищем исполнителей в том же регионе
+            query = query.filter(_location_filter(client_request.location, client_request.region_id))
+            price_region = client_request.region_id or None
         
-        matches = []
-        for contractor_req in contractor_requests:
-            # Простая логика сопоставления
-            score = 0.5  # базовая оценка
-            
-            # Проверяем тип техники
-            if client_request.equipment_type and contractor_req.available_equipment:
-                if client_request.equipment_type.lower() in contractor_req.available_equipment.lower():
-                    score += 0.3
-            
-            # Проверяем бюджет
-            if client_request.budget and contractor_req.price_per_hour:
-                estimated_cost = contractor_req.price_per_hour * 8  # 8 часов в день
-                if client_request.budget >= estimated_cost:
-                    score += 0.2
-            
-            if score > 0.6:  # минимальный порог совпадения
-                matches.append((contractor_req, score))
+        client_categories = request_categories(client_request)
+        if client_categories:
+            # Только исполнители с нужной категорией техники
+            with_equipment = contractor_equipment_index.lookup(client_categories)
+            candidate_ids = with_equipment if candidate_ids is None else candidate_ids & with_equipment
+        
+        if candidate_ids is not None:
+            if not candidate_ids:
+                return []
+            query = query.filter(Request.id.in_(candidate_ids))
+        contractor_requests = query.all()
+        
+        if client_request.work_start and contractor_requests:
+            # Отсекаем исполнителей, занятых в период работ
+            available_ids = contractor_calendar_index.available_among(
+                {contractor_req.id for contractor_req in contractor_requests},
+                client_request.work_start, client_request.work_end or client_request.work_start
+            )
+            contractor_requests = [r for r in contractor_requests if r.id in available_ids]
+        
+        # Срок работ в днях; старые заявки без work_days разбираем на лету
+        work_days = client_request.work_days or parse_period_days(client_request.work_duration)
+        affordable_ids = None
+        if client_request.budget and client_categories:
+            # Укладывающиеся в бюджет - префикс отсортированного по цене списка
+            affordable_ids = contractor_price_index.affordable(
+                client_categories, max_price_per_hour(client_request.budget, work_days), price_region
+            )
+        
+        if client_categories:
+            # Грузоподъемности техники исполнителя должно хватать
+            contractor_requests = [r for r in contractor_requests if capacity_fits(client_request, r)]
+        if not contractor_requests:
+            return []
+        
+        columns = build_features(
+            client_request, contractor_requests,
+            work_days=work_days,
+            affordable_ids=affordable_ids,
+            distances=distances,
+            accept_rates=_contractor_accept_rates(db, {r.user_id for r in contractor_requests})
+        )
+        scores = match_scorer.score_candidates(columns)
+        matches = [
+            (contractor_req, score)
+            for contractor_req, score in zip(contractor_requests, scores)
+            if score > match_scorer.threshold
+        ]
         
         return sorted(matches, key=lambda x: x[1], reverse=True)
     finally:
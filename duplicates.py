@@ -0,0 +1,110 @@
+"""
+Поиск повторно отправленных заявок
+Отпечаток ключевых полей (пользователь, тип, регион, техника, округленная цена) и SimHash описания
+"""
+import hashlib
+import math
+from contractor_index import ContractorIndex
+from search_index import tokenize
+
+SIMHASH_BITS = 64
+# Описания, отличающиеся не больше чем на столько бит SimHash, считаем одинаковыми
+# (у несвязанных текстов в среднем различается 32 бита)
+SIMHASH_DISTANCE = 8
+
+# Что делать с повтором: обновить старую заявку, заменить ее новой или оставить обе
+MERGE, REPLACE, KEEP = 'merge', 'replace', 'keep'
+
+# Поля, которые переносятся в старую заявку при объединении; остальные совпадают по отпечатку
+MERGE_FIELDS = ('description', 'work_duration', 'work_days', 'work_start', 'work_end',
+                'experience_years', 'contact_preference', 'expires_at')
+
+class DuplicateRequestError(Exception):
+    """У пользователя уже есть такая же активная заявка"""
+    def __init__(self, request_id):
+        super().__init__(f"Повтор заявки {request_id}")
+        self.request_id = request_id
+
+# Шаг округления цены: соседние значения отличаются на 25%
+AMOUNT_STEP = 1.25
+
+def round_amount(value):
+    """Номер ценового диапазона: 480 и 500 грн/час - одна цена, 500 и 800 - разные"""
+    if not value or value <= 0:
+        return 0
+    return round(math.log(value, AMOUNT_STEP))
+
+def fingerprint(user_id, request_type, region_id, equipment_categories, amount):
+    """Короткий хэш нормализованных ключевых полей заявки"""
+    key = f"{user_id}|{request_type}|{region_id or ''}|{equipment_categories or ''}|{round_amount(amount)}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+def simhash(text):
+    """64-битный SimHash слов и пар слов текста в hex; близкие тексты отличаются в немногих битах"""
+    tokens = tokenize(text)
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    result = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return f'{result:016x}'
+
+def simhash_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+def request_fingerprint(user_id, request_type, fields):
+    """Поля отпечатка для новой заявки по ее данным"""
+    amount = fields.get('budget') if request_type == 'client' else fields.get('price_per_hour')
+    return {
+        'fingerprint': fingerprint(user_id, request_type, fields.get('region_id'),
+                                   fields.get('equipment_categories'), amount),
+        'description_simhash': simhash(fields.get('description')),
+    }
+
+class DuplicateIndex(ContractorIndex):
+    """Отпечаток -> {ID активной заявки: SimHash описания}
+
+    Отпечаток включает пользователя, поэтому проверка сравнивает описание лишь с его собственными
+    заявками с теми же ключевыми полями - время не зависит от числа заявок в системе.
+    """
+    name = 'Индекс отпечатков заявок'
+    request_type = None
+    columns = ('fingerprint', 'description_simhash')
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def find(self, fingerprint, description_simhash):
+        """ID активной заявки-повтора или None"""
+        self.ensure_loaded()
+        with self.lock:
+            for request_id, other in self.by_fingerprint.get(fingerprint, {}).items():
+                if simhash_distance(description_simhash, other) <= SIMHASH_DISTANCE:
+                    return request_id
+        return None
+
+    def _clear(self):
+        self.by_fingerprint = {}
+        self.fingerprints = {}  # request_id -> отпечаток
+
+    def _add(self, row):
+        if not row.fingerprint:
+            return
+        self.by_fingerprint.setdefault(row.fingerprint, {})[row.id] = row.description_simhash or simhash('')
+        self.fingerprints[row.id] = row.fingerprint
+
+    def _discard(self, request_id):
+        key = self.fingerprints.pop(request_id, None)
+        if key is None:
+            return
+        requests = self.by_fingerprint[key]
+        requests.pop(request_id, None)
+        if not requests:
+            del self.by_fingerprint[key]
+
+# Глобальный экземпляр
+duplicate_index = DuplicateIndex()
+duplicate_index.subscribe()
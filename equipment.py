@@ -0,0 +1,143 @@
+"""
+Справочник видов строительной техники
+Приводит свободный текст ("автокран 25т", "самосвал", "JCB 3CX") к кодам категорий и грузоподъемности
+"""
+import re
+from collections import namedtuple
+from config import Config
+from contractor_index import ContractorIndex
+from trigram import TrigramIndex
+
+EquipmentInfo = namedtuple('EquipmentInfo', ['categories', 'capacity'])
+
+# Код категории -> (название, варианты написания)
+# Слово совпадает по началу: "экскаватор" находит и "экскаваторы", и "экскаватора"
+CATEGORIES = {
+    'excavator': ('Экскаватор', ['экскаватор', 'екскаватор', 'excavator', 'эксковатор', 'гусеничный экскаватор', 'колесный экскаватор']),
+    'mini_excavator': ('Мини-экскаватор', ['мини экскаватор', 'міні екскаватор', 'мини экс', 'mini excavator', 'миниэкскаватор']),
+    'backhoe_loader': ('Экскаватор-погрузчик', ['экскаватор погрузчик', 'екскаватор навантажувач', 'backhoe', 'jcb', 'джисиби', 'джейсиби', 'cat 428', 'terex 860']),
+    'loader': ('Фронтальный погрузчик', ['фронтальный погрузчик', 'фронтальний навантажувач', 'погрузчик', 'навантажувач', 'loader']),
+    'mini_loader': ('Мини-погрузчик', ['мини погрузчик', 'міні навантажувач', 'bobcat', 'бобкэт', 'бобкет', 'skid steer']),
+    'forklift': ('Вилочный погрузчик', ['вилочный погрузчик', 'вилковий навантажувач', 'forklift']),
+    'bulldozer': ('Бульдозер', ['бульдозер', 'bulldozer', 'dozer']),
+    'crane': ('Автокран', ['автокран', 'кран', 'crane', 'мобильный кран', 'мобільний кран']),
+    'tower_crane': ('Башенный кран', ['башенный кран', 'баштовий кран', 'tower crane']),
+    'manipulator': ('Кран-манипулятор', ['кран манипулятор', 'манипулятор', 'маніпулятор', 'hiab', 'хиаб']),
+    'dump_truck': ('Самосвал', ['самосвал', 'самоскид', 'dump truck', 'dumper', 'тонар']),
+    'grader': ('Грейдер', ['автогрейдер', 'грейдер', 'grader']),
+    'roller': ('Каток', ['каток', 'коток', 'roller', 'виброкаток', 'віброкаток']),
+    'concrete_mixer': ('Автобетоносмеситель', ['автобетоносмеситель', 'автобетонозмішувач', 'бетономешалка', 'бетономішалка', 'миксер', 'міксер', 'mixer']),
+    'concrete_pump': ('Бетононасос', ['бетононасос', 'concrete pump']),
+    'aerial_platform': ('Автовышка', ['автовышка', 'автовишка', 'автогидроподъемник', 'вышка', 'вишка', 'подъемник', 'підйомник', 'aerial platform']),
+    'trawl': ('Трал', ['трал', 'низкорамник', 'низькорамник', 'lowboy']),
+    'drill': ('Буровая установка', ['буровая', 'бурова', 'ямобур', 'бурилка', 'drill']),
+    'trencher': ('Траншеекопатель', ['траншеекопатель', 'траншеєкопач', 'trencher']),
+    'tractor': ('Трактор', ['трактор', 'tractor']),
+}
+
+_APOSTROPHES_RE = re.compile(r"['’ʼ`]")
+_NON_WORD_RE = re.compile(r'[^\w.,]+')
+# "25т", "25 т", "3.5 тонн", "50t"
+_CAPACITY_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:тонн\w*|тон\w*|тн|т|tons?|t)(?!\w)')
+
+def normalize_equipment(text):
+    """Нижний регистр, ё -> е, без апострофов; дефисы и знаки препинания - пробелы"""
+    text = _APOSTROPHES_RE.sub('', (text or '').lower().replace('ё', 'е'))
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+class EquipmentTaxonomy:
+    def __init__(self):
+        self.names = {}
+        aliases = {}
+        for category, (name, variants) in CATEGORIES.items():
+            self.names[category] = name
+            for variant in variants + [name]:
+                aliases.setdefault(normalize_equipment(variant), category)
+        self.aliases = aliases
+        # Длинные варианты первыми: "экскаватор погрузчик" не распадается на две категории
+        pattern = '|'.join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+        self._alias_re = re.compile(rf'(?<!\w)({pattern})\w*')
+        # Опечатки сравниваем только с однословными вариантами: "ескаватор", "самасвал"
+        self._alias_trigrams = TrigramIndex(alias for alias in aliases if ' ' not in alias)
+
+    def parse(self, text):
+        """Категории и грузоподъемность (т) из свободного текста"""
+        normalized = normalize_equipment(text)
+        categories = {self.aliases[match.group(1)] for match in self._alias_re.finditer(normalized)}
+        if not categories:
+            categories = self._fuzzy_categories(normalized)
+
+        capacities = [float(value.replace(',', '.')) for value in _CAPACITY_RE.findall(normalized)]
+        return EquipmentInfo(categories, max(capacities) if capacities else None)
+
+    def _fuzzy_categories(self, normalized):
+        """Категории по словам с опечатками; короткие слова и числа не сравниваем"""
+        categories = set()
+        for word in normalized.split():
+            if len(word) < 5 or not word.isalpha():
+                continue
+            alias = self._alias_trigrams.best(word, Config.FUZZY_THRESHOLD)
+            if alias:
+                categories.add(self.aliases[alias])
+        return categories
+
+    def request_fields(self, text):
+        """Поля заявки для текста техники; '' - категории не распознаны"""
+        info = self.parse(text)
+        return {
+            'equipment_categories': ','.join(sorted(info.categories)),
+            'equipment_capacity': info.capacity,
+        }
+
+def request_categories(request):
+    """Множество категорий, сохраненных в заявке"""
+    return set(filter(None, (request.equipment_categories or '').split(',')))
+
+def capacity_fits(client_request, contractor_request):
+    """Хватает ли грузоподъемности техники исполнителя; без данных - считаем, что хватает"""
+    if client_request.equipment_capacity is None or contractor_request.equipment_capacity is None:
+        return True
+    return contractor_request.equipment_capacity >= client_request.equipment_capacity
+
+class ContractorEquipmentIndex(ContractorIndex):
+    """Инвертированный индекс категория -> ID активных заявок исполнителей"""
+    name = 'Индекс техники исполнителей'
+    columns = ('equipment_categories',)
+
+    def __init__(self):
+        super().__init__()
+        self.by_category = {}
+        self.categories = {}  # request_id -> категории
+
+    def lookup(self, categories):
+        """ID заявок исполнителей с любой из категорий"""
+        self.ensure_loaded()
+        with self.lock:
+            found = set()
+            for category in categories:
+                found |= self.by_category.get(category, set())
+            return found
+
+    def _clear(self):
+        self.by_category = {}
+        self.categories = {}
+
+    def _add(self, row):
+        categories = request_categories(row)
+        if not categories:
+            return
+        self.categories[row.id] = categories
+        for category in categories:
+            self.by_category.setdefault(category, set()).add(row.id)
+
+    def _discard(self, request_id):
+        for category in self.categories.pop(request_id, ()):
+            ids = self.by_category[category]
+            ids.discard(request_id)
+            if not ids:
+                del self.by_category[category]
+
+# Глобальные экземпляры
+equipment_taxonomy = EquipmentTaxonomy()
+contractor_equipment_index = ContractorEquipmentIndex()
+contractor_equipment_index.subscribe()
@@ -0,0 +1,80 @@
+"""
+Защита от флуда входящими апдейтами
+Token bucket на пользователя; проверка идет в первой группе обработчиков, до обращений к БД
+"""
+import logging
+import time
+from collections import Counter
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+from config import Config
+from metrics import FLOOD_UPDATES, FLOOD_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+class FloodControl:
+    """user_id -> (токены, момент последней проверки); полный bucket не хранится"""
+    def __init__(self, rate=None, burst=None, exempt=(), sweep_interval=60, max_tracked=10000):
+        self.rate = rate or Config.FLOOD_RATE
+        self.burst = burst or Config.FLOOD_BURST
+        self.exempt = set(exempt)
+        self.sweep_interval = sweep_interval
+        self.max_tracked = max_tracked
+        self.enabled = True  # replay_updates.py выключает лимит, чтобы ускоренная запись не отбрасывалась
+        # За это время пустой bucket наполняется целиком - дальше запись не нужна
+        self.idle_ttl = self.burst / self.rate
+        self.buckets = {}
+        self.dropped = Counter()  # user_id -> отброшенные апдейты
+        self.next_sweep = time.monotonic() + sweep_interval
+        self._allowed = FLOOD_UPDATES.labels('allowed')
+        self._dropped = FLOOD_UPDATES.labels('dropped')
+
+    def allow(self, user_id, now=None):
+        """Списывает токен пользователя; False - лимит исчерпан"""
+        now = time.monotonic() if now is None else now
+        if now >= self.next_sweep:
+            self._sweep(now)
+
+        tokens, updated_at = self.buckets.get(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self.buckets[user_id] = (tokens, now)
+            self._drop(user_id)
+            return False
+        self.buckets[user_id] = (tokens - 1, now)
+        self._allowed.inc()
+        return True
+
+    def _drop(self, user_id):
+        self._dropped.inc()
+        self.dropped[user_id] += 1
+        count = self.dropped[user_id]
+        # В лог - только начало и каждый сотый апдейт, иначе флуд переедет в логи
+        if count == 1 or count % 100 == 0:
+            logger.warning(f"Флуд от пользователя {user_id}: отброшено апдейтов - {count}")
+        if len(self.dropped) > self.max_tracked:
+            self.dropped = Counter(dict(self.dropped.most_common(self.max_tracked // 2)))
+
+    def _sweep(self, now):
+        """Удаляет bucket'ы, которые уже наполнились бы до конца"""
+        self.buckets = {
+            user_id: bucket for user_id, bucket in self.buckets.items()
+            if now - bucket[1] < self.idle_ttl
+        }
+        self.next_sweep = now + self.sweep_interval
+
+    def top_offenders(self, limit=20):
+        """Пользователи с наибольшим числом отброшенных апдейтов: [(user_id, число)]"""
+        return self.dropped.most_common(limit)
+
+    async def handle_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик высшей группы: останавливает обработку апдейта сверх лимита"""
+        user = update.effective_user
+        if not self.enabled or user is None or user.id in self.exempt:
+            return
+        if not self.allow(user.id):
+            raise ApplicationHandlerStop
+
+# Глобальный экземпляр
+flood_control = FloodControl(exempt=[Config.ADMIN_USER_ID])
+FLOOD_BUCKETS.set_function(lambda: len(flood_control.buckets))
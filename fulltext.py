@@ -0,0 +1,169 @@
+"""
+Полнотекстовый поиск по заявкам для админа
+SQLite - виртуальная таблица FTS5, PostgreSQL - столбец tsvector с GIN-индексом; оба обновляются триггерами
+Заявки, перенесенные в requests_archive, остаются в поиске
+"""
+import logging
+import re
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+')
+
+# Что индексируем: поля заявки и имя/телефон автора
+_SQLITE_ROW = """
+    {prefix}.id, {prefix}.title, {prefix}.description, {prefix}.location,
+    coalesce({prefix}.available_equipment, '') || ' ' || coalesce({prefix}.equipment_type, ''),
+    (SELECT coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(username, '')
+     FROM users WHERE users.id = {prefix}.user_id),
+    (SELECT phone FROM users WHERE users.id = {prefix}.user_id)
+"""
+_SQLITE_COLUMNS = "rowid, title, description, location, equipment, user_name, phone"
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE requests_fts USING fts5("
+    "title, description, location, equipment, user_name, phone, tokenize = 'unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER requests_fts_insert AFTER INSERT ON requests BEGIN
+        INSERT INTO requests_fts ({_SQLITE_COLUMNS}) SELECT {_SQLITE_ROW.format(prefix='new')};
+    END""",
+    f"""CREATE TRIGGER requests_fts_update
+    AFTER UPDATE OF title, description, location, available_equipment, equipment_type, user_id ON requests BEGIN
+        DELETE FROM requests_fts WHERE rowid = old.id;
+        INSERT INTO requests_fts ({_SQLITE_COLUMNS}) SELECT {_SQLITE_ROW.format(prefix='new')};
+    END""",
+    f"INSERT INTO requests_fts ({_SQLITE_COLUMNS}) SELECT {_SQLITE_ROW.format(prefix='requests')} FROM requests",
+]
+
+# Архив: удаление при переносе в requests_archive не убирает заявку из индекса (rowid = ID заявки)
+SQLITE_ARCHIVE_DDL = [
+    "DROP TRIGGER IF EXISTS requests_fts_delete",
+    """CREATE TRIGGER requests_fts_delete_unarchived AFTER DELETE ON requests
+    WHEN NOT EXISTS (SELECT 1 FROM requests_archive WHERE id = old.id) BEGIN
+        DELETE FROM requests_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER requests_fts_archive_delete AFTER DELETE ON requests_archive BEGIN
+        DELETE FROM requests_fts WHERE rowid = old.id;
+    END""",
+    "DROP TRIGGER IF EXISTS requests_fts_user_update",
+    """CREATE TRIGGER requests_fts_user_update
+    AFTER UPDATE OF first_name, last_name, username, phone ON users BEGIN
+        UPDATE requests_fts SET
+            user_name = coalesce(new.first_name, '') || ' ' || coalesce(new.last_name, '') || ' ' || coalesce(new.username, ''),
+            phone = new.phone
+        WHERE rowid IN (
+            SELECT id FROM requests WHERE user_id = new.id
+            UNION ALL SELECT id FROM requests_archive WHERE user_id = new.id
+        );
+    END""",
+    # Заявки, заархивированные до этого триггера
+    f"""INSERT INTO requests_fts ({_SQLITE_COLUMNS}) SELECT {_SQLITE_ROW.format(prefix='requests_archive')}
+    FROM requests_archive WHERE id NOT IN (SELECT rowid FROM requests_fts)""",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION requests_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.location, '') || ' ' ||
+                coalesce(NEW.available_equipment, '') || ' ' || coalesce(NEW.equipment_type, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce((
+                SELECT concat_ws(' ', first_name, last_name, username, phone) FROM users WHERE id = NEW.user_id
+            ), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER requests_search_vector BEFORE INSERT OR UPDATE OF
+        title, description, location, available_equipment, equipment_type, user_id, search_vector
+    ON requests FOR EACH ROW EXECUTE FUNCTION requests_search_vector_update()""",
+    "CREATE INDEX IF NOT EXISTS ix_requests_search_vector ON requests USING GIN (search_vector)",
+    "UPDATE requests SET search_vector = NULL WHERE search_vector IS NULL",
+]
+
+# Архив: свой столбец tsvector, вектор считается той же функцией при переносе заявки
+POSTGRES_ARCHIVE_DDL = [
+    "ALTER TABLE requests_archive ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE TRIGGER requests_archive_search_vector BEFORE INSERT OR UPDATE OF
+        title, description, location, available_equipment, equipment_type, user_id, search_vector
+    ON requests_archive FOR EACH ROW EXECUTE FUNCTION requests_search_vector_update()""",
+    # Изменение имени или телефона пересчитывает векторы заявок пользователя через триггеры выше
+    """CREATE OR REPLACE FUNCTION users_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE requests SET search_vector = NULL WHERE user_id = NEW.id;
+        UPDATE requests_archive SET search_vector = NULL WHERE user_id = NEW.id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS users_search_vector ON users",
+    """CREATE TRIGGER users_search_vector AFTER UPDATE OF first_name, last_name, username, phone
+    ON users FOR EACH ROW EXECUTE FUNCTION users_search_vector_update()""",
+    "CREATE INDEX IF NOT EXISTS ix_requests_archive_search_vector ON requests_archive USING GIN (search_vector)",
+    "UPDATE requests_archive SET search_vector = NULL WHERE search_vector IS NULL",
+]
+
+def setup_fulltext(engine):
+    """Создает индекс и триггеры, если их еще нет, и заполняет индекс существующими и архивными заявками"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == 'sqlite':
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests_fts'"
+            )).first()
+            archive_exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'requests_fts_delete_unarchived'"
+            )).first()
+            statements = ([] if exists else SQLITE_DDL) + ([] if archive_exists else SQLITE_ARCHIVE_DDL)
+        elif dialect == 'postgresql':
+            exists = conn.execute(text(
+                "SELECT 1 FROM pg_trigger WHERE tgname = 'requests_search_vector'"
+            )).first()
+            archive_exists = conn.execute(text(
+                "SELECT 1 FROM pg_trigger WHERE tgname = 'requests_archive_search_vector'"
+            )).first()
+            statements = ([] if exists else POSTGRES_DDL) + ([] if archive_exists else POSTGRES_ARCHIVE_DDL)
+        else:
+            logger.warning(f"Полнотекстовый поиск не поддерживается для {dialect}")
+            return
+
+        for statement in statements:
+            conn.execute(text(statement))
+        if statements:
+            logger.info(f"Полнотекстовый индекс заявок создан ({dialect})")
+
+def search_request_ids(db, query, offset=0, limit=10):
+    """ID заявок (в том числе архивных) по запросу, самые релевантные первыми; слова ищутся по началу, все обязательны
+
+    Возвращает (ID, есть ли еще результаты).
+    """
+    words = _WORD_RE.findall((query or '').lower())
+    if not words:
+        return [], False
+
+    dialect = db.get_bind().dialect.name
+    params = {'limit': limit + 1, 'offset': offset}
+    if dialect == 'sqlite':
+        params['query'] = ' '.join(f'"{word}"*' for word in words)
+        sql = """
+            SELECT rowid FROM requests_fts WHERE requests_fts MATCH :query
+            ORDER BY bm25(requests_fts, 10.0, 1.0, 5.0, 5.0, 3.0, 3.0), rowid DESC
+            LIMIT :limit OFFSET :offset
+        """
+    elif dialect == 'postgresql':
+        params['query'] = ' & '.join(f'{word}:*' for word in words)
+        sql = """
+            SELECT id FROM (
+                SELECT id, ts_rank(search_vector, query) AS rank
+                FROM requests, to_tsquery('simple', :query) AS query WHERE search_vector @@ query
+                UNION ALL
+                SELECT id, ts_rank(search_vector, query) AS rank
+                FROM requests_archive, to_tsquery('simple', :query) AS query WHERE search_vector @@ query
+            ) AS found
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        return [], False
+
+    ids = [row[0] for row in db.execute(text(sql), params)]
+    return ids[:limit], len(ids) > limit
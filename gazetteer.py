@@ -0,0 +1,251 @@
+"""
+Офлайн-справочник областей и городов Украины
+Приводит свободный текст локации ("Київ", "Киев", "Kyiv obl.", "м. Київ") к коду региона
+"""
+import re
+from collections import namedtuple
+from config import Config
+from trigram import TrigramIndex
+
+Place = namedtuple('Place', ['region_id', 'name', 'latitude', 'longitude'])
+
+# Код ISO 3166-2:UA -> (название, широта, долгота центра, названия области)
+REGIONS = {
+    'UA-05': ('Вінницька область', 49.2331, 28.4682, ['вінницька', 'винницкая', 'vinnytska', 'vinnitskaya', 'вінниччина', 'винничина']),
+    'UA-07': ('Волинська область', 50.7472, 25.3254, ['волинська', 'волынская', 'volynska', 'volyn', 'волинь', 'волынь']),
+    'UA-09': ('Луганська область', 48.5740, 39.3078, ['луганська', 'луганская', 'luhanska', 'luganskaya', 'луганщина']),
+    'UA-12': ('Дніпропетровська область', 48.4647, 35.0462, ['дніпропетровська', 'днепропетровская', 'dnipropetrovska', 'dnepropetrovskaya', 'дніпровська', 'днепровская', 'дніпропетровщина', 'днепропетровщина']),
+    'UA-14': ('Донецька область', 48.0159, 37.8028, ['донецька', 'донецкая', 'donetska', 'donetskaya', 'донеччина', 'донетчина', 'донбас', 'донбасс']),
+    'UA-18': ('Житомирська область', 50.2547, 28.6587, ['житомирська', 'житомирская', 'zhytomyrska', 'zhitomirskaya', 'житомирщина']),
+    'UA-21': ('Закарпатська область', 48.6208, 22.2879, ['закарпатська', 'закарпатская', 'zakarpatska', 'zakarpattia', 'закарпаття', 'закарпатье']),
+    'UA-23': ('Запорізька область', 47.8388, 35.1396, ['запорізька', 'запорожская', 'zaporizka', 'zaporozhskaya', 'запоріжжя область', 'запорожье область']),
+    'UA-26': ('Івано-Франківська область', 48.9226, 24.7111, ['івано-франківська', 'ивано-франковская', 'ivano-frankivska', 'прикарпаття', 'прикарпатье']),
+    'UA-30': ('Київ', 50.4501, 30.5234, []),
+    'UA-32': ('Київська область', 50.0529, 30.7667, ['київська', 'киевская', 'kyivska', 'kievskaya', 'київщина', 'киевщина']),
+    'UA-35': ('Кіровоградська область', 48.5079, 32.2623, ['кіровоградська', 'кировоградская', 'kirovohradska', 'kirovogradskaya', 'кропивницька']),
+    'UA-40': ('Севастополь', 44.6166, 33.5254, []),
+    'UA-43': ('Автономна Республіка Крим', 44.9521, 34.1024, ['крим', 'крым', 'crimea', 'krym', 'арк']),
+    'UA-46': ('Львівська область', 49.8397, 24.0297, ['львівська', 'львовская', 'lvivska', 'lvovskaya', 'львівщина', 'львовщина']),
+    'UA-48': ('Миколаївська область', 46.9750, 31.9946, ['миколаївська', 'николаевская', 'mykolaivska', 'nikolaevskaya', 'миколаївщина', 'николаевщина']),
+    'UA-51': ('Одеська область', 46.4825, 30.7233, ['одеська', 'одесская', 'odeska', 'odesskaya', 'одещина', 'одесщина']),
+    'UA-53': ('Полтавська область', 49.5883, 34.5514, ['полтавська', 'полтавская', 'poltavska', 'poltavskaya', 'полтавщина']),
+    'UA-56': ('Рівненська область', 50.6199, 26.2516, ['рівненська', 'ровенская', 'rivnenska', 'rovenskaya', 'рівненщина', 'ровенщина']),
+    'UA-59': ('Сумська область', 50.9077, 34.7981, ['сумська', 'сумская', 'sumska', 'sumskaya', 'сумщина']),
+    'UA-61': ('Тернопільська область', 49.5535, 25.5948, ['тернопільська', 'тернопольская', 'ternopilska', 'ternopolskaya', 'тернопільщина']),
+    'UA-63': ('Харківська область', 49.9935, 36.2304, ['харківська', 'харьковская', 'kharkivska', 'kharkovskaya', 'харківщина', 'харьковщина', 'слобожанщина']),
+    'UA-65': ('Херсонська область', 46.6354, 32.6169, ['херсонська', 'херсонская', 'khersonska', 'khersonskaya', 'херсонщина']),
+    'UA-68': ('Хмельницька область', 49.4229, 26.9871, ['хмельницька', 'хмельницкая', 'khmelnytska', 'khmelnitskaya', 'хмельниччина', 'поділля', 'подолье']),
+    'UA-71': ('Черкаська область', 49.4444, 32.0598, ['черкаська', 'черкасская', 'cherkaska', 'cherkasskaya', 'черкащина']),
+    'UA-74': ('Чернівецька область', 48.2921, 25.9358, ['чернівецька', 'черновицкая', 'chernivetska', 'chernovitskaya', 'буковина', 'bukovyna']),
+    'UA-77': ('Чернігівська область', 51.4982, 31.2893, ['чернігівська', 'черниговская', 'chernihivska', 'chernigovskaya', 'чернігівщина', 'черниговщина']),
+}
+
+# (код региона, название, широта, долгота, варианты написания)
+# Областные центры совпадают с центром области по координатам: "Харків обл." сводится к области
+CITIES = [
+    ('UA-30', 'Київ', 50.4501, 30.5234, ['київ', 'киев', 'kyiv', 'kiev', 'kiyv']),
+    ('UA-32', 'Біла Церква', 49.7968, 30.1311, ['біла церква', 'белая церковь', 'bila tserkva']),
+    ('UA-32', 'Бровари', 50.5110, 30.7909, ['бровари', 'бровары', 'brovary']),
+    ('UA-32', 'Бориспіль', 50.3527, 30.9550, ['бориспіль', 'борисполь', 'boryspil']),
+    ('UA-32', 'Ірпінь', 50.5218, 30.2506, ['ірпінь', 'ирпень', 'irpin']),
+    ('UA-32', 'Буча', 50.5433, 30.2120, ['буча', 'bucha']),
+    ('UA-32', 'Обухів', 50.1072, 30.6211, ['обухів', 'обухов', 'obukhiv']),
+    ('UA-32', 'Фастів', 50.0747, 29.9180, ['фастів', 'фастов', 'fastiv']),
+    ('UA-32', 'Вишневе', 50.3869, 30.3700, ['вишневе', 'вишневое', 'vyshneve']),
+    ('UA-32', 'Васильків', 50.1786, 30.3197, ['васильків', 'васильков', 'vasylkiv']),
+    ('UA-05', 'Вінниця', 49.2331, 28.4682, ['вінниця', 'винница', 'vinnytsia', 'vinnitsa']),
+    ('UA-05', 'Жмеринка', 49.0390, 28.1120, ['жмеринка', 'zhmerynka']),
+    ('UA-07', 'Луцьк', 50.7472, 25.3254, ['луцьк', 'луцк', 'lutsk']),
+    ('UA-07', 'Ковель', 51.2150, 24.7081, ['ковель', 'kovel']),
+    ('UA-07', 'Нововолинськ', 50.7260, 24.1630, ['нововолинськ', 'нововолынск', 'novovolynsk']),
+    ('UA-09', 'Луганськ', 48.5740, 39.3078, ['луганськ', 'луганск', 'luhansk', 'lugansk']),
+    ('UA-09', 'Сєвєродонецьк', 48.9482, 38.4917, ['сєвєродонецьк', 'северодонецк', 'sievierodonetsk', 'severodonetsk']),
+    ('UA-09', 'Лисичанськ', 48.9048, 38.4426, ['лисичанськ', 'лисичанск', 'lysychansk']),
+    ('UA-12', 'Дніпро', 48.4647, 35.0462, ['дніпро', 'днепр', 'днепропетровск', 'дніпропетровськ', 'dnipro', 'dnepr']),
+    ('UA-12', 'Кривий Ріг', 47.9105, 33.3918, ['кривий ріг', 'кривой рог', 'kryvyi rih', 'krivoy rog']),
+    ('UA-12', "Кам'янське", 48.5110, 34.6021, ["кам'янське", 'каменское', 'днепродзержинск', 'kamianske']),
+    ('UA-12', 'Нікополь', 47.5667, 34.3958, ['нікополь', 'никополь', 'nikopol']),
+    ('UA-12', 'Павлоград', 48.5350, 35.8700, ['павлоград', 'pavlohrad']),
+    ('UA-12', 'Самар', 48.6330, 35.2230, ['самар', 'новомосковськ', 'новомосковск', 'samar', 'novomoskovsk']),
+    ('UA-14', 'Донецьк', 48.0159, 37.8028, ['донецьк', 'донецк', 'donetsk']),
+    ('UA-14', 'Маріуполь', 47.0971, 37.5434, ['маріуполь', 'мариуполь', 'mariupol']),
+    ('UA-14', 'Краматорськ', 48.7389, 37.5844, ['краматорськ', 'краматорск', 'kramatorsk']),
+    ('UA-14', "Слов'янськ", 48.8533, 37.6053, ["слов'янськ", 'славянск', 'sloviansk']),
+    ('UA-14', 'Покровськ', 48.2820, 37.1758, ['покровськ', 'покровск', 'pokrovsk']),
+    ('UA-14', 'Бахмут', 48.5956, 38.0003, ['бахмут', 'артемовск', 'bakhmut']),
+    ('UA-18', 'Житомир', 50.2547, 28.6587, ['житомир', 'zhytomyr', 'zhitomir']),
+    ('UA-18', 'Бердичів', 49.8990, 28.6020, ['бердичів', 'бердичев', 'berdychiv']),
+    ('UA-18', 'Коростень', 50.9500, 28.6333, ['коростень', 'korosten']),
+    ('UA-21', 'Ужгород', 48.6208, 22.2879, ['ужгород', 'uzhhorod', 'uzhgorod']),
+    ('UA-21', 'Мукачево', 48.4390, 22.7170, ['мукачево', 'мукачеве', 'mukachevo']),
+    ('UA-21', 'Хуст', 48.1700, 23.3000, ['хуст', 'khust']),
+    ('UA-23', 'Запоріжжя', 47.8388, 35.1396, ['запоріжжя', 'запорожье', 'zaporizhzhia', 'zaporozhye']),
+    ('UA-23', 'Мелітополь', 46.8489, 35.3675, ['мелітополь', 'мелитополь', 'melitopol']),
+    ('UA-23', 'Бердянськ', 46.7560, 36.7980, ['бердянськ', 'бердянск', 'berdiansk']),
+    ('UA-23', 'Енергодар', 47.4989, 34.6580, ['енергодар', 'энергодар', 'enerhodar']),
+    ('UA-26', 'Івано-Франківськ', 48.9226, 24.7111, ['івано-франківськ', 'ивано-франковск', 'ivano-frankivsk', 'франик']),
+    ('UA-26', 'Калуш', 49.0119, 24.3731, ['калуш', 'kalush']),
+    ('UA-26', 'Коломия', 48.5310, 25.0370, ['коломия', 'коломыя', 'kolomyia']),
+    ('UA-35', 'Кропивницький', 48.5079, 32.2623, ['кропивницький', 'кропивницкий', 'кіровоград', 'кировоград', 'kropyvnytskyi']),
+    ('UA-35', 'Олександрія', 48.6696, 33.1159, ['олександрія', 'александрия', 'oleksandriia']),
+    ('UA-40', 'Севастополь', 44.6166, 33.5254, ['севастополь', 'sevastopol']),
+    ('UA-43', 'Сімферополь', 44.9521, 34.1024, ['сімферополь', 'симферополь', 'simferopol']),
+    ('UA-43', 'Керч', 45.3563, 36.4674, ['керч', 'керчь', 'kerch']),
+    ('UA-43', 'Євпаторія', 45.1904, 33.3669, ['євпаторія', 'евпатория', 'yevpatoriia']),
+    ('UA-43', 'Ялта', 44.4952, 34.1663, ['ялта', 'yalta']),
+    ('UA-46', 'Львів', 49.8397, 24.0297, ['львів', 'львов', 'lviv', 'lvov']),
+    ('UA-46', 'Дрогобич', 49.3500, 23.5000, ['дрогобич', 'дрогобыч', 'drohobych']),
+    ('UA-46', 'Стрий', 49.2620, 23.8560, ['стрий', 'стрый', 'stryi']),
+    ('UA-46', 'Шептицький', 50.3867, 24.2289, ['шептицький', 'червоноград', 'sheptytskyi', 'chervonohrad']),
+    ('UA-48', 'Миколаїв', 46.9750, 31.9946, ['миколаїв', 'николаев', 'mykolaiv', 'nikolaev']),
+    ('UA-48', 'Первомайськ', 48.0440, 30.8500, ['первомайськ', 'первомайск', 'pervomaisk']),
+    ('UA-48', 'Вознесенськ', 47.5670, 31.3333, ['вознесенськ', 'вознесенск', 'voznesensk']),
+    ('UA-51', 'Одеса', 46.4825, 30.7233, ['одеса', 'одесса', 'odesa', 'odessa']),
+    ('UA-51', 'Ізмаїл', 45.3511, 28.8372, ['ізмаїл', 'измаил', 'izmail']),
+    ('UA-51', 'Чорноморськ', 46.3019, 30.6548, ['чорноморськ', 'черноморск', 'ільічівськ', 'ильичевск', 'chornomorsk']),
+    ('UA-51', 'Білгород-Дністровський', 46.1871, 30.3494, ['білгород-дністровський', 'белгород-днестровский', 'bilhorod-dnistrovskyi']),
+    ('UA-51', 'Південне', 46.6226, 31.1013, ['південне', 'южне', 'южный', 'pivdenne', 'yuzhne']),
+    ('UA-53', 'Полтава', 49.5883, 34.5514, ['полтава', 'poltava']),
+    ('UA-53', 'Кременчук', 49.0680, 33.4204, ['кременчук', 'кременчуг', 'kremenchuk']),
+    ('UA-53', 'Горішні Плавні', 49.0123, 33.6450, ['горішні плавні', 'горишние плавни', 'комсомольск', 'horishni plavni']),
+    ('UA-56', 'Рівне', 50.6199, 26.2516, ['рівне', 'ровно', 'rivne', 'rovno']),
+    ('UA-56', 'Вараш', 51.3500, 25.8500, ['вараш', 'кузнецовськ', 'кузнецовск', 'varash']),
+    ('UA-56', 'Дубно', 50.4167, 25.7500, ['дубно', 'dubno']),
+    ('UA-59', 'Суми', 50.9077, 34.7981, ['суми', 'сумы', 'sumy']),
+    ('UA-59', 'Конотоп', 51.2403, 33.2026, ['конотоп', 'konotop']),
+    ('UA-59', 'Шостка', 51.8630, 33.4698, ['шостка', 'shostka']),
+    ('UA-61', 'Тернопіль', 49.5535, 25.5948, ['тернопіль', 'тернополь', 'ternopil']),
+    ('UA-61', 'Чортків', 49.0170, 25.7980, ['чортків', 'чортков', 'chortkiv']),
+    ('UA-63', 'Харків', 49.9935, 36.2304, ['харків', 'харьков', 'kharkiv', 'kharkov']),
+    ('UA-63', 'Лозова', 48.8893, 36.3176, ['лозова', 'лозовая', 'lozova']),
+    ('UA-63', 'Ізюм', 49.2128, 37.2566, ['ізюм', 'изюм', 'izium']),
+    ('UA-63', 'Чугуїв', 49.8353, 36.6880, ['чугуїв', 'чугуев', 'chuhuiv']),
+    ('UA-65', 'Херсон', 46.6354, 32.6169, ['херсон', 'kherson']),
+    ('UA-65', 'Нова Каховка', 46.7550, 33.3480, ['нова каховка', 'новая каховка', 'nova kakhovka']),
+    ('UA-68', 'Хмельницький', 49.4229, 26.9871, ['хмельницький', 'хмельницкий', 'khmelnytskyi']),
+    ('UA-68', "Кам'янець-Подільський", 48.6845, 26.5856, ["кам'янець-подільський", 'каменец-подольский', 'kamianets-podilskyi']),
+    ('UA-68', 'Шепетівка', 50.1822, 27.0630, ['шепетівка', 'шепетовка', 'shepetivka']),
+    ('UA-71', 'Черкаси', 49.4444, 32.0598, ['черкаси', 'черкассы', 'cherkasy']),
+    ('UA-71', 'Умань', 48.7484, 30.2218, ['умань', 'uman']),
+    ('UA-71', 'Сміла', 49.2227, 31.8870, ['сміла', 'смела', 'smila']),
+    ('UA-74', 'Чернівці', 48.2921, 25.9358, ['чернівці', 'черновцы', 'chernivtsi']),
+    ('UA-77', 'Чернігів', 51.4982, 31.2893, ['чернігів', 'чернигов', 'chernihiv', 'chernigov']),
+    ('UA-77', 'Ніжин', 51.0480, 31.8869, ['ніжин', 'нежин', 'nizhyn']),
+]
+
+# Центр области для "<город> обл.": Київ -> Київська область
+REGION_OF_CAPITAL = {'UA-30': 'UA-32', 'UA-40': 'UA-43'}
+
+# Слова, которые не несут названия места
+_STOP_WORDS = {
+    'м', 'г', 'с', 'смт', 'пгт', 'сел', 'село', 'місто', 'город', 'city', 'misto',
+    'район', 'р', 'н', 'рн', 'україна', 'украина', 'ukraine', 'та', 'и', 'і', 'й',
+}
+_REGION_MARKERS = {'обл', 'область', 'області', 'области', 'oblast', 'obl', 'region', 'регион', 'регіон'}
+_APOSTROPHES_RE = re.compile(r"[’'ʼ`]")
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_CYRILLIC_RE = re.compile(r"[а-яіїєґ]")
+# Латинские буквы, которые пишут вместо кириллических: "Днiпро", "Kиїв"
+_HOMOGLYPHS = str.maketrans('aceiopxyk', 'асеіорхук')
+
+def normalize_location(text):
+    """Нормализует название: нижний регистр, без апострофов, пунктуации и служебных слов
+
+    Возвращает (нормализованная строка, указана ли область).
+    """
+    text = _APOSTROPHES_RE.sub('', (text or '').lower().replace('ё', 'е'))
+    tokens = [
+        token.translate(_HOMOGLYPHS) if _CYRILLIC_RE.search(token) else token
+        for token in _NON_WORD_RE.sub(' ', text).split()
+    ]
+    has_region_marker = any(token in _REGION_MARKERS for token in tokens)
+    tokens = [token for token in tokens if token not in _STOP_WORDS and token not in _REGION_MARKERS]
+    return ' '.join(tokens), has_region_marker
+
+class Gazetteer:
+    def __init__(self):
+        self.regions = {}
+        self.city_aliases = {}
+        self.region_aliases = {}
+        self._build()
+        # Для опечаток: "Запорожя", "Черкасы", "Одеса"
+        self.city_trigrams = TrigramIndex(self.city_aliases)
+        self.region_trigrams = TrigramIndex(self.region_aliases)
+
+    def _build(self):
+        """Строит словари вариантов написания"""
+        for region_id, (name, latitude, longitude, aliases) in REGIONS.items():
+            place = Place(region_id, name, latitude, longitude)
+            self.regions[region_id] = place
+            for alias in aliases + [name]:
+                self.region_aliases.setdefault(normalize_location(alias)[0], place)
+
+        for region_id, name, latitude, longitude, aliases in CITIES:
+            place = Place(region_id, name, latitude, longitude)
+            region = self.regions[REGION_OF_CAPITAL.get(region_id, region_id)]
+            for alias in aliases + [name]:
+                key = normalize_location(alias)[0]
+                self.city_aliases.setdefault(key, place)
+                # "Харків обл." - это область с центром в Харкове
+                if region_id in REGION_OF_CAPITAL:
+                    # "Київ" уже занят регионом-городом UA-30 - с "обл." всегда нужна область
+                    self.region_aliases[key] = region
+                elif (region.latitude, region.longitude) == (latitude, longitude):
+                    self.region_aliases.setdefault(key, region)
+
+    def resolve(self, text):
+        """Находит место по свободному тексту; None, если не распознано"""
+        normalized, has_region_marker = normalize_location(text)
+        if not normalized:
+            return None
+
+        tokens = normalized.split()
+        # Сначала вся строка, затем пары и отдельные слова ("Бровари, Київська обл.")
+        candidates = [normalized]
+        candidates += [' '.join(tokens[i:i + 2]) for i in range(len(tokens) - 1)]
+        candidates += tokens
+
+        city = next((self.city_aliases[c] for c in candidates if c in self.city_aliases), None)
+        region = next((self.region_aliases[c] for c in candidates if c in self.region_aliases), None)
+
+        if not city and not region:
+            city, region = self._resolve_fuzzy(candidates, has_region_marker)
+
+        # "Kyiv obl." - область, "Бровари, Київська обл." - город в этой области
+        if has_region_marker and region and (not city or city.region_id != region.region_id):
+            return region
+        return city or region
+
+    def _resolve_fuzzy(self, candidates, has_region_marker):
+        """Ближайшее по триграммам название города или области"""
+        threshold = Config.FUZZY_THRESHOLD
+        best = (0.0, None, None)
+        for candidate in candidates:
+            # Короткие слова дают случайные совпадения
+            if len(candidate) < 4:
+                continue
+            indexes = [(self.region_trigrams, self.region_aliases)]
+            if not has_region_marker:
+                indexes.insert(0, (self.city_trigrams, self.city_aliases))
+            for index, aliases in indexes:
+                for alias, score in index.similar(candidate, threshold, limit=1):
+                    if score > best[0]:
+                        best = (score, aliases is self.city_aliases, aliases[alias])
+        _, is_city, place = best
+        if place is None:
+            return None, None
+        return (place, None) if is_city else (None, place)
+
+    def location_fields(self, text):
+        """Поля заявки (region_id и координаты) для текста локации"""
+        place = self.resolve(text)
+        if not place:
+            return {}
+        return {
+            'region_id': place.region_id,
+            'latitude': place.latitude,
+            'longitude': place.longitude,
+        }
+
+# Глобальный экземпляр
+gazetteer = Gazetteer()
@@ -0,0 +1,107 @@
+"""
+Пространственный индекс активных заявок исполнителей
+Точки раскладываются по ячейкам сетки, поиск "в радиусе R км" смотрит только соседние ячейки
+"""
+import math
+import threading
+from contractor_index import ContractorIndex
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние по поверхности Земли в километрах"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class GeoIndex:
+    """Сетка ячеек cell_size x cell_size градусов: ячейка -> {request_id: (lat, lon)}"""
+    def __init__(self, cell_size=0.5):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.points = {}  # request_id -> ячейка
+        self._lock = threading.Lock()
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def __len__(self):
+        return len(self.points)
+
+    def add(self, request_id, lat, lon):
+        """Добавляет или перемещает точку"""
+        with self._lock:
+            self._discard(request_id)
+            cell = self._cell(lat, lon)
+            self.cells.setdefault(cell, {})[request_id] = (lat, lon)
+            self.points[request_id] = cell
+
+    def remove(self, request_id):
+        """Убирает точку, если она есть"""
+        with self._lock:
+            self._discard(request_id)
+
+    def _discard(self, request_id):
+        cell = self.points.pop(request_id, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        del bucket[request_id]
+        if not bucket:
+            del self.cells[cell]
+
+    def within(self, lat, lon, radius_km):
+        """Точки в радиусе radius_km: список (request_id, расстояние), ближние первыми"""
+        dlat = radius_km / KM_PER_DEGREE
+        # Градус долготы короче ближе к полюсу - берем худший край диапазона широт
+        max_lat = min(abs(lat) + dlat, 89.0)
+        dlon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_lat)))
+
+        lat_from, lon_from = self._cell(lat - dlat, lon - dlon)
+        lat_to, lon_to = self._cell(lat + dlat, lon + dlon)
+
+        found = []
+        with self._lock:
+            for cell_lat in range(lat_from, lat_to + 1):
+                for cell_lon in range(lon_from, lon_to + 1):
+                    bucket = self.cells.get((cell_lat, cell_lon))
+                    if not bucket:
+                        continue
+                    for request_id, (point_lat, point_lon) in bucket.items():
+                        distance = haversine_km(lat, lon, point_lat, point_lon)
+                        if distance <= radius_km:
+                            found.append((request_id, distance))
+
+        found.sort(key=lambda item: item[1])
+        return found
+
+class ContractorGeoIndex(ContractorIndex):
+    """Активные заявки исполнителей с координатами"""
+    name = 'Гео-индекс исполнителей'
+    columns = ('latitude', 'longitude')
+
+    def __init__(self, cell_size=0.5):
+        super().__init__()
+        self.grid = GeoIndex(cell_size)
+
+    def __len__(self):
+        return len(self.grid)
+
+    def within(self, lat, lon, radius_km):
+        self.ensure_loaded()
+        return self.grid.within(lat, lon, radius_km)
+
+    def _clear(self):
+        self.grid = GeoIndex(self.grid.cell_size)
+
+    def _add(self, row):
+        if row.latitude is not None and row.longitude is not None:
+            self.grid.add(row.id, row.latitude, row.longitude)
+
+    def _discard(self, request_id):
+        self.grid.remove(request_id)
+
+# Глобальный экземпляр
+contractor_geo_index = ContractorGeoIndex()
+contractor_geo_index.subscribe()
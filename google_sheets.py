@@ -1,6 +1,7 @@
 import gspread
 from google.oauth2.service_account import Credentials
 from config import Config
+from metrics import SHEETS_LATENCY
 from datetime import datetime
 import logging
 import json
@@ -72,6 +73,26 @@ class GoogleSheetsManager:
         ]
         self.sheet.append_row(headers)
     
+    def _row_data(self, request, user):
+        """Строка таблицы для заявки (столбцы A-O, см. _create_headers)"""
+        return [
+            request.id,                                                    # A: ID
+            request.created_at.strftime('%d.%m.%Y %H:%M'),                # B: Дата создания
+            'Клиент' if request.request_type == 'client' else 'Исполнитель', # C: Тип заявки
+            f"{user.first_name} {user.last_name or ''}".strip(),          # D: Пользователь
+            user.phone or 'Не указан',                                     # E: Телефон
+            request.title,                                                 # F: Заголовок
+            request.description or '',                                     # G: Описание
+            request.location,                                              # H: Локация
+            request.equipment_type or '',                                  # I: Тип техники
+            request.work_duration or '',                                   # J: Длительность работ
+            request.budget or '',                                          # K: Бюджет
+            request.available_equipment or '',                             # L: Доступная техника
+            request.experience_years or '',                                # M: Опыт (лет)
+            request.price_per_hour or '',                                  # N: Цена за час
+            request.status                                                 # O: Статус
+        ]
+    
     def add_request(self, request, user):
         """Добавляет заявку в Google Sheets"""
         if not self.sheet:
@@ -79,26 +100,11 @@ class GoogleSheetsManager:
             return False
         
         try:
-            row_data = [
-                request.id,                                                    # A: ID
-                request.created_at.strftime('%d.%m.%Y %H:%M'),                # B: Дата создания
-                'Клиент' if request.request_type == 'client' else 'Исполнитель', # C: Тип заявки
-                f"{user.first_name} {user.last_name or ''}".strip(),          # D: Пользователь
-                user.phone or 'Не указан',                                     # E: Телефон
-                request.title,                                                 # F: Заголовок
-                request.description or '',                                     # G: Описание
-                request.location,                                              # H: Локация
-                request.equipment_type or '',                                  # I: Тип техники
-                request.work_duration or '',                                   # J: Длительность работ
-                request.budget or '',                                          # K: Бюджет
-                request.available_equipment or '',                             # L: Доступная техника
-                request.experience_years or '',                                # M: Опыт (лет)
-                request.price_per_hour or '',                                  # N: Цена за час
-                request.status                                                 # O: Статус
-            ]
+            row_data = self._row_data(request, user)
             
             logger.info(f"Добавляем заявку {request.id} в Google Sheets: {row_data}")
-            self.sheet.append_row(row_data)
+            with SHEETS_LATENCY.labels('append_row').time():
+                self.sheet.append_row(row_data)
             logger.info(f"✅ Заявка {request.id} успешно добавлена в Google Sheets")
             return True
             
@@ -106,6 +112,24 @@ class GoogleSheetsManager:
             logger.error(f"❌ Ошибка добавления заявки в Google Sheets: {e}")
             return False
     
+    def update_request(self, request, user):
+        """Перезаписывает строку заявки (после объединения с повтором); без строки - добавляет ее"""
+        if not self.sheet:
+            return False
+        
+        try:
+            with SHEETS_LATENCY.labels('find').time():
+                cell = self.sheet.find(str(request.id))
+            if not cell:
+                return self.add_request(request, user)
+            with SHEETS_LATENCY.labels('update').time():
+                # Именованные аргументы - порядок позиционных различается в gspread 5 и 6
+                self.sheet.update(range_name=f'A{cell.row}:O{cell.row}', values=[self._row_data(request, user)])
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления строки заявки в Google Sheets: {e}")
+            return False
+    
     def update_request_status(self, request_id, new_status):
         """Обновляет статус заявки в Google Sheets"""
         if not self.sheet:
@@ -113,23 +137,51 @@ class GoogleSheetsManager:
         
         try:
             # Находим строку с нужным ID
-            cell = self.sheet.find(str(request_id))
+            with SHEETS_LATENCY.labels('find').time():
+                cell = self.sheet.find(str(request_id))
             if cell:
                 # Обновляем статус (последний столбец)
-                self.sheet.update_cell(cell.row, 15, new_status)
+                with SHEETS_LATENCY.labels('update_cell').time():
+                    self.sheet.update_cell(cell.row, 15, new_status)
                 return True
         except Exception as e:
             logger.error(f"Ошибка обновления статуса в Google Sheets: {e}")
         
         return False
     
+    def update_requests_status(self, request_ids, new_status):
+        """Обновляет статус нескольких заявок двумя вызовами API"""
+        if not self.sheet or not request_ids:
+            return False
+        
+        try:
+            # Одно чтение столбца ID вместо find() на каждую заявку
+            with SHEETS_LATENCY.labels('col_values').time():
+                ids_column = self.sheet.col_values(1)
+            rows_by_id = {value: row for row, value in enumerate(ids_column, start=1)}
+            
+            updates = [
+                {'range': f'O{rows_by_id[str(request_id)]}', 'values': [[new_status]]}
+                for request_id in request_ids
+                if str(request_id) in rows_by_id
+            ]
+            if updates:
+                with SHEETS_LATENCY.labels('batch_update').time():
+                    self.sheet.batch_update(updates)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка массового обновления статусов в Google Sheets: {e}")
+        
+        return False
+    
     def get_all_requests(self):
         """Получает все заявки из Google Sheets"""
         if not self.sheet:
             return []
         
         try:
-            return self.sheet.get_all_records()
+            with SHEETS_LATENCY.labels('get_all_records').time():
+                return self.sheet.get_all_records()
         except Exception as e:
             logger.error(f"Ошибка получения данных из Google Sheets: {e}")
             return []
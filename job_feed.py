@@ -0,0 +1,130 @@
+"""
+Лента заказов для исполнителей
+Ранжированный список ID заявок клиентов кэшируется на пользователя, страница - срез списка
+"""
+import logging
+import threading
+import time
+from config import Config
+from database import get_feed_candidates
+from equipment import request_categories
+from match_scoring import match_scorer, build_features
+from notifications import subscription_index
+from availability import parse_period_days
+from request_events import request_events, REQUEST_CREATED, REQUEST_UPDATED, REQUESTS_STATUS_CHANGED, REQUESTS_BACKFILLED
+
+logger = logging.getLogger(__name__)
+
+class JobFeed:
+    def __init__(self, ttl=None):
+        self.ttl = Config.JOB_FEED_TTL if ttl is None else ttl
+        self.feeds = {}  # user_id -> (ранжированные ID, момент устаревания)
+        self.readers = {}  # ID заявки клиента -> user_id, в чьих лентах она есть
+        self.regions = {}  # user_id -> регионы предложений исполнителя
+        self._lock = threading.Lock()
+
+    def page(self, user_id, offset=0, limit=5):
+        """ID заявок на странице и общее число заявок в ленте"""
+        with self._lock:
+            cached = self.feeds.get(user_id)
+        if cached is None or time.monotonic() >= cached[1]:
+            cached = self._build(user_id)
+        ranked = cached[0]
+        return ranked[offset:offset + limit], len(ranked)
+
+    def _build(self, user_id):
+        """Ранжирует заявки клиентов по лучшей оценке среди предложений исполнителя"""
+        offers, clients = get_feed_candidates(user_id)
+        best = {}
+        for client in clients:
+            client_categories = request_categories(client)
+            suitable = [
+                offer for offer in offers
+                if offer.region_id == client.region_id
+                and (not client_categories or client_categories & request_categories(offer))
+            ]
+            if not suitable:
+                continue
+            columns = build_features(client, suitable, work_days=client.work_days or parse_period_days(client.work_duration))
+            score = max(match_scorer.score_candidates(columns))
+            if score > match_scorer.threshold:
+                best[client.id] = score
+
+        # Лучшие первыми, при равной оценке - новее
+        ranked = sorted(best, key=lambda request_id: (-best[request_id], -request_id))
+        entry = (ranked, time.monotonic() + self.ttl)
+        with self._lock:
+            self._forget(user_id)
+            if len(self.feeds) >= 1000:
+                now = time.monotonic()
+                for stale_id in [uid for uid, (_, expires_at) in self.feeds.items() if expires_at <= now]:
+                    self._forget(stale_id)
+            self.feeds[user_id] = entry
+            self.regions[user_id] = {offer.region_id for offer in offers if offer.region_id}
+            for request_id in ranked:
+                self.readers.setdefault(request_id, set()).add(user_id)
+        logger.info(f"Лента заказов пользователя {user_id}: {len(ranked)} заявок из {len(clients)}")
+        return entry
+
+    def _forget(self, user_id):
+        cached = self.feeds.pop(user_id, None)
+        self.regions.pop(user_id, None)
+        if not cached:
+            return
+        for request_id in cached[0]:
+            readers = self.readers.get(request_id)
+            if readers:
+                readers.discard(user_id)
+                if not readers:
+                    del self.readers[request_id]
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._forget(user_id)
+
+    def on_request_created(self, request):
+        if request.request_type == 'contractor':
+            # Новое предложение меняет ленту самого исполнителя
+            self.invalidate_user(request.user_id)
+            return
+        categories = request_categories(request)
+        if not categories:
+            # Заказ без распознанной техники показывается всем исполнителям региона
+            self.invalidate_region(request.region_id)
+            return
+        # Новый заказ попадет в ленты подписанных на регион и технику
+        for user_id in subscription_index.subscribers(request.region_id, categories):
+            self.invalidate_user(user_id)
+
+    def invalidate_region(self, region_id):
+        """Сбрасывает ленты исполнителей с предложениями в регионе"""
+        if not region_id:
+            return
+        with self._lock:
+            for user_id in [uid for uid, regions in self.regions.items() if region_id in regions]:
+                self._forget(user_id)
+
+    def on_request_updated(self, request):
+        """Сроки и описание заявки влияют на оценку - сбрасываем ленты, где она есть, и ленту автора"""
+        self.on_status_changed([(request.id, request.user_id)], request.status)
+
+    def on_status_changed(self, changes, new_status):
+        with self._lock:
+            for request_id, user_id in changes:
+                self._forget(user_id)
+                for reader_id in list(self.readers.get(request_id, ())):
+                    self._forget(reader_id)
+
+    def clear(self, *args):
+        with self._lock:
+            self.feeds = {}
+            self.readers = {}
+            self.regions = {}
+
+# Глобальный экземпляр
+job_feed = JobFeed()
+
+request_events.subscribe(REQUEST_CREATED, job_feed.on_request_created)
+request_events.subscribe(REQUEST_UPDATED, job_feed.on_request_updated)
+request_events.subscribe(REQUESTS_STATUS_CHANGED, job_feed.on_status_changed)
+request_events.subscribe(REQUESTS_BACKFILLED, job_feed.clear)
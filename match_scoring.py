@@ -0,0 +1,134 @@
+"""
+Оценка пар "клиент - исполнитель" для find_matches
+Пара превращается в набор признаков; признаки собираются по столбцам для всех кандидатов, оценка - циклом по кандидатам
+"""
+import json
+import logging
+import math
+import os
+from datetime import datetime
+from config import Config
+from equipment import request_categories, capacity_fits
+from geo_index import haversine_km
+from pricing import estimate_cost
+
+logger = logging.getLogger(__name__)
+
+# Порядок признаков в весах и в train_match_weights.py
+FEATURES = [
+    'distance',         # расстояние / 100 км, 0 - неизвестно
+    'same_region',      # один регион
+    'equipment_match',  # совпала категория техники (или текст, если не распознана)
+    'within_budget',    # работы укладываются в бюджет
+    'price_ratio',      # стоимость / бюджет, не больше 3; 0 - неизвестно
+    'experience',       # стаж / 20 лет, не больше 1
+    'recency',          # возраст заявки исполнителя / 30 дней, не больше 1
+    'accept_rate',      # доля принятых совпадений исполнителя (со сглаживанием)
+]
+
+def accept_rate(accepted, total):
+    """Доля принятых совпадений; без истории - 0.5"""
+    return (accepted + 1) / (total + 2)
+
+def build_features(client, contractors, work_days=None, affordable_ids=None, distances=None,
+                   accept_rates=None, now=None):
+    """Признаки пачки исполнителей: словарь признак -> список значений по кандидатам
+
+    affordable_ids и distances - готовые результаты индексов цен и гео-индекса, если есть.
+    accept_rates - доля принятых совпадений по user_id исполнителя.
+    """
+    now = now or datetime.utcnow()
+    distances = distances or {}
+    accept_rates = accept_rates or {}
+    client_categories = request_categories(client)
+    client_equipment = (client.equipment_type or '').lower()
+    columns = {feature: [] for feature in FEATURES}
+
+    for contractor in contractors:
+        distance = distances.get(contractor.id)
+        if distance is None and client.latitude is not None and contractor.latitude is not None:
+            distance = haversine_km(client.latitude, client.longitude, contractor.latitude, contractor.longitude)
+        columns['distance'].append(distance / 100 if distance is not None else 0.0)
+        columns['same_region'].append(float(bool(client.region_id) and client.region_id == contractor.region_id))
+
+        if client_categories:
+            equipment_match = bool(client_categories & request_categories(contractor)) and capacity_fits(client, contractor)
+        else:
+            # Техника не распознана справочником - сравниваем текст
+            equipment_match = bool(client_equipment and contractor.available_equipment
+                                   and client_equipment in contractor.available_equipment.lower())
+        columns['equipment_match'].append(float(equipment_match))
+
+        cost = estimate_cost(contractor.price_per_hour, work_days) if contractor.price_per_hour else None
+        if affordable_ids is not None:
+            within_budget = contractor.id in affordable_ids
+        else:
+            within_budget = bool(client.budget and cost is not None and client.budget >= cost)
+        columns['within_budget'].append(float(within_budget))
+        columns['price_ratio'].append(min(cost / client.budget, 3.0) if client.budget and cost is not None else 0.0)
+
+        columns['experience'].append(min((contractor.experience_years or 0) / 20, 1.0))
+        age_days = (now - contractor.created_at).total_seconds() / 86400 if contractor.created_at else 0.0
+        columns['recency'].append(min(max(age_days, 0.0) / 30, 1.0))
+        columns['accept_rate'].append(accept_rates.get(contractor.user_id, accept_rate(0, 0)))
+
+    return columns
+
+class MatchScorer:
+    """Интерфейс оценщика: score_candidates(columns) -> список оценок 0-1, пары с оценкой > threshold подходят"""
+    threshold = 0.6
+
+    def score_candidates(self, columns):
+        raise NotImplementedError
+
+class RuleScorer(MatchScorer):
+    """Прежние правила: 0.5 + 0.3 за технику + 0.2 за бюджет"""
+    def score_candidates(self, columns):
+        return [
+            0.5 + 0.3 * equipment + 0.2 * budget
+            for equipment, budget in zip(columns['equipment_match'], columns['within_budget'])
+        ]
+
+class LinearScorer(MatchScorer):
+    """Логистическая регрессия с весами, обученными train_match_weights.py"""
+    def __init__(self, weights, bias=0.0, threshold=0.5):
+        self.weights = weights
+        self.bias = bias
+        self.threshold = threshold
+
+    def score_candidates(self, columns):
+        # Обычный Python без векторных операций: признаки с нулевым весом не участвуют
+        weighted = [(weight, columns[feature]) for feature, weight in self.weights.items() if weight]
+        size = len(next(iter(columns.values()), []))
+        scores = []
+        for i in range(size):
+            logit = self.bias + sum(weight * values[i] for weight, values in weighted)
+            scores.append(1 / (1 + math.exp(-logit)))
+        return scores
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        weights = {feature: float(data['weights'].get(feature, 0.0)) for feature in FEATURES}
+        return cls(weights, float(data.get('bias', 0.0)), float(data.get('threshold', 0.5)))
+
+    def save(self, path, **meta):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'weights': self.weights, 'bias': self.bias, 'threshold': self.threshold, **meta},
+                      f, ensure_ascii=False, indent=2)
+
+def load_scorer(path=None):
+    """Обученные веса, если файл есть, иначе прежние правила"""
+    path = path or Config.MATCH_WEIGHTS_FILE
+    if path and os.path.exists(path):
+        try:
+            scorer = LinearScorer.load(path)
+            logger.info(f"Веса оценки совпадений загружены из {path}")
+            return scorer
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Не удалось загрузить веса оценки совпадений из {path}: {e}")
+    return RuleScorer()
+
+# Глобальный экземпляр
+match_scorer = load_scorer()
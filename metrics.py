@@ -0,0 +1,165 @@
+"""
+Метрики Prometheus: задержки обработчиков, SQL, Google Sheets и Telegram Bot API
+Дочерние серии гистограмм создаются заранее, чтобы на горячем пути был только observe()
+"""
+import time
+import functools
+import threading
+from contextvars import ContextVar
+from prometheus_client import Counter, Histogram, Gauge, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from telegram.request import HTTPXRequest
+
+HANDLER_LATENCY = Histogram(
+    'bot_handler_latency_seconds',
+    'Время обработки апдейта обработчиком бота',
+    ['handler']
+)
+DB_QUERY_LATENCY = Histogram(
+    'bot_db_query_latency_seconds',
+    'Время выполнения SQL-запроса',
+    ['operation'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+SHEETS_LATENCY = Histogram(
+    'bot_sheets_call_latency_seconds',
+    'Время вызова Google Sheets API',
+    ['operation'],
+    buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+TELEGRAM_LATENCY = Histogram(
+    'bot_telegram_request_latency_seconds',
+    'Время исходящего запроса к Telegram Bot API',
+    ['method']
+)
+# Имя обработчика, внутри которого выполняется код (для журнала медленных запросов)
+current_handler = ContextVar('current_handler', default=None)
+
+UPDATE_QUEUE_DEPTH = Gauge('bot_update_queue_depth', 'Апдейты, ожидающие обработки')
+ACTIVE_DRAFTS = Gauge('bot_active_drafts', 'Незавершенные заявки в user_data')
+NOTIFICATIONS = Counter(
+    'bot_notifications_total',
+    'Уведомления исполнителям о новых заявках',
+    ['result']  # sent, duplicate, quiet, failed
+)
+
+FLOOD_UPDATES = Counter(
+    'bot_flood_updates_total',
+    'Входящие апдейты после проверки лимита пользователя',
+    ['result']  # allowed, dropped
+)
+FLOOD_BUCKETS = Gauge('bot_flood_buckets', 'Пользователи с неполным лимитом апдейтов')
+
+VIEW_CACHE = Counter(
+    'bot_view_cache_total',
+    'Обращения к кэшу экранов профиля и "Мои заявки"',
+    ['view', 'result']  # hit, miss
+)
+VIEW_CACHE_BYTES = Gauge('bot_view_cache_bytes', 'Оценка памяти под кэш экранов')
+
+_handler_histograms = {}
+
+def handler_histogram(name):
+    """Возвращает серию HANDLER_LATENCY для обработчика, кэшируя ее"""
+    histogram = _handler_histograms.get(name)
+    if histogram is None:
+        histogram = _handler_histograms.setdefault(name, HANDLER_LATENCY.labels(name))
+    return histogram
+
+def observe_handler(name):
+    """Декоратор для async-обработчика: пишет его длительность в HANDLER_LATENCY"""
+    def decorator(func):
+        histogram = handler_histogram(name)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = current_handler.set(name)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+                current_handler.reset(token)
+        return wrapper
+    return decorator
+
+def callback_route(data, prefixes, routes=()):
+    """Сводит callback_data к маршруту без ID, чтобы не плодить серии метрик
+    
+    Неизвестные данные (в т.ч. поддельные) дают 'unknown' - сами значения остаются только в логах.
+    """
+    for prefix in prefixes:
+        if data.startswith(prefix):
+            return prefix.rstrip('_')
+    return data if data in routes else 'unknown'
+
+_db_operations = {}
+
+def db_histogram(statement):
+    """Возвращает серию DB_QUERY_LATENCY по типу запроса (SELECT, INSERT, ...)"""
+    operation = statement.lstrip()[:6].upper()
+    histogram = _db_operations.get(operation)
+    if histogram is None:
+        histogram = _db_operations.setdefault(operation, DB_QUERY_LATENCY.labels(operation))
+    return histogram
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, замеряющий время каждого метода Bot API"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._histograms = {}
+    
+    async def do_request(self, url, method, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        histogram = self._histograms.get(api_method)
+        if histogram is None:
+            histogram = self._histograms.setdefault(api_method, TELEGRAM_LATENCY.labels(api_method))
+        
+        start = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+def register_application(application):
+    """Подключает gauge-метрики к приложению бота; значения считаются только при сборе"""
+    UPDATE_QUEUE_DEPTH.set_function(lambda: application.update_queue.qsize())
+    ACTIVE_DRAFTS.set_function(
+        lambda: sum(1 for data in list(application.user_data.values()) if data.get('request_active'))
+    )
+
+class StatsCollector:
+    """Отдает счетчики пользователей и заявок из кэшированного снимка StatsService"""
+    def __init__(self, stats_service):
+        self.stats_service = stats_service
+    
+    def collect(self):
+        snapshot = self.stats_service.get_snapshot()
+        
+        users = GaugeMetricFamily('bot_users', 'Пользователи по ролям', labels=['role'])
+        users.add_metric(['client'], snapshot['clients'])
+        users.add_metric(['contractor'], snapshot['contractors'])
+        yield users
+        
+        active = GaugeMetricFamily('bot_active_requests', 'Активные заявки по типам', labels=['request_type'])
+        active.add_metric(['client'], snapshot['client_requests'])
+        active.add_metric(['contractor'], snapshot['contractor_requests'])
+        yield active
+        
+        by_status = GaugeMetricFamily('bot_requests', 'Все заявки по статусам', labels=['status'])
+        for status, total in snapshot['requests_by_status'].items():
+            by_status.add_metric([str(status)], total)
+        yield by_status
+
+_stats_registered = False
+_stats_lock = threading.Lock()
+
+def render_latest(stats_service=None):
+    """Возвращает (тело, content-type) в текстовом формате Prometheus"""
+    global _stats_registered
+    if stats_service is not None and not _stats_registered:
+        with _stats_lock:
+            if not _stats_registered:
+                REGISTRY.register(StatsCollector(stats_service))
+                _stats_registered = True
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, Float, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func, text
 from datetime import datetime
 
 Base = declarative_base()
@@ -17,22 +18,34 @@ class User(Base):
     is_contractor = Column(Boolean, default=False)  # True - исполнитель, False - клиент
     created_at = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
-
-class Request(Base):
-    __tablename__ = 'requests'
+    # Число активных заявок; меняется в одной транзакции с заявками
+    active_requests_count = Column(Integer, nullable=False, default=0, server_default='0')
     
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, nullable=False)
+    requests = relationship('Request', back_populates='user')
+
+class RequestFields:
+    """Поля заявки, общие для рабочей таблицы и архива"""
     request_type = Column(String(50), nullable=False)  # 'client' или 'contractor'
     
     # Основная информация
     title = Column(String(255), nullable=False)
     description = Column(Text)
     location = Column(String(255), nullable=False)
+    # Нормализованная локация (см. gazetteer.py); '' - не удалось распознать
+    region_id = Column(String(8))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    
+    # Категории техники через запятую (см. equipment.py); '' - не распознаны
+    equipment_categories = Column(String(255))
+    equipment_capacity = Column(Float)  # грузоподъемность, т
     
     # Для клиентов
     equipment_type = Column(String(100))  # экскаватор, кран, бульдозер и т.д.
     work_duration = Column(String(50))  # количество дней/часов
+    work_days = Column(Float)  # work_duration в днях (см. pricing.py)
+    work_start = Column(Date)  # период работ (см. availability.py)
+    work_end = Column(Date)
     budget = Column(Float)  # бюджет в гривнах
     
     # Для исполнителей
@@ -41,24 +54,88 @@ class Request(Base):
     price_per_hour = Column(Float)
     
     # Статус
-    status = Column(String(50), default='active')  # active, matched, completed, cancelled
+    status = Column(String(50), default='active')  # active, matched, completed, cancelled, expired
     matched_with = Column(Integer)  # ID сопоставленной заявки
     
     # Предпочтения связи
     contact_preference = Column(String(20), default='message')  # 'message' или 'call'
     
+    # Поиск повторов (см. duplicates.py)
+    fingerprint = Column(String(16))  # хэш пользователя, типа, региона, техники и цены
+    description_simhash = Column(String(16))
+    
     # Метаданные
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     expires_at = Column(DateTime)
 
+class Request(RequestFields, Base):
+    __tablename__ = 'requests'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    
+    # Ключ черновика из RequestSystem: одна заявка на черновик при повторных нажатиях
+    idempotency_key = Column(String(32))
+    
+    user = relationship('User', back_populates='requests')
+    
+    __table_args__ = (
+        Index('ux_requests_idempotency_key', 'idempotency_key', unique=True),
+        # Постраничный вывод "Мои заявки" по ключу (created_at, id)
+        Index('ix_requests_user_created', 'user_id', 'created_at', 'id'),
+        # Админский список всех заявок: без фильтра и с фильтром по статусу/типу
+        Index('ix_requests_created', 'created_at', 'id'),
+        Index('ix_requests_status_type_created', 'status', 'request_type', 'created_at', 'id'),
+        # Поиск просроченных активных заявок
+        Index('ix_requests_status_expires', 'status', 'expires_at'),
+        # Подбор по региону
+        Index('ix_requests_status_type_region', 'status', 'request_type', 'region_id'),
+        # backfill_regions: после дозаполнения индекс пуст, и проверка не сканирует таблицу
+        Index('ix_requests_region_backfill', 'id',
+              postgresql_where=text('region_id IS NULL'), sqlite_where=text('region_id IS NULL')),
+        # backfill_equipment - то же для категорий техники
+        Index('ix_requests_equipment_backfill', 'id',
+              postgresql_where=text('equipment_categories IS NULL'), sqlite_where=text('equipment_categories IS NULL')),
+    )
+
+class RequestArchive(RequestFields, Base):
+    """Завершенные, отмененные и истекшие заявки старше срока хранения"""
+    __tablename__ = 'requests_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # ID из таблицы requests
+    user_id = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, default=func.now())
+    
+    # У user_id нет внешнего ключа - условие соединения задано явно
+    user = relationship('User', primaryjoin='foreign(RequestArchive.user_id) == User.id', viewonly=True)
+    
+    __table_args__ = (
+        Index('ix_requests_archive_user_created', 'user_id', 'created_at', 'id'),
+    )
+
+class ContractorAvailability(Base):
+    """Занятые и свободные периоды техники исполнителя по его заявке"""
+    __tablename__ = 'contractor_availability'
+    
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False)  # busy, available
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+    
+    __table_args__ = (
+        Index('ix_contractor_availability_request', 'request_id', 'start_date'),
+    )
+
 class Match(Base):
     __tablename__ = 'matches'
     
     id = Column(Integer, primary_key=True)
-    client_request_id = Column(Integer, nullable=False)
-    contractor_request_id = Column(Integer, nullable=False)
+    client_request_id = Column(Integer, nullable=False, index=True)
+    contractor_request_id = Column(Integer, nullable=False, index=True)
     match_score = Column(Float)  # оценка совпадения 0-1
-    status = Column(String(50), default='pending')  # pending, accepted, rejected, completed
+    status = Column(String(50), default='pending')  # pending, accepted, rejected, completed, expired, cancelled
     created_at = Column(DateTime, default=func.now())
     notes = Column(Text)  # заметки диспетчера
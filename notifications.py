@@ -0,0 +1,162 @@
+"""
+Уведомления исполнителям о новых заявках клиентов
+Индекс подписок (регион, категория техники) -> исполнители и отправка с ограничением скорости
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+from telegram.error import RetryAfter, Forbidden, BadRequest
+from config import Config
+from contractor_index import ContractorIndex
+from equipment import request_categories
+from metrics import NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+class SubscriptionIndex(ContractorIndex):
+    """(регион, категория) -> {user_id: число активных заявок исполнителя с этим ключом}"""
+    name = 'Индекс подписок исполнителей'
+    columns = ('user_id', 'region_id', 'equipment_categories')
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def subscribers(self, region_id, categories):
+        """user_id исполнителей, подписанных на регион и любую из категорий"""
+        if not region_id or not categories:
+            return set()
+        self.ensure_loaded()
+        with self.lock:
+            found = set()
+            for category in categories:
+                found.update(self.users.get((region_id, category), ()))
+            return found
+
+    def _clear(self):
+        self.users = {}
+        self.keys = {}  # request_id -> (user_id, ключи)
+
+    def _add(self, row):
+        if not row.region_id:
+            return
+        keys = [(row.region_id, category) for category in request_categories(row)]
+        for key in keys:
+            counts = self.users.setdefault(key, {})
+            counts[row.user_id] = counts.get(row.user_id, 0) + 1
+        if keys:
+            self.keys[row.id] = (row.user_id, keys)
+
+    def _discard(self, request_id):
+        user_id, keys = self.keys.pop(request_id, (None, ()))
+        for key in keys:
+            counts = self.users[key]
+            counts[user_id] -= 1
+            if not counts[user_id]:
+                del counts[user_id]
+            if not counts:
+                del self.users[key]
+
+class NotificationSender:
+    """Очередь уведомлений: не больше rate сообщений в секунду, без повторов и с лимитом на пользователя"""
+    def __init__(self, rate=None, per_user_limit=None, per_user_window=3600, dedup_size=10000, sweep_interval=300):
+        self.rate = rate or Config.NOTIFY_RATE_PER_SECOND
+        self.per_user_limit = per_user_limit or Config.NOTIFY_MAX_PER_USER_PER_HOUR
+        self.per_user_window = per_user_window
+        self.dedup_size = dedup_size
+        self.sweep_interval = sweep_interval
+        self.sent_keys = OrderedDict()  # (chat_id, ключ) - уже отправленные
+        self.recent = {}  # chat_id -> deque времени доставленных уведомлений
+        self.pending = Counter()  # chat_id -> уведомления в очереди (тоже занимают лимит)
+        self.next_sweep = time.monotonic() + sweep_interval
+        self.queue = None
+        self.worker = None
+
+    def _allow(self, chat_id, dedup_key):
+        """Проверка повтора и лимита тишины; при успехе место в лимите резервируется до отправки"""
+        if (chat_id, dedup_key) in self.sent_keys:
+            NOTIFICATIONS.labels('duplicate').inc()
+            return False
+
+        now = time.monotonic()
+        if now >= self.next_sweep:
+            self._sweep(now)
+        recent = self.recent.get(chat_id)
+        if recent:
+            while recent and now - recent[0] > self.per_user_window:
+                recent.popleft()
+        if len(recent or ()) + self.pending[chat_id] >= self.per_user_limit:
+            NOTIFICATIONS.labels('quiet').inc()
+            return False
+
+        self.pending[chat_id] += 1
+        self.sent_keys[(chat_id, dedup_key)] = None
+        if len(self.sent_keys) > self.dedup_size:
+            self.sent_keys.popitem(last=False)
+        return True
+
+    def _sweep(self, now):
+        """Удаляет пользователей, у которых все отправки старше окна лимита"""
+        self.recent = {
+            chat_id: recent for chat_id, recent in self.recent.items()
+            if recent and now - recent[-1] <= self.per_user_window
+        }
+        self.next_sweep = now + self.sweep_interval
+
+    def _settle(self, chat_id, delivered):
+        """Снимает резерв; в лимит засчитываются только доставленные уведомления"""
+        self.pending[chat_id] -= 1
+        if self.pending[chat_id] <= 0:
+            del self.pending[chat_id]
+        if delivered:
+            self.recent.setdefault(chat_id, deque()).append(time.monotonic())
+
+    def enqueue(self, bot, chat_id, text, dedup_key, **kwargs):
+        """Ставит уведомление в очередь; False - отброшено как повтор или сверх лимита"""
+        if not self._allow(chat_id, dedup_key):
+            return False
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+        self.queue.put_nowait((bot, chat_id, text, kwargs))
+        return True
+
+    async def _run(self):
+        interval = 1 / self.rate
+        while True:
+            bot, chat_id, text, kwargs = await self.queue.get()
+            delivered = False
+            try:
+                delivered = await self._send(bot, chat_id, text, kwargs)
+            finally:
+                self._settle(chat_id, delivered)
+                self.queue.task_done()
+            await asyncio.sleep(interval)
+
+    async def _send(self, bot, chat_id, text, kwargs):
+        """True - уведомление доставлено"""
+        for _ in range(3):
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                NOTIFICATIONS.labels('sent').inc()
+                return True
+            except RetryAfter as e:
+                # Telegram просит подождать - ждем и повторяем
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                await asyncio.sleep(retry_after)
+            except (Forbidden, BadRequest) as e:
+                # Пользователь заблокировал бота или чат недоступен
+                logger.info(f"Уведомление {chat_id} не доставлено: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Ошибка отправки уведомления {chat_id}: {e}")
+                break
+        NOTIFICATIONS.labels('failed').inc()
+        return False
+
+# Глобальные экземпляры
+subscription_index = SubscriptionIndex()
+subscription_index.subscribe()
+notification_sender = NotificationSender()
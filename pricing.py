@@ -0,0 +1,102 @@
+"""
+Сроки работ и цены исполнителей
+Разбор work_duration в дни и индекс цен для проверки бюджета бинарным поиском
+"""
+import bisect
+import re
+from contractor_index import ContractorIndex
+from equipment import request_categories
+
+WORK_HOURS_PER_DAY = 8
+
+# Единица -> дней; без единицы число считается днями ("На сколько дней нужна техника")
+_DURATION_UNITS = [
+    # Украинские "година/години/годин"; "год" не берем - по-русски это год
+    (re.compile(r'^(час|годин|h$|hour)'), 1 / WORK_HOURS_PER_DAY),
+    (re.compile(r'^(смен|змін|shift)'), 1),
+    (re.compile(r'^(дн|ден|діб|доб|сут|d)'), 1),
+    (re.compile(r'^(недел|нед|тиж|w)'), 7),
+    (re.compile(r'^(месяц|мес|міс|m)'), 30),
+]
+_DURATION_RE = re.compile(r'(\d+(?:[.,]\d+)?)?\s*([^\W\d_]*)')
+_UNIT_STEMS = r'(?=час|годин|смен|змін|дн|ден|доб|діб|сут|недел|нед|тиж|месяц|мес|міс)'
+# "пол дня", "півдня", "полчаса" - половина единицы; "полтора"/"півтора" - полторы
+_HALF_RE = re.compile(r'\b(?:пол|пів)[\s-]*' + _UNIT_STEMS)
+_ONE_AND_HALF_RE = re.compile(r'\b(?:полтора|полторы|півтора|півтори)\s*' + _UNIT_STEMS)
+
+def parse_work_days(text):
+    """Срок работ в днях: "3", "3 дня", "5 часов", "пол дня", "2 недели", "месяц"; None - не распознан"""
+    text = (text or '').lower().strip()
+    text = _HALF_RE.sub('0.5 ', _ONE_AND_HALF_RE.sub('1.5 ', text))
+    for number, unit in _DURATION_RE.findall(text):
+        if not number and not unit:
+            continue
+        factor = 1 if not unit else next((f for pattern, f in _DURATION_UNITS if pattern.match(unit)), None)
+        if factor is None:
+            continue
+        value = float(number.replace(',', '.')) if number else 1.0
+        if value > 0:
+            return value * factor
+    return None
+
+def estimate_cost(price_per_hour, work_days):
+    """Стоимость работ исполнителя; без срока - один рабочий день"""
+    return price_per_hour * WORK_HOURS_PER_DAY * (work_days or 1)
+
+def max_price_per_hour(budget, work_days):
+    """Наибольшая цена за час, при которой работы укладываются в бюджет"""
+    return budget / (WORK_HOURS_PER_DAY * (work_days or 1))
+
+class ContractorPriceIndex(ContractorIndex):
+    """(регион, категория) -> отсортированный список (цена за час, ID заявки)
+    Ключ (None, категория) собирает все регионы - для подбора по радиусу"""
+    name = 'Индекс цен исполнителей'
+    columns = ('region_id', 'equipment_categories', 'price_per_hour')
+
+    def __init__(self):
+        super().__init__()
+        self.prices = {}
+        self.entries = {}  # request_id -> (ключи, цена)
+
+    def affordable(self, categories, max_price, region_id=None):
+        """ID заявок с ценой за час не выше max_price"""
+        self.ensure_loaded()
+        found = set()
+        with self.lock:
+            for category in categories:
+                prices = self.prices.get((region_id, category))
+                if not prices:
+                    continue
+                end = bisect.bisect_right(prices, (max_price, float('inf')))
+                found.update(request_id for _, request_id in prices[:end])
+        return found
+
+    def _clear(self):
+        self.prices = {}
+        self.entries = {}
+
+    def _add(self, row):
+        if row.price_per_hour is None:
+            return
+        keys = []
+        for category in request_categories(row):
+            keys.append((None, category))
+            if row.region_id:
+                keys.append((row.region_id, category))
+        for key in keys:
+            bisect.insort(self.prices.setdefault(key, []), (row.price_per_hour, row.id))
+        self.entries[row.id] = (keys, row.price_per_hour)
+
+    def _discard(self, request_id):
+        keys, price = self.entries.pop(request_id, ((), None))
+        for key in keys:
+            prices = self.prices[key]
+            position = bisect.bisect_left(prices, (price, request_id))
+            if position < len(prices) and prices[position] == (price, request_id):
+                del prices[position]
+            if not prices:
+                del self.prices[key]
+
+# Глобальный экземпляр
+contractor_price_index = ContractorPriceIndex()
+contractor_price_index.subscribe()
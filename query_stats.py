@@ -0,0 +1,131 @@
+"""
+Статистика SQL-запросов по "формам" и журнал медленных запросов
+Формы получаются заменой литералов и списков IN на плейсхолдеры
+"""
+import re
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+from sqlalchemy import event
+from config import Config
+from metrics import current_handler, db_histogram
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement):
+    """Сводит SQL к форме без конкретных значений"""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _SPACES_RE.sub(" ", shape).strip()
+
+class ShapeStats:
+    """Счетчики одной формы запроса; перцентили по последним выполнениям"""
+    __slots__ = ('shape', 'count', 'total', 'max', 'recent')
+    
+    def __init__(self, shape, window):
+        self.shape = shape
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+    
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.recent.append(duration)
+    
+    def to_dict(self):
+        recent = sorted(self.recent)
+        return {
+            'shape': self.shape,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 2),
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+            'p50_ms': round(_percentile(recent, 0.50) * 1000, 3),
+            'p99_ms': round(_percentile(recent, 0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def _caller_name():
+    """Ищет ближайшую функцию проекта в стеке (только для медленных запросов)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(('sqlalchemy', 'query_stats')):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+class QueryStats:
+    def __init__(self, slow_threshold_ms=None, window=500, max_shapes=1000):
+        threshold = Config.SLOW_QUERY_MS if slow_threshold_ms is None else slow_threshold_ms
+        self.slow_threshold = threshold / 1000
+        self.window = window
+        self.max_shapes = max_shapes
+        self.shapes = {}
+        self.total_queries = 0
+        self._lock = threading.Lock()
+    
+    def instrument(self, engine):
+        """Подписывается на события выполнения запросов движка"""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start'].pop()
+        db_histogram(statement).observe(duration)
+        self.record(statement, duration)
+        
+        if duration >= self.slow_threshold:
+            handler = current_handler.get() or _caller_name()
+            logger.warning(
+                f"🐢 Медленный запрос {duration * 1000:.1f} мс в {handler}: {normalize_statement(statement)}"
+            )
+    
+    def record(self, statement, duration):
+        """Учитывает выполнение запроса"""
+        shape = normalize_statement(statement)
+        with self._lock:
+            self.total_queries += 1
+            stats = self.shapes.get(shape)
+            if stats is None:
+                if len(self.shapes) >= self.max_shapes:
+                    return
+                stats = self.shapes[shape] = ShapeStats(shape, self.window)
+            stats.add(duration)
+    
+    def top(self, limit=10, order_by='total_ms'):
+        """Возвращает самые тяжелые формы запросов"""
+        with self._lock:
+            rows = [stats.to_dict() for stats in self.shapes.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+    
+    def reset(self):
+        """Сбрасывает накопленную статистику"""
+        with self._lock:
+            self.shapes.clear()
+            self.total_queries = 0
+
+# Глобальный экземпляр
+query_stats = QueryStats()
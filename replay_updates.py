@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Воспроизведение записанных апдейтов против обработчиков ConstructionBot
+Поддельный Telegram Bot API и поддельный лист Google Sheets, отдельная БД; отчет - пропускная способность,
+p50/p95/p99 времени обработки и число SQL-запросов на апдейт по сценариям
+
+Запись: RECORD_UPDATES_FILE=recorded_updates.jsonl python bot.py
+Запуск:
+  python replay_updates.py recorded_updates.jsonl --speedup 10
+  python replay_updates.py --synthetic 50 --save-baseline replay_baseline.json
+  python replay_updates.py --synthetic 50 --baseline replay_baseline.json   # код 1 при регрессии (для CI)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+# ID админа в записях (update_recorder.REPLAY_ADMIN_ID); config читает окружение при импорте
+REPLAY_ADMIN_ID = 1
+
+BOT_USER = {'id': 999999, 'is_bot': True, 'first_name': 'ReplayBot', 'username': 'replay_bot'}
+
+EQUIPMENT = ['экскаватор', 'автокран 25т', 'самосвал 20т', 'бульдозер', 'JCB 3CX', 'міні навантажувач']
+LOCATIONS = ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро', 'Бровари', 'Запоріжжя']
+DESCRIPTIONS = ['Копати котлован під фундамент', 'Вивезти будівельне сміття', 'Планування ділянки',
+                'Монтаж плит перекриття', 'Траншея під каналізацію']
+
+# Счетчик SQL-запросов текущего апдейта; у каждой задачи asyncio свой контекст
+_update_queries = ContextVar('update_queries', default=None)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных апдейтов бота")
+    parser.add_argument('file', nargs='?', help="JSONL, записанный update_recorder.py")
+    parser.add_argument('--synthetic', type=int, default=0, help="вместо записи - сценарии для N пользователей")
+    parser.add_argument('--write-synthetic', help="сохранить сгенерированные апдейты в JSONL")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--speedup', type=float, default=0,
+                        help="ускорение относительно записи; 0 - последовательно и без пауз")
+    parser.add_argument('--repeat', type=int, default=1, help="сколько раз проиграть запись (с новыми пользователями)")
+    parser.add_argument('--telegram-latency-ms', type=float, default=0, help="задержка ответа поддельного Bot API")
+    parser.add_argument('--sheets-latency-ms', type=float, default=0, help="задержка вызова поддельного Google Sheets")
+    parser.add_argument('--database-url', help="по умолчанию - временная SQLite")
+    parser.add_argument('--flood-control', action='store_true', help="не выключать защиту от флуда")
+    parser.add_argument('--json', help="сохранить отчет в JSON")
+    parser.add_argument('--save-baseline', help="сохранить отчет как базу для сравнения")
+    parser.add_argument('--baseline', help="сравнить с базой; при регрессии код выхода 1")
+    parser.add_argument('--max-regression', type=float, default=0.25, help="допустимый рост p95 (доля)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="рост p95 меньше этого - шум")
+    parser.add_argument('--max-query-regression', type=float, default=0.1,
+                        help="допустимый рост числа SQL-запросов на апдейт (доля)")
+    parser.add_argument('--verbose', action='store_true', help="оставить INFO-логи бота")
+    return parser.parse_args()
+
+def configure_environment(args):
+    """До импорта модулей бота: поддельный токен, своя БД, без Google Sheets и без записи апдейтов"""
+    database_file = None
+    if not args.database_url:
+        handle, database_file = tempfile.mkstemp(prefix='replay_', suffix='.db')
+        os.close(handle)
+        args.database_url = f'sqlite:///{database_file}'
+    os.environ['TELEGRAM_BOT_TOKEN'] = '123456:REPLAY'
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['ADMIN_USER_ID'] = str(REPLAY_ADMIN_ID)
+    os.environ['GOOGLE_SHEETS_CREDENTIALS'] = ''
+    os.environ['GOOGLE_SHEETS_CREDENTIALS_FILE'] = os.devnull
+    os.environ['RECORD_UPDATES_FILE'] = ''
+    return database_file
+
+def make_fake_telegram(latency):
+    from telegram.request import BaseRequest
+
+    class FakeTelegramRequest(BaseRequest):
+        """Bot API без сети: отвечает успехом, считает вызовы методов"""
+        def __init__(self):
+            self.latency = latency
+            self.calls = Counter()
+            self.message_id = 0
+
+        @property
+        def read_timeout(self):
+            return None
+
+        async def initialize(self):
+            pass
+
+        async def shutdown(self):
+            pass
+
+        async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                             connect_timeout=None, pool_timeout=None):
+            api_method = url.rsplit('/', 1)[-1]
+            self.calls[api_method] += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            parameters = request_data.parameters if request_data else {}
+            return 200, json.dumps({'ok': True, 'result': self._result(api_method, parameters)}).encode()
+
+        def _result(self, api_method, parameters):
+            if api_method == 'getMe':
+                return BOT_USER
+            if api_method in ('sendMessage', 'editMessageText', 'editMessageReplyMarkup'):
+                self.message_id += 1
+                try:
+                    chat_id = int(parameters.get('chat_id', 0))
+                except (TypeError, ValueError):
+                    chat_id = 0
+                return {
+                    'message_id': parameters.get('message_id', self.message_id),
+                    'date': int(time.time()),
+                    'chat': {'id': chat_id, 'type': 'private'},
+                    'from': BOT_USER,
+                    'text': parameters.get('text', ''),
+                }
+            return True
+
+    return FakeTelegramRequest()
+
+class FakeWorksheet:
+    """Лист gspread в памяти с теми методами, которые вызывает GoogleSheetsManager"""
+    def __init__(self, latency):
+        self.latency = latency
+        self.rows = [['ID']]
+        self.calls = Counter()
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            # Настоящий gspread блокирует поток так же
+            time.sleep(self.latency)
+
+    def append_row(self, values, *args, **kwargs):
+        self._call('append_row')
+        self.rows.append([str(value) for value in values])
+
+    def find(self, value, *args, **kwargs):
+        self._call('find')
+        for row_number, row in enumerate(self.rows, start=1):
+            if row and row[0] == value:
+                return type('Cell', (), {'row': row_number, 'col': 1, 'value': value})()
+        return None
+
+    def update_cell(self, row, col, value):
+        self._call('update_cell')
+        cells = self.rows[row - 1]
+        cells.extend([''] * (col - len(cells)))
+        cells[col - 1] = str(value)
+
+    def col_values(self, col):
+        self._call('col_values')
+        return [row[col - 1] if len(row) >= col else '' for row in self.rows]
+
+    def update(self, range_name=None, values=None, **kwargs):
+        self._call('update')
+
+    def batch_update(self, updates, *args, **kwargs):
+        self._call('batch_update')
+
+    def get_all_values(self):
+        self._call('get_all_values')
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self, *args, **kwargs):
+        self._call('get_all_records')
+        return []
+
+    def delete_rows(self, start, end=None):
+        self._call('delete_rows')
+        del self.rows[start - 1:(end or start)]
+
+    def row_values(self, row):
+        self._call('row_values')
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def insert_row(self, values, index=1, *args, **kwargs):
+        self._call('insert_row')
+        self.rows.insert(index - 1, [str(value) for value in values])
+
+def synthetic_updates(users, seed=1):
+    """Сценарии клиентов и исполнителей: меню, заполнение заявки, двойное нажатие кнопки связи, лента"""
+    rng = random.Random(seed)
+    events = []
+    for index in range(users):
+        user_id = 10 ** 9 + index
+        offset = rng.uniform(0, users * 0.5)
+        client = index % 2 == 0
+        equipment, location = rng.choice(EQUIPMENT), rng.choice(LOCATIONS)
+        if client:
+            inputs = [equipment, location, rng.choice(DESCRIPTIONS), str(rng.randrange(5, 60) * 1000),
+                      str(rng.randint(1, 10)), '0500000000']
+        else:
+            inputs = [equipment, location, str(rng.randint(1, 20)), str(rng.randrange(4, 30) * 100), '0500000000']
+        steps = [('text', '/start'), ('callback', 'profile'), ('callback', 'my_requests'),
+                 ('callback', 'client_mode' if client else 'contractor_mode')]
+        steps += [('text', value) for value in inputs]
+        steps += [('callback', 'contact_message'), ('callback', 'contact_message'),
+                  ('callback', 'my_requests'), ('callback', 'profile'), ('callback', 'my_requests' if client else 'jobs')]
+        for kind, value in steps:
+            offset += rng.uniform(0.5, 3)
+            events.append((round(offset, 3), user_id, kind, value))
+
+    # Админ смотрит заявки и ищет
+    for offset in range(0, max(users, 1), 10):
+        events.append((float(offset), REPLAY_ADMIN_ID, 'text', '/requests'))
+        events.append((offset + 1.0, REPLAY_ADMIN_ID, 'text', f'/find {rng.choice(EQUIPMENT).split()[0]}'))
+
+    events.sort(key=lambda event: event[0])
+    updates = []
+    for update_id, (offset, user_id, kind, value) in enumerate(events, start=1):
+        user = {'id': user_id, 'is_bot': False, 'first_name': 'User'}
+        chat = {'id': user_id, 'type': 'private', 'first_name': 'User'}
+        message = {'message_id': update_id, 'date': int(offset), 'chat': chat}
+        if kind == 'text':
+            message.update({'from': user, 'text': value})
+            if value.startswith('/'):
+                message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(value.split()[0])}]
+            update = {'update_id': update_id, 'message': message}
+        else:
+            message.update({'from': BOT_USER, 'text': 'menu'})
+            update = {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'from': user, 'chat_instance': str(user_id), 'data': value, 'message': message
+            }}
+        updates.append((offset, update))
+    return updates
+
+def shift_users(data, shift, owner=None):
+    """Копия апдейта с ID пользователей и чатов, сдвинутыми на shift (кроме админа)"""
+    if isinstance(data, list):
+        return [shift_users(item, shift, owner) for item in data]
+    if not isinstance(data, dict):
+        return data
+    result = {}
+    for key, value in data.items():
+        if key == 'id' and owner in ('from', 'chat', 'user') and isinstance(value, int) \
+                and value != REPLAY_ADMIN_ID and value != BOT_USER['id']:
+            result[key] = value + shift if value > 0 else value - shift
+        else:
+            result[key] = shift_users(value, shift, key)
+    return result
+
+def scenario_name(update, callback_prefixes, callback_routes, callback_route):
+    """Сценарий для отчета: команда, маршрут кнопки, текст или inline"""
+    if 'callback_query' in update:
+        return 'callback:' + callback_route(update['callback_query'].get('data') or '', callback_prefixes, callback_routes)
+    message = update.get('message') or update.get('edited_message')
+    if message:
+        text = message.get('text') or ''
+        if text.startswith('/'):
+            return 'command:' + text.split()[0][1:].split('@')[0]
+        return 'text' if text else 'message'
+    if 'inline_query' in update:
+        return 'inline'
+    return 'other'
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))]
+
+def summarize(results, wall_seconds, errors):
+    """results - [(сценарий, секунды, SQL-запросы)]"""
+    groups = {'all': results}
+    for row in results:
+        groups.setdefault(row[0], []).append(row)
+
+    scenarios = {}
+    for name, rows in sorted(groups.items()):
+        latencies = sorted(row[1] for row in rows)
+        scenarios[name] = {
+            'count': len(rows),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3),
+            'queries_per_update': round(sum(row[2] for row in rows) / len(rows), 2),
+            'errors': errors.get(name, 0) if name != 'all' else sum(errors.values()),
+        }
+    return {
+        'updates': len(results),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_per_second': round(len(results) / wall_seconds, 1) if wall_seconds else 0,
+        'scenarios': scenarios,
+    }
+
+def print_report(report, telegram_calls, sheets_calls):
+    print(f"Апдейтов: {report['updates']} за {report['wall_seconds']:.2f} с - "
+          f"{report['throughput_per_second']} апдейтов/с")
+    print(f"{'Сценарий':<32}{'Число':>7}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'max мс':>10}{'SQL':>7}{'Ошибки':>8}")
+    for name, row in report['scenarios'].items():
+        print(f"{name:<32}{row['count']:>7}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+              f"{row['max_ms']:>10.2f}{row['queries_per_update']:>7.1f}{row['errors']:>8}")
+    print(f"Вызовы Bot API: {dict(telegram_calls.most_common())}")
+    print(f"Вызовы Google Sheets: {dict(sheets_calls.most_common())}")
+
+def compare(report, baseline, max_regression, min_delta_ms, max_query_regression):
+    """Список регрессий относительно базы"""
+    failures = []
+    for name, base in baseline['scenarios'].items():
+        current = report['scenarios'].get(name)
+        if current is None:
+            continue
+        latency_limit = max(base['p95_ms'] * (1 + max_regression), base['p95_ms'] + min_delta_ms)
+        if current['p95_ms'] > latency_limit:
+            failures.append(f"{name}: p95 {current['p95_ms']:.2f} мс > {latency_limit:.2f} мс "
+                            f"(база {base['p95_ms']:.2f} мс)")
+        query_limit = base['queries_per_update'] * (1 + max_query_regression) + 0.01
+        if current['queries_per_update'] > query_limit:
+            failures.append(f"{name}: SQL-запросов на апдейт {current['queries_per_update']} > {query_limit:.2f} "
+                            f"(база {base['queries_per_update']})")
+        if current['errors'] > base.get('errors', 0):
+            failures.append(f"{name}: ошибок {current['errors']} (база {base.get('errors', 0)})")
+    return failures
+
+async def replay(application, updates, speedup, repeat, scenario):
+    """Проигрывает апдейты; возвращает ([(сценарий, секунды, SQL-запросы)], секунды всего)"""
+    from telegram import Update
+
+    results = []
+
+    async def run_one(update_dict):
+        counter = [0]
+        token = _update_queries.set(counter)
+        update = Update.de_json(update_dict, application.bot)
+        started = time.perf_counter()
+        try:
+            await application.process_update(update)
+        finally:
+            results.append((scenario(update_dict), time.perf_counter() - started, counter[0]))
+            _update_queries.reset(token)
+
+    started = time.perf_counter()
+    for round_number in range(repeat):
+        # Каждый повтор - новые пользователи, иначе второй проход упрется в их же заявки
+        batch = [(offset, shift_users(data, round_number * 10 ** 8)) if round_number else (offset, data)
+                 for offset, data in updates]
+        if speedup <= 0:
+            for _, data in batch:
+                await run_one(data)
+            continue
+
+        tasks = []
+        round_started = time.perf_counter()
+        first_offset = batch[0][0] if batch else 0
+        for offset, data in batch:
+            delay = (offset - first_offset) / speedup - (time.perf_counter() - round_started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run_one(data)))
+        await asyncio.gather(*tasks)
+    return results, time.perf_counter() - started
+
+async def main_async(args, updates):
+    from sqlalchemy import event
+    from database import create_tables, engine
+    from google_sheets import sheets_manager
+    from bot import ConstructionBot, CALLBACK_PREFIXES, CALLBACK_ROUTES
+    from metrics import callback_route
+    from flood_control import flood_control
+    from notifications import notification_sender
+
+    create_tables()
+
+    def count_query(*_):
+        counter = _update_queries.get()
+        if counter is not None:
+            counter[0] += 1
+    event.listen(engine, 'after_cursor_execute', count_query)
+
+    worksheet = FakeWorksheet(args.sheets_latency_ms / 1000)
+    sheets_manager.sheet = worksheet
+    telegram = make_fake_telegram(args.telegram_latency_ms / 1000)
+    flood_control.enabled = args.flood_control
+
+    bot = ConstructionBot(request=telegram)
+    application = bot.application
+    errors = Counter()
+
+    def scenario(data):
+        return scenario_name(data, CALLBACK_PREFIXES, CALLBACK_ROUTES, callback_route)
+
+    async def on_error(update, context):
+        name = scenario(update.to_dict()) if update is not None else 'other'
+        errors[name] += 1
+        logging.getLogger('replay').error(f"Ошибка в {name}: {context.error}")
+    application.add_error_handler(on_error)
+
+    await application.initialize()
+    try:
+        results, wall_seconds = await replay(application, updates, args.speedup, args.repeat, scenario)
+    finally:
+        if notification_sender.worker is not None:
+            notification_sender.worker.cancel()
+        await application.shutdown()
+    return summarize(results, wall_seconds, errors), telegram.calls, worksheet.calls
+
+def main():
+    args = parse_args()
+    if not args.file and not args.synthetic:
+        print("Укажите файл записи или --synthetic N")
+        return 2
+
+    database_file = configure_environment(args)
+    if args.file:
+        from update_recorder import read_updates
+        updates = read_updates(args.file)
+    else:
+        updates = synthetic_updates(args.synthetic, args.seed)
+    if args.write_synthetic:
+        with open(args.write_synthetic, 'w', encoding='utf-8') as file:
+            for offset, data in updates:
+                file.write(json.dumps({'offset': offset, 'update': data}, ensure_ascii=False) + '\n')
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    try:
+        report, telegram_calls, sheets_calls = asyncio.run(main_async(args, updates))
+    finally:
+        logging.disable(logging.NOTSET)
+        if database_file:
+            os.unlink(database_file)
+
+    print_report(report, telegram_calls, sheets_calls)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        failures = compare(report, baseline, args.max_regression, args.min_delta_ms, args.max_query_regression)
+        if failures:
+            print("❌ Регрессия относительно базы:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("✅ Без регрессий относительно базы")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+События жизненного цикла заявок и пользователей
+Кэши и индексы в памяти подписываются на них, чтобы обновляться без лишних запросов к БД
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# created - создана заявка: callback(request)
+REQUEST_CREATED = 'request_created'
+# updated - у активной заявки изменились поля (объединение с повтором): callback(request)
+REQUEST_UPDATED = 'request_updated'
+# status_changed - у заявок сменился статус: callback([(request_id, user_id), ...], new_status)
+REQUESTS_STATUS_CHANGED = 'requests_status_changed'
+# backfilled - фоновая задача дописала вычисляемые поля старым заявкам: callback(request_ids)
+REQUESTS_BACKFILLED = 'requests_backfilled'
+# availability_changed - исполнитель изменил календарь заявки: callback(request_id)
+AVAILABILITY_CHANGED = 'availability_changed'
+# user_changed - изменились данные пользователя: callback(user_id)
+USER_CHANGED = 'user_changed'
+
+class RequestEvents:
+    """Синхронная шина событий внутри процесса"""
+    def __init__(self):
+        self.listeners = {}
+    
+    def subscribe(self, event, callback):
+        """Подписывает обработчик на событие"""
+        self.listeners.setdefault(event, []).append(callback)
+    
+    def emit(self, event, *args):
+        """Вызывает обработчиков события; ошибка одного не мешает остальным"""
+        for callback in self.listeners.get(event, []):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика события {event}: {e}", exc_info=True)
+
+# Глобальный экземпляр
+request_events = RequestEvents()
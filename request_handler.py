@@ -7,6 +7,7 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from database import get_or_create_user, create_request
+from duplicates import KEEP
 from sync_sheets import sheets_sync
 from config import Config
 from models import User
@@ -164,9 +165,11 @@ class RequestHandler:
             if 'phone' in request_data:
                 del request_data['phone']
             
+            # Старый сценарий без выбора, что делать с повтором
             request = create_request(
                 user_id=user_id,
                 request_type=request_type,
+                on_duplicate=KEEP,
                 title=title,
                 **request_data
             )
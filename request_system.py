@@ -2,9 +2,11 @@
 Система создания заявок на основе связного списка
 Каждый шаг знает только следующий шаг
 """
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 import logging
+import uuid
+from gazetteer import gazetteer
+from ui_assets import CONTACT_KEYBOARD
 
 logger = logging.getLogger(__name__)
 
@@ -93,7 +95,7 @@ class RequestSystem:
         step5 = RequestStep(
             'work_duration',
             'work_duration',
-            'Шаг 5/6: Сроки\n\nНа сколько дней нужна техника:',
+            'Шаг 5/6: Сроки\n\nНа сколько дней нужна техника?\nМожно указать даты: 10.11-15.11 или "с 10.11 на 3 дня"',
             'phone_client'
         )
         
@@ -199,6 +201,8 @@ class RequestSystem:
         context.user_data['request_type'] = request_type
         context.user_data['current_step_id'] = flow.start_step
         context.user_data['request_data'] = {}
+        # Ключ черновика: повторное нажатие кнопки не создаст вторую заявку
+        context.user_data['request_key'] = uuid.uuid4().hex
         
         logger.info(f"Начинаем заявку {request_type}, первый шаг: {flow.start_step}")
         
@@ -236,6 +240,9 @@ class RequestSystem:
         
         # Сохраняем значение
         request_data[current_step.field_name] = value
+        if current_step.field_name == 'location':
+            # Сразу нормализуем локацию в регион, '' - не распознали
+            request_data.update(gazetteer.location_fields(value) or {'region_id': ''})
         context.user_data['request_data'] = request_data
         
         # Переходим к следующему шагу
@@ -279,20 +286,18 @@ class RequestSystem:
         return {"completed": True}
     
     def create_contact_buttons(self):
-        """Создает кнопки для выбора способа связи"""
-        keyboard = [
-            [InlineKeyboardButton("💬 Написать в Telegram", callback_data="contact_message")],
-            [InlineKeyboardButton("📞 Позвонить по телефону", callback_data="contact_call")],
-            [InlineKeyboardButton("❌ Отмена", callback_data="start_menu")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        """Кнопки для выбора способа связи (общие для всех черновиков)"""
+        return CONTACT_KEYBOARD
     
     def clear_context(self, context: ContextTypes.DEFAULT_TYPE):
-        """Полностью очищает контекст заявки"""
+        """Полностью очищает контекст заявки
+        
+        request_key остается до следующей заявки, чтобы узнать повторное нажатие после сохранения.
+        """
         keys_to_remove = [
             'request_active', 'request_type', 'current_step_id', 'request_data',
             'creating_request', 'request_step', 'waiting_for_contact_preference',
-            'current_step'
+            'current_step', 'duplicate_of'
         ]
         for key in keys_to_remove:
             context.user_data.pop(key, None)
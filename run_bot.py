@@ -34,9 +34,8 @@ def main():
         
         # Инициализируем базу данных
         logger.info("🏗️ Инициализация базы данных...")
-        from database import engine, Base
-        from models import User, Request
-        Base.metadata.create_all(bind=engine)
+        from database import create_tables
+        create_tables()
         logger.info("✅ База данных инициализирована")
         
         # Запускаем веб-сервер в отдельном потоке
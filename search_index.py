@@ -0,0 +1,148 @@
+"""
+Поиск по активным заявкам для inline-режима
+Префиксный индекс по словам заголовка, локации и техники плюс синонимы из справочников
+"""
+import bisect
+import re
+from collections import OrderedDict, namedtuple
+from config import Config
+from contractor_index import ContractorIndex
+from equipment import equipment_taxonomy, request_categories
+from gazetteer import gazetteer
+from trigram import TrigramIndex
+
+SearchDoc = namedtuple('SearchDoc', [
+    'id', 'request_type', 'title', 'location', 'equipment', 'budget', 'price_per_hour'
+])
+
+_APOSTROPHES_RE = re.compile(r"['’ʼ`]")
+_NON_WORD_RE = re.compile(r'\W+')
+
+def tokenize(text):
+    """Слова в нижнем регистре, ё -> е, без апострофов"""
+    text = _APOSTROPHES_RE.sub('', (text or '').lower().replace('ё', 'е'))
+    return [token for token in _NON_WORD_RE.split(text) if token]
+
+class RequestSearchIndex(ContractorIndex):
+    """Слово -> ID заявок; отсортированный список слов для поиска по префиксу"""
+    name = 'Поисковый индекс заявок'
+    request_type = None
+    columns = ('request_type', 'title', 'location', 'equipment_type', 'available_equipment',
+               'region_id', 'equipment_categories', 'budget', 'price_per_hour')
+
+    def __init__(self, cache_size=1000):
+        super().__init__()
+        self.cache_size = cache_size
+        self._clear()
+
+    def search(self, query, limit=50):
+        """ID подходящих заявок, новые первыми; все слова запроса должны найтись"""
+        self.ensure_loaded()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self.lock:
+            key = (self.generation, ' '.join(tokens), limit)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                return cached
+
+            found = None
+            # Сначала редкие слова - пересечение быстрее сужается
+            for ids in sorted((self._match_token(token) for token in tokens), key=len):
+                found = ids if found is None else found & ids
+                if not found:
+                    break
+            result = sorted(found, reverse=True)[:limit] if found else []
+
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return result
+
+    def correct(self, query):
+        """Запрос, где слова, которых нет в индексе, заменены на самые похожие; None - исправлять нечего"""
+        self.ensure_loaded()
+        tokens = tokenize(query)
+        corrected = []
+        with self.lock:
+            for token in tokens:
+                position = bisect.bisect_left(self.words, token)
+                if position < len(self.words) and self.words[position].startswith(token):
+                    corrected.append(token)
+                else:
+                    corrected.append(self.word_trigrams.best(token, Config.FUZZY_THRESHOLD) or token)
+        return ' '.join(corrected) if corrected != tokens else None
+
+    def documents(self, request_ids):
+        """Данные заявок для ответа без обращения к БД"""
+        with self.lock:
+            return [self.docs[request_id] for request_id in request_ids if request_id in self.docs]
+
+    def _match_token(self, token):
+        """Заявки со словом, начинающимся на token, или с регионом/техникой, которые token обозначает"""
+        found = set()
+        position = bisect.bisect_left(self.words, token)
+        while position < len(self.words) and self.words[position].startswith(token):
+            found |= self.postings[self.words[position]]
+            position += 1
+
+        # Слова с таким началом нет - вероятно, опечатка: берем похожие слова
+        if not found and len(token) >= 4:
+            for word, _ in self.word_trigrams.similar(token, Config.FUZZY_THRESHOLD):
+                found |= self.postings[word]
+
+        place = gazetteer.resolve(token)
+        if place:
+            found |= self.postings.get(f'region:{place.region_id}', set())
+        for category in equipment_taxonomy.parse(token).categories:
+            found |= self.postings.get(f'category:{category}', set())
+        return found
+
+    def _clear(self):
+        self.words = []  # только обычные слова, по алфавиту
+        self.word_trigrams = TrigramIndex()  # те же слова для поиска с опечатками
+        self.postings = {}
+        self.doc_tokens = {}
+        self.docs = {}
+        self.cache = OrderedDict()
+        self.generation = 0
+
+    def _add(self, row):
+        equipment = row.equipment_type if row.request_type == 'client' else row.available_equipment
+        tokens = set(tokenize(row.title)) | set(tokenize(row.location)) | set(tokenize(equipment))
+        special = {f'category:{category}' for category in request_categories(row)}
+        if row.region_id:
+            special.add(f'region:{row.region_id}')
+
+        for token in tokens | special:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                if token in tokens:
+                    bisect.insort(self.words, token)
+                    self.word_trigrams.add(token)
+            ids.add(row.id)
+        self.doc_tokens[row.id] = tokens | special
+        self.docs[row.id] = SearchDoc(row.id, row.request_type, row.title, row.location, equipment,
+                                      row.budget, row.price_per_hour)
+        self.generation += 1
+
+    def _discard(self, request_id):
+        for token in self.doc_tokens.pop(request_id, ()):
+            ids = self.postings[token]
+            ids.discard(request_id)
+            if not ids:
+                del self.postings[token]
+                position = bisect.bisect_left(self.words, token)
+                if position < len(self.words) and self.words[position] == token:
+                    del self.words[position]
+                    self.word_trigrams.remove(token)
+        if self.docs.pop(request_id, None):
+            self.generation += 1
+
+# Глобальный экземпляр
+request_search_index = RequestSearchIndex()
+request_search_index.subscribe()
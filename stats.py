@@ -0,0 +1,98 @@
+"""
+Сервис счетчиков для /metrics и админ-панели
+Все счетчики считаются одним сгруппированным запросом и кэшируются на короткое время
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, union_all, literal, case, func
+from database import SessionLocal
+from models import User, Request
+from config import Config
+from request_events import request_events, REQUEST_CREATED, REQUEST_UPDATED, REQUESTS_STATUS_CHANGED, USER_CHANGED
+
+logger = logging.getLogger(__name__)
+
+class StatsService:
+    def __init__(self, ttl=None):
+        self.ttl = Config.STATS_CACHE_TTL if ttl is None else ttl
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get_snapshot(self):
+        """Возвращает снимок счетчиков, пересчитывая его не чаще раза в ttl секунд"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._expires_at:
+            return snapshot
+        
+        # Веб-сервер и бот работают в разных потоках - считаем только один раз
+        with self._lock:
+            if self._snapshot is None or time.monotonic() >= self._expires_at:
+                self._snapshot = self._compute()
+                self._expires_at = time.monotonic() + self.ttl
+            return self._snapshot
+    
+    def invalidate(self, *args):
+        """Сбрасывает кэш, следующий запрос пересчитает счетчики"""
+        self._expires_at = 0.0
+    
+    def _compute(self):
+        """Считает пользователей и заявки одним запросом"""
+        users_query = select(
+            literal('users').label('kind'),
+            case((User.is_contractor == True, 'contractor'), else_='client').label('role'),
+            literal('').label('status'),
+            func.count().label('total')
+        ).group_by(User.is_contractor)
+        
+        requests_query = select(
+            literal('requests').label('kind'),
+            Request.request_type.label('role'),
+            Request.status.label('status'),
+            func.count().label('total')
+        ).group_by(Request.request_type, Request.status)
+        
+        db = SessionLocal()
+        try:
+            rows = db.execute(union_all(users_query, requests_query)).all()
+        finally:
+            db.close()
+        
+        snapshot = {
+            'total_users': 0,
+            'clients': 0,
+            'contractors': 0,
+            'active_requests': 0,
+            'client_requests': 0,
+            'contractor_requests': 0,
+            'requests_by_status': {},
+        }
+        for kind, role, status, total in rows:
+            if kind == 'users':
+                snapshot['total_users'] += total
+                snapshot['contractors' if role == 'contractor' else 'clients'] += total
+                continue
+            
+            by_status = snapshot['requests_by_status']
+            by_status[status] = by_status.get(status, 0) + total
+            if status == 'active':
+                snapshot['active_requests'] += total
+                if role == 'client':
+                    snapshot['client_requests'] += total
+                elif role == 'contractor':
+                    snapshot['contractor_requests'] += total
+        
+        snapshot['computed_at'] = datetime.now().isoformat()
+        logger.debug(f"Статистика пересчитана: {snapshot}")
+        return snapshot
+
+# Глобальный экземпляр
+stats_service = StatsService()
+
+# Любое изменение заявок или пользователей делает снимок устаревшим
+request_events.subscribe(REQUEST_CREATED, stats_service.invalidate)
+request_events.subscribe(REQUEST_UPDATED, stats_service.invalidate)
+request_events.subscribe(REQUESTS_STATUS_CHANGED, stats_service.invalidate)
+request_events.subscribe(USER_CHANGED, stats_service.invalidate)
@@ -4,8 +4,10 @@
 """
 
 import logging
-from database import SessionLocal, Request, User
+from sqlalchemy.orm import joinedload
+from database import SessionLocal, Request
 from google_sheets import sheets_manager
+from metrics import SHEETS_LATENCY
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
@@ -20,8 +22,10 @@ class SheetsSync:
         try:
             db = SessionLocal()
             try:
-                # Получаем все заявки из БД
-                requests = db.query(Request).order_by(Request.created_at.desc()).all()
+                # Получаем все заявки из БД вместе с пользователями одним запросом
+                requests = db.query(Request).options(
+                    joinedload(Request.user)
+                ).order_by(Request.created_at.desc()).all()
                 logger.info(f"📋 Найдено {len(requests)} заявок в БД")
                 
                 # Очищаем Google Sheets (кроме заголовков)
@@ -29,7 +33,7 @@ class SheetsSync:
                 
                 # Добавляем все заявки в Google Sheets
                 for request in requests:
-                    user = db.query(User).filter(User.id == request.user_id).first()
+                    user = request.user
                     if user:
                         success = self.sheets_manager.add_request(request, user)
                         if success:
@@ -55,11 +59,13 @@ class SheetsSync:
                 return False
             
             # Получаем все данные
-            all_values = self.sheets_manager.sheet.get_all_values()
+            with SHEETS_LATENCY.labels('get_all_values').time():
+                all_values = self.sheets_manager.sheet.get_all_values()
             
             if len(all_values) > 1:  # Если есть данные кроме заголовков
                 # Удаляем все строки кроме первой (заголовки)
-                self.sheets_manager.sheet.delete_rows(2, len(all_values))
+                with SHEETS_LATENCY.labels('delete_rows').time():
+                    self.sheets_manager.sheet.delete_rows(2, len(all_values))
                 logger.info("🗑️ Данные в Google Sheets очищены")
             
             return True
@@ -76,6 +82,14 @@ class SheetsSync:
             logger.error(f"❌ Ошибка добавления заявки в Google Sheets: {e}")
             return False
     
+    def update_request_row_in_sheets(self, request, user):
+        """Перезаписывает строку заявки в Google Sheets"""
+        try:
+            return self.sheets_manager.update_request(request, user)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления заявки в Google Sheets: {e}")
+            return False
+    
     def update_request_in_sheets(self, request_id, new_status):
         """Обновляет статус заявки в Google Sheets"""
         try:
@@ -84,6 +98,14 @@ class SheetsSync:
             logger.error(f"❌ Ошибка обновления заявки в Google Sheets: {e}")
             return False
 
+    def update_requests_in_sheets(self, request_ids, new_status):
+        """Обновляет статус нескольких заявок в Google Sheets одним пакетом"""
+        try:
+            return self.sheets_manager.update_requests_status(request_ids, new_status)
+        except Exception as e:
+            logger.error(f"❌ Ошибка массового обновления заявок в Google Sheets: {e}")
+            return False
+
 # Глобальный экземпляр для использования в боте
 sheets_sync = SheetsSync()
 
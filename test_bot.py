@@ -83,6 +83,62 @@ def test_telegram_bot():
         print(f"❌ Ошибка создания бота: {e}")
         return False
 
+def test_gazetteer():
+    """Тестирует распознавание локаций"""
+    print("🗺️ Проверка справочника локаций...")
+    
+    from gazetteer import gazetteer
+    
+    cases = {
+        "Київ": 'UA-30', "Kyiv": 'UA-30',
+        "Київ обл.": 'UA-32', "Київ область": 'UA-32', "Kyiv obl.": 'UA-32', "Киев обл.": 'UA-32',
+        "Бровари, Київська обл.": 'UA-32', "Харків обл.": 'UA-63',
+    }
+    for text, region_id in cases.items():
+        place = gazetteer.resolve(text)
+        if not place or place.region_id != region_id:
+            print(f"❌ '{text}': {place.region_id if place else None} вместо {region_id}")
+            return False
+    
+    print("✅ Локации распознаются корректно")
+    return True
+
+def test_work_duration():
+    """Тестирует разбор срока работ в днях"""
+    print("⏱️ Проверка разбора срока работ...")
+    
+    from pricing import parse_work_days
+    
+    cases = {"3 дня": 3, "5 часов": 0.625, "4 години": 0.5, "пол дня": 0.5, "півдня": 0.5, "1 год": None}
+    for text, days in cases.items():
+        if parse_work_days(text) != days:
+            print(f"❌ '{text}': {parse_work_days(text)} вместо {days}")
+            return False
+    
+    print("✅ Срок работ разбирается корректно")
+    return True
+
+def test_work_period():
+    """Тестирует разбор срока и периода работ"""
+    print("📅 Проверка разбора периода работ...")
+    
+    from datetime import date
+    from availability import parse_work_period, parse_period_days
+    
+    today = date(2026, 11, 1)
+    cases = [
+        ("10.11-15.11", (date(2026, 11, 10), date(2026, 11, 15)), 6),
+        ("с 10.11 на 3 дня", (date(2026, 11, 10), date(2026, 11, 12)), 3),
+        ("3 дня", (today, date(2026, 11, 3)), 3),
+    ]
+    for text, period, days in cases:
+        if parse_work_period(text, today) != period or parse_period_days(text, today) != days:
+            print(f"❌ '{text}': период {parse_work_period(text, today)}, дней {parse_period_days(text, today)}")
+            return False
+    
+    print("✅ Период и срок работ разбираются корректно")
+    return True
+
 def main():
     """Основная функция тестирования"""
     print("🧪 Тестирование системы диспетчеризации строительной техники\n")
@@ -91,7 +147,10 @@ def main():
         ("Конфигурация", test_config),
         ("База данных", test_database),
         ("Google Sheets", test_google_sheets),
-        ("Telegram бот", test_telegram_bot)
+        ("Telegram бот", test_telegram_bot),
+        ("Локации", test_gazetteer),
+        ("Срок работ", test_work_duration),
+        ("Период работ", test_work_period)
     ]
     
     results = []
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Обучение весов оценки совпадений по истории Match (accepted / rejected)
+Запуск: python train_match_weights.py [файл весов] [--epochs N] [--l2 X]
+Бот подхватывает веса из MATCH_WEIGHTS_FILE при запуске.
+"""
+import argparse
+import logging
+import math
+import random
+from collections import Counter
+from datetime import datetime
+from config import Config
+from database import SessionLocal
+from models import Request, RequestArchive, Match
+from match_scoring import FEATURES, LinearScorer, build_features, accept_rate
+from availability import parse_period_days
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+def load_samples():
+    """Признаки и исходы всех принятых и отклоненных совпадений"""
+    db = SessionLocal()
+    try:
+        matches = db.query(Match).filter(Match.status.in_(('accepted', 'rejected'))).order_by(Match.id).all()
+        request_ids = {m.client_request_id for m in matches} | {m.contractor_request_id for m in matches}
+
+        # Заявки могли уйти в архив
+        requests = {}
+        for model in (Request, RequestArchive):
+            for request in db.query(model).filter(model.id.in_(request_ids)).all():
+                requests[request.id] = request
+    finally:
+        db.close()
+
+    # История исполнителя без самого совпадения, иначе признак подсказывает ответ
+    totals, accepted = Counter(), Counter()
+    for match in matches:
+        contractor = requests.get(match.contractor_request_id)
+        if contractor:
+            totals[contractor.user_id] += 1
+            accepted[contractor.user_id] += match.status == 'accepted'
+
+    rows, labels = [], []
+    for match in matches:
+        client = requests.get(match.client_request_id)
+        contractor = requests.get(match.contractor_request_id)
+        if not client or not contractor:
+            continue
+
+        label = 1 if match.status == 'accepted' else 0
+        user_id = contractor.user_id
+        columns = build_features(
+            client, [contractor],
+            work_days=client.work_days or parse_period_days(client.work_duration),
+            accept_rates={user_id: accept_rate(accepted[user_id] - label, totals[user_id] - 1)},
+            now=match.created_at or datetime.utcnow()
+        )
+        rows.append([columns[feature][0] for feature in FEATURES])
+        labels.append(label)
+    return rows, labels
+
+def train(rows, labels, epochs=500, learning_rate=0.5, l2=0.01):
+    """Логистическая регрессия градиентным спуском по всей выборке"""
+    weights = [0.0] * len(FEATURES)
+    positive = sum(labels) / len(labels)
+    bias = math.log(positive / (1 - positive)) if 0 < positive < 1 else 0.0
+
+    for _ in range(epochs):
+        grad_w = [0.0] * len(FEATURES)
+        grad_b = 0.0
+        for row, label in zip(rows, labels):
+            logit = bias + sum(w * x for w, x in zip(weights, row))
+            error = 1 / (1 + math.exp(-logit)) - label
+            grad_b += error
+            for i, x in enumerate(row):
+                grad_w[i] += error * x
+        n = len(rows)
+        bias -= learning_rate * grad_b / n
+        weights = [w - learning_rate * (g / n + l2 * w) for w, g in zip(weights, grad_w)]
+    return weights, bias
+
+def log_loss(scorer, rows, labels):
+    columns = {feature: [row[i] for row in rows] for i, feature in enumerate(FEATURES)}
+    scores = scorer.score_candidates(columns)
+    eps = 1e-9
+    loss = -sum(
+        math.log(max(score, eps)) if label else math.log(max(1 - score, eps))
+        for score, label in zip(scores, labels)
+    ) / len(labels)
+    accuracy = sum((score > scorer.threshold) == bool(label) for score, label in zip(scores, labels)) / len(labels)
+    return loss, accuracy
+
+def main():
+    parser = argparse.ArgumentParser(description="Обучение весов оценки совпадений")
+    parser.add_argument('output', nargs='?', default=Config.MATCH_WEIGHTS_FILE)
+    parser.add_argument('--epochs', type=int, default=500)
+    parser.add_argument('--l2', type=float, default=0.01)
+    parser.add_argument('--min-samples', type=int, default=50)
+    args = parser.parse_args()
+
+    rows, labels = load_samples()
+    if len(rows) < args.min_samples or len(set(labels)) < 2:
+        logger.error(f"Мало данных: {len(rows)} совпадений с исходом, нужно от {args.min_samples} и оба исхода")
+        return 1
+
+    # Отложенная выборка для проверки
+    order = list(range(len(rows)))
+    random.Random(42).shuffle(order)
+    split = max(1, len(order) // 5)
+    test, train_part = order[:split], order[split:]
+
+    weights, bias = train([rows[i] for i in train_part], [labels[i] for i in train_part], args.epochs, l2=args.l2)
+    scorer = LinearScorer(dict(zip(FEATURES, weights)), bias)
+    loss, accuracy = log_loss(scorer, [rows[i] for i in test], [labels[i] for i in test])
+
+    scorer.save(args.output, samples=len(rows), test_log_loss=round(loss, 4), test_accuracy=round(accuracy, 4),
+                trained_at=datetime.utcnow().isoformat())
+    logger.info(f"Совпадений: {len(rows)}, log loss: {loss:.4f}, точность: {accuracy:.2%}")
+    for feature, weight in zip(FEATURES, weights):
+        logger.info(f"  {feature:16} {weight:+.3f}")
+    logger.info(f"Веса сохранены в {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
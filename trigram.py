@@ -0,0 +1,100 @@
+"""
+Нечеткое сравнение слов по триграммам (как pg_trgm)
+"ескаватор" находит "экскаватор", "Днiпро" - "Дніпро"; индекс не перебирает весь словарь
+"""
+import threading
+from sqlalchemy import event, text
+
+def trigrams(word):
+    """Триграммы слова с отступами: "кран" -> {"  к", " кр", "кра", "ран", "ан "}"""
+    padded = f"  {word.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(a, b):
+    """Доля общих триграмм, 0-1"""
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta or tb else 0.0
+
+class TrigramIndex:
+    """Словарь слов с инвертированным индексом триграмма -> слова"""
+    def __init__(self, words=()):
+        self.postings = {}
+        self.sizes = {}  # слово -> число его триграмм
+        self._lock = threading.Lock()
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, word):
+        with self._lock:
+            if word in self.sizes:
+                return
+            grams = trigrams(word)
+            self.sizes[word] = len(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(word)
+
+    def remove(self, word):
+        with self._lock:
+            if self.sizes.pop(word, None) is None:
+                return
+            for gram in trigrams(word):
+                words = self.postings[gram]
+                words.discard(word)
+                if not words:
+                    del self.postings[gram]
+
+    def similar(self, word, threshold=0.4, limit=5):
+        """Похожие слова словаря: список (слово, сходство), самые похожие первыми"""
+        grams = trigrams(word)
+        common = {}
+        with self._lock:
+            # Считаем общие триграммы только у слов, где есть хотя бы одна общая
+            for gram in grams:
+                for candidate in self.postings.get(gram, ()):
+                    common[candidate] = common.get(candidate, 0) + 1
+            scored = [
+                (candidate, shared / (len(grams) + self.sizes[candidate] - shared))
+                for candidate, shared in common.items()
+            ]
+        scored = [item for item in scored if item[1] >= threshold]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def best(self, word, threshold=0.4):
+        """Самое похожее слово или None"""
+        found = self.similar(word, threshold, limit=1)
+        return found[0][0] if found else None
+
+# Столбцы, по которым PostgreSQL ищет похожие значения через pg_trgm (оператор %, см. _location_filter)
+TRIGRAM_COLUMNS = ('location',)
+# Индексы, которые ни один запрос не читал - удаляются, чтобы не замедлять запись
+_UNUSED_TRIGRAM_COLUMNS = ('equipment_type', 'available_equipment')
+
+def setup_trigram(engine):
+    """На PostgreSQL включает pg_trgm и GIN-индексы для нечеткого поиска; на SQLite индекс строится в памяти"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for column in TRIGRAM_COLUMNS:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_requests_{column}_trgm ON requests USING GIN ({column} gin_trgm_ops)"
+            ))
+        for column in _UNUSED_TRIGRAM_COLUMNS:
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_requests_{column}_trgm"))
+
+def set_similarity_threshold(engine, threshold):
+    """Порог оператора % для каждого соединения PostgreSQL (по умолчанию в pg_trgm - 0.3)"""
+    if engine.dialect.name != 'postgresql':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_threshold(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET pg_trgm.similarity_threshold = {float(threshold)}")
+        finally:
+            cursor.close()
@@ -0,0 +1,102 @@
+"""
+Клавиатуры и шаблоны сообщений меню
+Неизменяемые клавиатуры создаются один раз при импорте; в шаблоны подставляются только переменные поля
+"""
+from functools import lru_cache
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+def _markup(*rows):
+    """InlineKeyboardMarkup из строк кнопок (текст, callback_data)"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text, callback_data=data) for text, data in row]
+        for row in rows
+    ])
+
+# Кнопки, которые добавляются к динамическим клавиатурам
+MAIN_MENU_BUTTON = InlineKeyboardButton("🏠 Главное меню", callback_data="start_menu")
+CREATE_REQUEST_BUTTON = InlineKeyboardButton("➕ Создать заявку", callback_data="start_menu")
+MY_REQUESTS_FOOTER = ((CREATE_REQUEST_BUTTON,), (MAIN_MENU_BUTTON,))
+
+START_KEYBOARD = _markup(
+    [("🔍 Ищу технику (Клиент)", "client_mode")],
+    [("🚛 Предлагаю технику (Исполнитель)", "contractor_mode")],
+    [("👤 Мой профиль", "profile")],
+    [("📋 Мои заявки", "my_requests")],
+    [("📰 Лента заказов", "jobs")],
+)
+PROFILE_KEYBOARD = _markup(
+    [("📞 Указать телефон", "set_phone")],
+    [("🔄 Переключить режим", "toggle_mode")],
+    [("🏠 Главное меню", "start_menu")],
+)
+CONTACT_KEYBOARD = _markup(
+    [("💬 Написать в Telegram", "contact_message")],
+    [("📞 Позвонить по телефону", "contact_call")],
+    [("❌ Отмена", "start_menu")],
+)
+REQUEST_CREATED_KEYBOARD = _markup(
+    [("📋 Мои заявки", "my_requests")],
+    [("➕ Создать еще заявку", "start_menu")],
+    [("🏠 Главное меню", "start_menu")],
+)
+ALREADY_SUBMITTED_KEYBOARD = _markup(
+    [("📋 Мои заявки", "my_requests")],
+    [("🏠 Главное меню", "start_menu")],
+)
+DUPLICATE_KEYBOARD = _markup(
+    [("🔄 Обновить старую", "duplicate_merge")],
+    [("♻️ Заменить старую новой", "duplicate_replace")],
+    [("➕ Оставить обе", "duplicate_keep")],
+    [("🏠 Главное меню", "start_menu")],
+)
+
+@lru_cache(maxsize=4096)
+def cancel_request_button(request_id):
+    """Кнопка отмены заявки; одна на заявку, пока она часто показывается"""
+    return InlineKeyboardButton(f"❌ Отменить #{request_id}", callback_data=f"cancel_request_{request_id}")
+
+WELCOME_TEXT = """🏗️ Добро пожаловать в бот диспетчеризации строительной техники!
+
+Привет, {first_name}!
+
+Этот бот поможет вам:
+• Найти строительную технику для ваших проектов
+• Найти клиентов для вашей техники
+• Связаться с подходящими партнерами
+
+Выберите, что вас интересует:"""
+
+PROFILE_TEXT = """👤 Ваш профиль:
+
+🆔 ID: {telegram_id}
+👤 Имя: {first_name} {last_name}
+📱 Username: @{username}
+📞 Телефон: {phone}
+🏗️ Режим: {mode}
+📅 Регистрация: {registered}"""
+
+MY_REQUESTS_EMPTY_TEXT = """📋 Ваши заявки:
+
+У вас пока нет активных заявок.
+
+Создайте первую заявку, чтобы начать поиск партнеров!"""
+
+MY_REQUESTS_HEADER = "📋 Ваши заявки:\n\n"
+MY_REQUESTS_ITEM = "{status_emoji} {type_emoji} ID: {id}\n   📍 {location}\n   📅 {created}\n   📊 Статус: {status}\n\n"
+
+REQUEST_CREATED_TEXT = """✅ Заявка {action}!
+
+🆔 ID заявки: {id}
+📋 Тип: {type_name}
+📍 Локация: {location}
+📅 Создана: {created}
+
+Ваша заявка добавлена в систему и будет рассмотрена диспетчером.
+Вы получите уведомления о подходящих совпадениях!"""
+
+ALREADY_SUBMITTED_TEXT = "✅ Заявка уже создана.\n\n🆔 ID заявки: {id}\n📍 Локация: {location}"
+
+DUPLICATE_TEXT = (
+    "⚠️ У вас уже есть такая же активная заявка (ID: {id}).\n\n"
+    "Обновить в ней описание и срок, заменить ее новой или оставить обе?"
+)
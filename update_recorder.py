@@ -0,0 +1,110 @@
+"""
+Запись входящих апдейтов в JSONL для воспроизведения нагрузки (см. replay_updates.py)
+ID пользователей и чатов заменяются псевдонимами, имена и телефоны - заглушками
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import time
+from telegram import Update
+from telegram.ext import ContextTypes
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# В записи админ всегда получает этот ID - при воспроизведении он же ADMIN_USER_ID
+REPLAY_ADMIN_ID = 1
+
+_PHONE_RE = re.compile(r'\+?\d[\d\s()-]{8,}\d')
+_DIGIT_RE = re.compile(r'\d')
+# Объекты, у которых 'id' - ID пользователя или чата
+_ID_OWNERS = ('from', 'chat', 'user', 'sender_chat', 'forward_from', 'via_bot')
+
+class UpdateAnonymizer:
+    """Стабильные в пределах записи псевдонимы вместо ID; имена, username и телефоны удаляются"""
+    def __init__(self, salt=None, admin_id=None):
+        self.salt = salt or os.urandom(16)
+        self.admin_id = Config.ADMIN_USER_ID if admin_id is None else admin_id
+
+    def pseudonym(self, value):
+        if value == self.admin_id:
+            return REPLAY_ADMIN_ID
+        digest = hmac.new(self.salt, str(value).encode(), hashlib.sha256).digest()
+        # Групповые чаты в Telegram отрицательные - знак сохраняем
+        pseudo = 10 ** 9 + int.from_bytes(digest[:4], 'big')
+        return -pseudo if value < 0 else pseudo
+
+    def anonymize(self, data, owner=None):
+        if isinstance(data, list):
+            return [self.anonymize(item, owner) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for key, value in data.items():
+            if key == 'id' and owner in _ID_OWNERS and isinstance(value, int):
+                value = self.pseudonym(value)
+            elif key == 'user_id' and isinstance(value, int):
+                value = self.pseudonym(value)
+            elif key in ('first_name', 'title'):
+                value = 'User'
+            elif key in ('last_name', 'username', 'bio'):
+                continue
+            elif key == 'phone_number':
+                value = '+380000000000'
+            elif key in ('text', 'caption', 'query') and isinstance(value, str):
+                # Длину и формат номера сохраняем - от них зависит проверка телефона
+                value = _PHONE_RE.sub(lambda match: _DIGIT_RE.sub('0', match.group()), value)
+            else:
+                value = self.anonymize(value, key)
+            result[key] = value
+        return result
+
+class UpdateRecorder:
+    """Пишет апдейты в JSONL: {"offset": секунды от начала записи, "update": ...}"""
+    def __init__(self, path, anonymizer=None):
+        self.path = path
+        self.anonymizer = anonymizer or UpdateAnonymizer()
+        self.started = time.monotonic()
+        self.file = None
+        self.recorded = 0
+
+    def record(self, update_dict):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            logger.info(f"Запись апдейтов в {self.path}")
+        line = {
+            'offset': round(time.monotonic() - self.started, 3),
+            'update': self.anonymizer.anonymize(update_dict),
+        }
+        self.file.write(json.dumps(line, ensure_ascii=False) + '\n')
+        self.recorded += 1
+
+    async def handle_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик первой группы: записывает апдейт и пропускает его дальше"""
+        try:
+            self.record(update.to_dict())
+        except Exception as e:
+            logger.error(f"Не удалось записать апдейт: {e}")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def read_updates(path):
+    """Записанные апдейты: список (offset, словарь апдейта) по возрастанию offset"""
+    updates = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                entry = json.loads(line)
+                updates.append((entry.get('offset', 0), entry['update']))
+    updates.sort(key=lambda item: item[0])
+    return updates
+
+# Глобальный экземпляр; None - запись выключена
+update_recorder = UpdateRecorder(Config.RECORD_UPDATES_FILE) if Config.RECORD_UPDATES_FILE else None
@@ -0,0 +1,115 @@
+"""
+Кэш готовых экранов "Мой профиль" и "Мои заявки"
+Текст и клавиатура хранятся по telegram_id и сбрасываются событиями об изменении пользователя и его заявок
+"""
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from metrics import VIEW_CACHE, VIEW_CACHE_BYTES
+from request_events import request_events, REQUEST_CREATED, REQUEST_UPDATED, REQUESTS_STATUS_CHANGED, USER_CHANGED
+
+# Примерный расход памяти на запись и на кнопку сверх длины строк
+_ENTRY_OVERHEAD = 200
+_BUTTON_OVERHEAD = 150
+
+def view_size(text, reply_markup):
+    """Оценка памяти под экран в байтах"""
+    size = _ENTRY_OVERHEAD + len(text.encode())
+    if reply_markup is not None:
+        for row in reply_markup.inline_keyboard:
+            for button in row:
+                size += _BUTTON_OVERHEAD + len(button.text.encode()) + len(button.callback_data or '')
+    return size
+
+class ViewCache:
+    """LRU (telegram_id, экран, параметры) -> (текст, клавиатура) с ограничением по памяти"""
+    def __init__(self, max_bytes=None, ttl=None):
+        self.max_bytes = Config.VIEW_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = Config.VIEW_CACHE_TTL if ttl is None else ttl
+        self.entries = OrderedDict()  # ключ -> (текст, клавиатура, размер, момент устаревания)
+        self.keys_by_user = {}  # telegram_id -> ключи его экранов
+        self.telegram_ids = {}  # ID пользователя в БД -> telegram_id (события приходят с ID из БД)
+        self.user_ids = {}  # обратное соответствие, чтобы убрать запись вместе с последним экраном
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+
+    def get(self, telegram_id, view, *params):
+        """(текст, клавиатура) или None"""
+        key = (telegram_id, view, params)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() < entry[3]:
+                self.entries.move_to_end(key)
+                self._counter(self._hits, view, 'hit').inc()
+                return entry[0], entry[1]
+            if entry is not None:
+                self._remove(key)
+        self._counter(self._misses, view, 'miss').inc()
+        return None
+
+    def put(self, telegram_id, user_id, view, params, text, reply_markup):
+        """Сохраняет экран; вызывать до первого await после чтения из БД, чтобы не пропустить сброс"""
+        key = (telegram_id, view, tuple(params))
+        size = view_size(text, reply_markup)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (text, reply_markup, size, time.monotonic() + self.ttl)
+            self.keys_by_user.setdefault(telegram_id, set()).add(key)
+            self.telegram_ids[user_id] = telegram_id
+            self.user_ids[telegram_id] = user_id
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        size = self.entries.pop(key)[2]
+        self.total_bytes -= size
+        keys = self.keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[key[0]]
+                self.telegram_ids.pop(self.user_ids.pop(key[0], None), None)
+
+    def _counter(self, cache, view, result):
+        counter = cache.get(view)
+        if counter is None:
+            counter = cache.setdefault(view, VIEW_CACHE.labels(view, result))
+        return counter
+
+    def invalidate_user(self, user_id):
+        """Сбрасывает все экраны пользователя по его ID в БД"""
+        with self._lock:
+            telegram_id = self.telegram_ids.get(user_id)
+            for key in list(self.keys_by_user.get(telegram_id, ())):
+                self._remove(key)
+
+    def on_request_created(self, request):
+        self.invalidate_user(request.user_id)
+
+    def on_status_changed(self, changes, new_status):
+        for user_id in {user_id for _, user_id in changes}:
+            self.invalidate_user(user_id)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+            self.telegram_ids.clear()
+            self.user_ids.clear()
+            self.total_bytes = 0
+
+# Глобальный экземпляр
+view_cache = ViewCache()
+VIEW_CACHE_BYTES.set_function(lambda: view_cache.total_bytes)
+
+request_events.subscribe(USER_CHANGED, view_cache.invalidate_user)
+request_events.subscribe(REQUEST_CREATED, view_cache.on_request_created)
+request_events.subscribe(REQUEST_UPDATED, view_cache.on_request_created)
+request_events.subscribe(REQUESTS_STATUS_CHANGED, view_cache.on_status_changed)
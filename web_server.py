@@ -3,8 +3,8 @@
 Простой веб-сервер для health check и мониторинга
 """
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 import os
 from datetime import datetime
@@ -54,31 +54,29 @@ async def status():
 
 @app.get("/metrics")
 async def metrics():
-    """Метрики для мониторинга"""
+    """Метрики в формате Prometheus"""
+    from stats import stats_service
+    from metrics import render_latest
+    
+    body, content_type = render_latest(stats_service)
+    return Response(content=body, media_type=content_type)
+
+@app.get("/stats")
+async def stats():
+    """Счетчики пользователей и заявок в JSON"""
     try:
-        from database import SessionLocal, User, Request
-        
-        db = SessionLocal()
-        
-        # Подсчитываем пользователей и заявки
-        total_users = db.query(User).count()
-        active_requests = db.query(Request).filter(Request.status == 'active').count()
-        client_requests = db.query(Request).filter(
-            Request.request_type == 'client',
-            Request.status == 'active'
-        ).count()
-        contractor_requests = db.query(Request).filter(
-            Request.request_type == 'contractor',
-            Request.status == 'active'
-        ).count()
+        from stats import stats_service
         
-        db.close()
+        # Снимок кэшируется, поэтому частый опрос не нагружает БД
+        snapshot = stats_service.get_snapshot()
         
         return JSONResponse({
-            "total_users": total_users,
-            "active_requests": active_requests,
-            "client_requests": client_requests,
-            "contractor_requests": contractor_requests,
+            "total_users": snapshot['total_users'],
+            "active_requests": snapshot['active_requests'],
+            "client_requests": snapshot['client_requests'],
+            "contractor_requests": snapshot['contractor_requests'],
+            "requests_by_status": snapshot['requests_by_status'],
+            "computed_at": snapshot['computed_at'],
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
@@ -87,6 +85,78 @@ async def metrics():
             "timestamp": datetime.now().isoformat()
         }, status_code=500)
 
+@app.get("/queries")
+async def queries(limit: int = 20, x_admin_token: str = Header(default='')):
+    """Топ форм SQL-запросов по суммарному времени (заголовок X-Admin-Token)"""
+    from config import Config
+    from query_stats import query_stats
+    
+    if not Config.ADMIN_API_TOKEN or x_admin_token != Config.ADMIN_API_TOKEN:
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    
+    return JSONResponse({
+        "total_queries": query_stats.total_queries,
+        "slow_threshold_ms": query_stats.slow_threshold * 1000,
+        "queries": query_stats.top(max(1, min(limit, 100))),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.get("/flood")
+async def flood(limit: int = 20, x_admin_token: str = Header(default='')):
+    """Пользователи, чьи апдейты отбрасывает защита от флуда (заголовок X-Admin-Token)"""
+    from config import Config
+    from flood_control import flood_control
+    
+    if not Config.ADMIN_API_TOKEN or x_admin_token != Config.ADMIN_API_TOKEN:
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    
+    return JSONResponse({
+        "rate_per_second": flood_control.rate,
+        "burst": flood_control.burst,
+        "tracked_users": len(flood_control.buckets),
+        "dropped_total": sum(flood_control.dropped.values()),
+        "top_users": [
+            {"telegram_id": user_id, "dropped": count}
+            for user_id, count in flood_control.top_offenders(max(1, min(limit, 100)))
+        ],
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.get("/search")
+async def search(q: str, offset: int = 0, limit: int = 20, x_admin_token: str = Header(default='')):
+    """Полнотекстовый поиск заявок для админа (заголовок X-Admin-Token)"""
+    from config import Config
+    from database import search_requests
+    
+    if not Config.ADMIN_API_TOKEN or x_admin_token != Config.ADMIN_API_TOKEN:
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    
+    limit = max(1, min(limit, 100))
+    requests, has_more, used_query = search_requests(q, max(offset, 0), limit)
+    return JSONResponse({
+        "query": q,
+        "corrected_query": used_query if used_query != q else None,
+        "offset": offset,
+        "has_more": has_more,
+        "results": [
+            {
+                "id": req.id,
+                "request_type": req.request_type,
+                "status": req.status,
+                "title": req.title,
+                "location": req.location,
+                "user": {
+                    "telegram_id": req.user.telegram_id,
+                    "name": f"{req.user.first_name or ''} {req.user.last_name or ''}".strip(),
+                    "phone": req.user.phone,
+                } if req.user else None,
+                "created_at": req.created_at.isoformat() if req.created_at else None,
+            }
+            for req in requests
+        ],
+        "timestamp": datetime.now().isoformat()
+    })
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)